@@ -0,0 +1,90 @@
+"""Time pulling single games out of a large PGN collection.
+
+Usage::
+
+    python benchmarks/bench_collection.py --games 100000
+
+Writes a synthetic PGN database to a temporary directory and compares the
+one-off offset scan, loading the persisted index in a fresh process (the
+in-memory cache cleared), and reading one game through the index against
+splitting the whole file to find the same game.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_renderer import collection
+from sbs_renderer.collection import read_game, scan
+
+MOVES = ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Ba4", "Nf6", "O-O", "Be7", "Re1", "b5", "Bb3", "d6", "c3", "O-O"]
+
+
+def synthetic_pgn(path: Path, games: int, rng: random.Random) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        for number in range(1, games + 1):
+            plies = rng.randrange(20, 120)
+            moves = " ".join(
+                (f"{ply // 2 + 1}. " if ply % 2 == 0 else "") + MOVES[ply % len(MOVES)] for ply in range(plies)
+            )
+            handle.write(
+                f'[Event "Synthetic {number}"]\n[Site "?"]\n[Date "2024.01.01"]\n[Round "{number}"]\n'
+                f'[White "Player {rng.randrange(1000)}"]\n[Black "Player {rng.randrange(1000)}"]\n'
+                f'[Result "*"]\n\n{moves} *\n\n'
+            )
+
+
+def timed(fn: Callable[[], Any], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[collection.INDEX_DIR_ENV] = os.path.join(tmp, "index")
+        path = Path(tmp) / "games.pgn"
+        synthetic_pgn(path, args.games, random.Random(20))
+        target = args.games * 2 // 3
+
+        def split_whole_file() -> str:
+            text = path.read_text(encoding="utf-8")
+            return "\n\n[Event ".join(text.split("\n\n[Event ")[target - 1 : target])
+
+        def cold_index() -> str:
+            collection.clear_cache()
+            return read_game(path, "pgn", game=target)
+
+        read_game(path, "pgn", game=1)
+        cases = {
+            "scan offsets": lambda: scan(path, "pgn"),
+            "load index + read": cold_index,
+            "warm read": lambda: read_game(path, "pgn", game=target),
+            "split whole file": split_whole_file,
+        }
+        size = path.stat().st_size / 1e6
+        print(f"{args.games} games, {size:.1f} MB, reading game {target}")
+        for label, fn in cases.items():
+            print(f"  {label:20} {timed(fn, args.rounds):10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
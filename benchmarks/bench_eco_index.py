@@ -0,0 +1,119 @@
+"""Compare the binary ECO index with the JSON dictionary as the table grows.
+
+Usage::
+
+    python benchmarks/bench_eco_index.py --positions 5889 100000 400000
+
+The real dictionary is extended with synthetic lines (random walks over the
+SAN moves it already contains) up to each size. For both formats the script
+reports the file size, the time and resident memory (Linux `/proc`) it adds
+to a fresh process, and the cost of classifying a 40-ply game.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_renderer.eco import build_index
+
+DICTIONARY = ROOT / "prototype" / "chess" / "eco-dictionary.json"
+
+# Runs in a child process so load time and RSS start from a clean slate.
+PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, sys.argv[3])
+from sbs_renderer.eco import EcoIndex, classify
+import sbs_renderer.eco as eco
+
+kind, path = sys.argv[1], sys.argv[2]
+game = sys.argv[4].split()
+def rss_mb():
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+before = rss_mb()
+start = time.perf_counter()
+if kind == "json":
+    with open(path, encoding="utf-8") as handle:
+        lookup = json.load(handle)["lookup"]
+    def lookup_game():
+        for length in range(len(game), 0, -1):
+            if " ".join(game[:length]) in lookup:
+                return
+else:
+    index = EcoIndex.open(path)
+    eco.load_index = lambda: index
+    def lookup_game():
+        classify(game)
+loaded = time.perf_counter() - start
+lookup_game()
+rounds = 2000
+start = time.perf_counter()
+for _ in range(rounds):
+    lookup_game()
+per_game = (time.perf_counter() - start) / rounds
+print(json.dumps({"load_ms": loaded * 1000, "lookup_us": per_game * 1e6, "rss_mb": rss_mb() - before}))
+"""
+
+
+def grow(lookup: dict, positions: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    keys = list(lookup)
+    moves = sorted({san for key in keys for san in key.split()})
+    grown = dict(lookup)
+    while len(grown) < positions:
+        line = rng.choice(keys).split()
+        line = line[: rng.randint(1, len(line))]
+        for _ in range(rng.randint(1, 12)):
+            line.append(rng.choice(moves))
+            key = " ".join(line)
+            if key not in grown:
+                grown[key] = {"eco": f"Z{len(grown) % 100:02d}", "labels": {"en": f"Line {len(grown) % 997}", "zh": ""}, "ply": len(line)}
+    return grown
+
+
+def probe(kind: str, path: Path, game: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, kind, str(path), str(ROOT / "src"), game],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, nargs="+", default=[5889, 100000, 400000])
+    args = parser.parse_args()
+
+    base = json.loads(DICTIONARY.read_text(encoding="utf-8"))["lookup"]
+    game = max(base, key=lambda key: len(key.split()) if len(key.split()) <= 40 else 0)
+
+    print(f"{'positions':>9} {'format':>6} {'size MB':>8} {'load ms':>8} {'RSS MB':>7} {'lookup us':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for positions in args.positions:
+            lookup = grow(base, positions)
+            json_path = Path(tmp) / "eco.json"
+            json_path.write_text(json.dumps({"lookup": lookup}, ensure_ascii=False), encoding="utf-8")
+            bin_path = Path(tmp) / "eco.bin"
+            bin_path.write_bytes(build_index({"lookup": lookup}))
+            for kind, path in (("json", json_path), ("binary", bin_path)):
+                stats = probe(kind, path, game)
+                print(
+                    f"{positions:9d} {kind:>6} {path.stat().st_size / 1e6:8.2f} {stats['load_ms']:8.2f}"
+                    f" {stats['rss_mb']:7.1f} {stats['lookup_us']:10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
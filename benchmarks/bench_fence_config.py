@@ -0,0 +1,103 @@
+"""Compare the fence-config parsing paths.
+
+Usage::
+
+    python benchmarks/bench_fence_config.py --repeat 200
+
+Every widget fence under `tests/markdown` is parsed with:
+
+- `legacy`: the previous `from_fence` logic (pure-Python `yaml.safe_load`,
+  retried on the whole body when the `---` split is not a mapping);
+- `csafe`: the same logic on libyaml's `CSafeLoader`;
+- `split_fence`: the current parser (flat fast path, libyaml fallback,
+  one YAML pass per fence).
+
+Times are reported in microseconds per fence.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Any, Callable
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_renderer.utils import split_fence
+
+FENCE_RE = re.compile(r"^```(sbs-chess|sbs-go|sbs-bridge)\n(.*?)^```", re.MULTILINE | re.DOTALL)
+PAYLOAD_KEYS = {"sbs-chess": "pgn", "sbs-go": "sgf", "sbs-bridge": "pbn"}
+
+
+def legacy_parser(load: Callable[[str], Any]) -> Callable[[str, str], dict]:
+    def parse(raw: str, payload_key: str) -> dict:
+        if "---" in raw:
+            config_part, payload = (part.strip() for part in raw.split("---", 1))
+            try:
+                config = load(config_part)
+                if config is None:
+                    config = {}
+                if isinstance(config, dict):
+                    config[payload_key] = payload
+                    return config
+            except yaml.YAMLError:
+                pass
+        text = raw.strip()
+        if not text:
+            return {}
+        try:
+            data = load(text)
+        except yaml.YAMLError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    return parse
+
+
+def collect_fences() -> list[tuple[str, str]]:
+    fences = []
+    for path in sorted((ROOT / "tests" / "markdown").glob("*.md")):
+        for lang, body in FENCE_RE.findall(path.read_text(encoding="utf-8")):
+            fences.append((body, PAYLOAD_KEYS[lang]))
+    return fences
+
+
+def bench(parse: Callable[[str, str], dict], fences: list[tuple[str, str]], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for body, key in fences:
+            parse(body, key)
+    return (time.perf_counter() - start) / (repeat * len(fences)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    fences = collect_fences()
+    flat = [(body, key) for body, key in fences if "\n  " not in body.split("---", 1)[0]]
+    paths = {
+        "legacy": legacy_parser(yaml.safe_load),
+        "split_fence": split_fence,
+    }
+    if yaml.__with_libyaml__:
+        paths["csafe"] = legacy_parser(lambda text: yaml.load(text, Loader=yaml.CSafeLoader))
+
+    for name, parse in paths.items():
+        for body, key in fences:
+            assert parse(body, key) == paths["legacy"](body, key), (name, body[:60])
+
+    print(f"{len(fences)} fences ({len(flat)} with flat configs), {args.repeat} rounds")
+    for name, parse in paths.items():
+        print(f"{name:12} all {bench(parse, fences, args.repeat):9.1f} us/fence   flat {bench(parse, flat, args.repeat):9.1f} us/fence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Time the image-attribute pre-pass on large chapters.
+
+Usage::
+
+    python benchmarks/bench_image_attrs.py --sizes 1 2 4 8
+
+For each size (in MB) two documents are built from the sample Markdown
+under `tests/markdown`: one without images and one with an attributed image
+every few paragraphs. Both are normalized with the previous line-by-line
+implementation (kept below for comparison) and the current scanner.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_renderer.image_attrs import normalize_image_attribute_syntax
+
+IMAGE = "![Diagram](assets/board.png){scale=0.5, align=center}\n\n"
+
+
+def legacy_normalize(text: str) -> str:
+    if not text or "," not in text and "." not in text:
+        return text
+
+    in_fence = False
+    fence_re = re.compile(r"^\s*```")
+    img_attrs_re = re.compile(r"(!\[[^\]]*\]\([^\)]*\))\s*\{([^}]*)\}")
+
+    out_lines: list[str] = []
+    for line in (text or "").splitlines(keepends=True):
+        if fence_re.match(line):
+            in_fence = not in_fence
+            out_lines.append(line)
+            continue
+
+        if in_fence:
+            out_lines.append(line)
+            continue
+
+        def repl(match: re.Match[str]) -> str:
+            normalized = match.group(2).replace(",", " ")
+            normalized = re.sub(
+                r"(\b[\w-]+\s*=\s*)(\d+\.\d+)\b",
+                lambda m: f"{m.group(1)}\"{m.group(2)}\"",
+                normalized,
+            )
+            return f"{match.group(1)}{{{normalized}}}"
+
+        out_lines.append(img_attrs_re.sub(repl, line))
+
+    return "".join(out_lines)
+
+
+def build_documents(size: int) -> tuple[str, str]:
+    samples = [path.read_text(encoding="utf-8") for path in sorted((ROOT / "tests" / "markdown").glob("*.md"))]
+    plain_parts = [sample for sample in samples if "![" not in sample]
+    plain = "\n\n".join(plain_parts)
+    plain = plain * max(1, size // len(plain))
+
+    paragraphs = plain.split("\n\n")
+    with_images = "\n\n".join(p + ("\n\n" + IMAGE if i % 8 == 0 else "") for i, p in enumerate(paragraphs))
+    return plain, with_images
+
+
+def timed(fn: Callable[[str], str], text: str, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8], help="Document sizes in MB")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'MB':>5} {'images':>7} {'legacy ms':>10} {'scanner ms':>11}")
+    for megabytes in args.sizes:
+        plain, with_images = build_documents(int(megabytes * 1024 * 1024))
+        for label, text in (("no", plain), ("yes", with_images)):
+            assert normalize_image_attribute_syntax(text) == legacy_normalize(text)
+            legacy = timed(legacy_normalize, text, args.rounds)
+            scanner = timed(normalize_image_attribute_syntax, text, args.rounds)
+            print(f"{len(text) / 1024 / 1024:5.1f} {label:>7} {legacy:10.2f} {scanner:11.3f}")
+
+
+if __name__ == "__main__":
+    main()
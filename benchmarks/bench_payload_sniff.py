@@ -0,0 +1,101 @@
+"""Time widget fences whose body is a large bare game record.
+
+Usage::
+
+    python benchmarks/bench_payload_sniff.py --megabytes 4
+
+Builds multi-megabyte SGF, PGN and PBN bodies (no `---` config split) and
+compares parsing them with the old approach (`yaml.safe_load` over the whole
+body, pure Python and libyaml) against `from_fence`, which recognises the
+record format up front and never hands it to YAML.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+import time
+from typing import Any, Callable
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_renderer.bridge import BridgeBlock
+from sbs_renderer.chess import ChessBlock
+from sbs_renderer.go import GoBlock
+
+PGN_GAME = (
+    '[Event "Bench"]\n[Site "?"]\n[White "A"]\n[Black "B"]\n[Result "1-0"]\n\n'
+    "1.e4 e5 2.f4 exf4 3.Bc4 Qh4+ 4.Kf1 b5 5.Bxb5 Nf6 6.Nf3 Qh6 7.d3 Nh5 "
+    "8.Nh4 Qg5 9.Nf5 c6 10.g4 Nf6 11.Rg1 cxb5 12.h4 Qg6 13.h5 Qg5 1-0\n\n"
+)
+PBN_BOARD = (
+    '[Board "1"]\n[Dealer "N"]\n[Vulnerable "None"]\n'
+    '[Deal "N:AKQJ.AKQJ.AK.AQJ 9876.9876.8.K982 5432.5432.54.754 T.T.QJT97632.T63"]\n\n'
+)
+
+
+def sgf_record(size: int) -> str:
+    letters = "abcdefghijklmnopqrs"
+    moves = []
+    total = 0
+    index = 0
+    while total < size:
+        colour = "B" if index % 2 == 0 else "W"
+        move = f";{colour}[{letters[index % 19]}{letters[(index * 7) % 19]}]"
+        moves.append(move)
+        total += len(move)
+        index += 1
+    return "(;GM[1]FF[4]SZ[19]" + "".join(moves) + ")"
+
+
+def repeat_to(chunk: str, size: int) -> str:
+    return chunk * max(1, size // len(chunk))
+
+
+def timed(fn: Callable[[], Any], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def old_parse(load: Callable[[str], Any], text: str) -> Any:
+    try:
+        data = load(text.strip())
+    except yaml.YAMLError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    size = int(args.megabytes * 1024 * 1024)
+    cases = {
+        "sgf": (sgf_record(size), GoBlock),
+        "pgn": (repeat_to(PGN_GAME, size), ChessBlock),
+        "pbn": (repeat_to(PBN_BOARD, size), BridgeBlock),
+    }
+    loaders = {"safe_load": yaml.safe_load}
+    if yaml.__with_libyaml__:
+        loaders["CSafeLoader"] = lambda text: yaml.load(text, Loader=yaml.CSafeLoader)
+
+    for name, (body, block) in cases.items():
+        assert block.from_fence(body).config == {}
+        print(f"{name}: {len(body) / 1024 / 1024:.1f} MB")
+        for label, load in loaders.items():
+            print(f"  old {label:12} {timed(lambda: old_parse(load, body), args.rounds):10.2f} ms")
+        print(f"  from_fence       {timed(lambda: block.from_fence(body), args.rounds):10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare per-request renderer construction with the editor's renderer pool.
+
+Usage::
+
+    python benchmarks/bench_render_pool.py --requests 400 --concurrency 8
+
+Each "request" renders one of the sample documents under `tests/markdown`
+the same way `/api/render` does. Latencies are reported as p50/p99 in ms.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import statistics
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_editor.pool import RendererPool
+from sbs_renderer.renderer import SBSRenderer
+
+SAMPLES = sorted((ROOT / "tests" / "markdown").glob("*.md"))
+THEMES = ("default", "classic")
+
+
+def render_fresh(text: str, theme: str) -> str:
+    renderer = SBSRenderer(widgets_dir="/widgets", theme=theme)
+    return renderer.render_document(text, title="Bench")
+
+
+def make_pooled(pool: RendererPool):
+    def render_pooled(text: str, theme: str) -> str:
+        renderer = pool.get(widgets_dir="/widgets", theme=theme)
+        return renderer.render_document(text, title="Bench")
+
+    return render_pooled
+
+
+def run(render, docs: list[str], requests: int, concurrency: int) -> list[float]:
+    def one(i: int) -> float:
+        text = docs[i % len(docs)]
+        theme = THEMES[i % len(THEMES)]
+        start = time.perf_counter()
+        render(text, theme)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, range(requests)))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, latencies: list[float], wall: float) -> None:
+    print(
+        f"{label:<8} p50={percentile(latencies, 50):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms "
+        f"mean={statistics.fmean(latencies):7.2f}ms "
+        f"throughput={len(latencies) / wall:8.1f} req/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    docs = [path.read_text(encoding="utf-8") for path in SAMPLES]
+    pool = RendererPool()
+    candidates = [("fresh", render_fresh), ("pooled", make_pooled(pool))]
+
+    # Warm imports and the pool so neither side pays one-time costs.
+    for _, render in candidates:
+        run(render, docs, len(docs) * len(THEMES), 1)
+
+    print(f"{args.requests} requests, concurrency={args.concurrency}, {len(docs)} documents")
+    for label, render in candidates:
+        start = time.perf_counter()
+        latencies = run(render, docs, args.requests, args.concurrency)
+        report(label, latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
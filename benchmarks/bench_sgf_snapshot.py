@@ -0,0 +1,77 @@
+"""Time the go board snapshots a problem book pays for at render time.
+
+Usage::
+
+    python benchmarks/bench_sgf_snapshot.py --diagrams 500 --moves 250
+
+Generates random 19x19 games (with captures) and reports the cost of
+`sgf.snapshot` at the final move, with and without move numbers, plus the
+full `GoBlock.to_html` for the same fences.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import time
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from sbs_renderer.go import GoBlock
+from sbs_renderer.sgf import Board, BLACK, WHITE, snapshot
+
+LETTERS = "abcdefghijklmnopqrs"
+
+
+def random_game(rng: random.Random, moves: int) -> str:
+    board = Board(19)
+    nodes = []
+    colour = BLACK
+    while len(nodes) < moves:
+        point = rng.randrange(361)
+        if board.play(point, colour):
+            tag = "B" if colour == BLACK else "W"
+            nodes.append(f";{tag}[{LETTERS[point % 19]}{LETTERS[point // 19]}]")
+            colour = WHITE if colour == BLACK else BLACK
+    return "(;GM[1]FF[4]SZ[19]" + "".join(nodes) + ")"
+
+
+def timed(fn: Callable[[], Any], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diagrams", type=int, default=500)
+    parser.add_argument("--moves", type=int, default=250)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(18)
+    games = [random_game(rng, args.moves) for _ in range(args.diagrams)]
+    fences = [f"initialMove: {args.moves}\nshowMoveNumbers: 20\n---\n{sgf}" for sgf in games]
+
+    cases = {
+        "snapshot": lambda: [snapshot(sgf, initial_move=args.moves) for sgf in games],
+        "snapshot + numbers": lambda: [
+            snapshot(sgf, initial_move=args.moves, show_move_numbers=True) for sgf in games
+        ],
+        "GoBlock.to_html": lambda: [GoBlock.from_fence(fence).to_html() for fence in fences],
+    }
+    print(f"{args.diagrams} diagrams, 19x19, {args.moves} moves each")
+    for label, fn in cases.items():
+        total = timed(fn, args.rounds)
+        print(f"  {label:20} {total:9.1f} ms total {total / args.diagrams:8.3f} ms/diagram")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Run CPU-bound rendering off the asyncio event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import threading
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+BACKENDS = ("thread", "process")
+# Streamed chunks are batched up to this size per hop to a worker thread.
+STREAM_BATCH_BYTES = 16 * 1024
+
+
+class RenderSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("render workers are saturated")
+        self.retry_after = retry_after
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within the per-request timeout."""
+
+
+class RenderExecutor:
+    """Bounded thread or process pool for render jobs.
+
+    At most `workers + queue_depth` jobs are admitted at once; anything
+    beyond that is rejected immediately with `RenderSaturated` so callers
+    can answer 503 instead of piling up requests. A job that exceeds
+    `timeout` raises `RenderTimeout`. Queued jobs are cancelled on timeout,
+    but a job that already started keeps its slot until it finishes since
+    neither threads nor pool processes can be interrupted safely.
+    """
+
+    def __init__(
+        self,
+        *,
+        backend: str = "thread",
+        workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        timeout: float = 30.0,
+        retry_after: int = 1,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown render backend {backend!r}; expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = max(1, workers or min(4, os.cpu_count() or 1))
+        self.queue_depth = max(0, self.workers * 4 if queue_depth is None else queue_depth)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str = "SBS_RENDER_") -> "RenderExecutor":
+        """Build an executor from `SBS_RENDER_*` environment variables."""
+
+        def env(name: str) -> Optional[str]:
+            value = os.environ.get(prefix + name)
+            return value if value else None
+
+        workers = env("WORKERS")
+        queue_depth = env("QUEUE_DEPTH")
+        timeout = env("TIMEOUT")
+        retry_after = env("RETRY_AFTER")
+        return cls(
+            backend=env("BACKEND") or "thread",
+            workers=int(workers) if workers else None,
+            queue_depth=int(queue_depth) if queue_depth else None,
+            timeout=float(timeout) if timeout else 30.0,
+            retry_after=int(retry_after) if retry_after else 1,
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self.backend == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="sbs-render"
+                )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._inflight >= self.capacity:
+                raise RenderSaturated(self.retry_after)
+            self._inflight += 1
+
+    def _release(self, _future: Future[Any]) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run `fn(*args)` on the backend and await its result."""
+
+        self._acquire()
+        try:
+            future = self._ensure_executor().submit(fn, *args)
+        except BaseException:
+            self._release(Future())
+            raise
+        # Release the slot when the job really finishes, not when we stop waiting.
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise RenderTimeout(f"render exceeded {self.timeout:g}s") from None
+
+    async def stream(self, fn: Callable[..., Iterator[str]], *args: Any) -> AsyncIterator[str]:
+        """Iterate `fn(*args)` on the backend, yielding its output as it comes.
+
+        The stream holds one slot until it ends. Each batch is pulled only
+        when the previous one has been consumed, so a slow client pauses
+        the render instead of piling up output; `timeout` applies per
+        batch. Process workers cannot hand back a generator, so that
+        backend renders everything first and yields it once.
+        """
+
+        if self.backend == "process":
+            yield await self.run(_joined, fn, *args)
+            return
+
+        self._acquire()
+        future: Optional[Future[Any]] = None
+        try:
+            executor = self._ensure_executor()
+            iterator = fn(*args)
+            # The first chunk (the document head) goes out on its own.
+            limit = 0
+            while True:
+                future = executor.submit(_next_batch, iterator, limit)
+                limit = STREAM_BATCH_BYTES
+                try:
+                    batch = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                except asyncio.TimeoutError:
+                    future.cancel()
+                    raise RenderTimeout(f"render exceeded {self.timeout:g}s") from None
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            # As in `run`, a batch still running keeps the slot until it ends.
+            if future is None or future.done():
+                self._release(future or Future())
+            else:
+                future.add_done_callback(self._release)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _next_batch(iterator: Iterator[str], limit: int) -> Optional[str]:
+    """Join chunks from `iterator` until `limit` characters; ``None`` once exhausted."""
+
+    parts: list[str] = []
+    size = 0
+    for chunk in iterator:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return "".join(parts) if parts else None
+
+
+def _joined(fn: Callable[..., Iterator[str]], *args: Any) -> str:
+    return "".join(fn(*args))
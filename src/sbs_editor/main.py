@@ -4,15 +4,80 @@ import os
 # Ensure the src directory is in the path so sbs_renderer can be imported
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import html
+from urllib.parse import urlsplit
+
+import anyio.to_thread
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket
 from pydantic import BaseModel
-from sbs_renderer.renderer import SBSRenderer
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+from sbs_editor.executor import RenderExecutor, RenderSaturated, RenderTimeout
+from sbs_editor.pool import render_document_inputs_job, render_document_stream_job, render_patch_job, shared_pool
+from sbs_editor.sessions import HandleStore, PreviewSession, PreviewState
 from sbs_editor.snippets import DEMO_DOCUMENT, WIDGET_SNIPPETS
+from sbs_editor.staticfiles import AssetCache, CachedStaticFiles, etag_matches
+from sbs_renderer.cache import RenderCache, render_key
+
+from fastapi.responses import FileResponse, StreamingResponse
+
+# Rendering is CPU-bound; run it on a bounded thread/process pool configured
+# through SBS_RENDER_BACKEND, SBS_RENDER_WORKERS, SBS_RENDER_QUEUE_DEPTH,
+# SBS_RENDER_TIMEOUT and SBS_RENDER_RETRY_AFTER.
+render_executor = RenderExecutor.from_env()
+
+# Rendered documents keyed by content hash; sized via SBS_RENDER_CACHE_BYTES
+# and persisted under SBS_RENDER_CACHE_DIR when set.
+render_cache = RenderCache.from_env()
+
+# Last block render per editor tab, for incremental previews.
+preview_states = HandleStore()
+
+# Cap on renders in flight from /ws/render sessions across all tabs, so live
+# previews leave room on the executor for plain /api/render calls.
+live_render_limit = int(os.environ.get("SBS_LIVE_RENDER_LIMIT") or max(1, render_executor.workers))
+live_render_slots = asyncio.Semaphore(live_render_limit)
+
+# Pages on other origins allowed to open /ws/render, comma separated
+# (e.g. "https://editor.example.com"). The editor's own origin always is.
+allowed_origins = frozenset(
+    origin.strip().rstrip("/") for origin in os.environ.get("SBS_ALLOWED_ORIGINS", "").split(",") if origin.strip()
+)
+
+# Widgets and editor UI served from memory with gzip/brotli variants, so a
+# deployment without nginx in front still gets compressed, validated assets.
+# Sized via SBS_STATIC_CACHE_BYTES.
+WIDGETS_DIR = "widgets"
+STATIC_DIR = "src/sbs_editor/static"
+static_cache = AssetCache.from_env()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Load and compress the assets before the first page asks for them.
+    await anyio.to_thread.run_sync(static_cache.warm, [STATIC_DIR, WIDGETS_DIR])
+    yield
+    render_executor.shutdown()
+
 
-from fastapi.responses import FileResponse
+class APICompressionMiddleware:
+    """Gzip large `/api/` responses; static files bring their own encodings."""
 
-app = FastAPI(title="SBS Editor API")
+    def __init__(self, app: ASGIApp, *, minimum_size: int = 1024):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=6)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith("/api/"):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+app = FastAPI(title="SBS Editor API", lifespan=lifespan)
+app.add_middleware(APICompressionMiddleware)
 
 
 @app.get("/api/snippets")
@@ -30,7 +95,7 @@ async def favicon():
 
 # Mount widgets directory to serve SBS components
 # The renderer will use /widgets as the base path for scripts/css
-app.mount("/widgets", StaticFiles(directory="widgets"), name="widgets")
+app.mount("/widgets", CachedStaticFiles(directory=WIDGETS_DIR, cache=static_cache), name="widgets")
 
 
 class RenderRequest(BaseModel):
@@ -39,17 +104,147 @@ class RenderRequest(BaseModel):
     title: str = "SBS Preview"
 
 
+@contextmanager
+def render_errors():
+    """Map executor overload, timeouts and invalid documents to HTTP errors."""
+    try:
+        yield
+    except RenderSaturated as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Renderer is busy, retry shortly",
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    except RenderTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+    except ValueError as exc:
+        # Unreplayable games, unreadable collections and bad fence configs.
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+async def run_render(fn, *args):
+    """Run a render job on the executor, mapping overload to HTTP errors."""
+    with render_errors():
+        return await render_executor.run(fn, *args)
+
+
 @app.post("/api/render")
-async def render_markdown(req: RenderRequest):
-    renderer = SBSRenderer(widgets_dir="/widgets", theme=req.theme)
-    # render_document returns a full HTML string
-    html_doc = renderer.render_document(req.text, title=req.title)
+async def render_markdown(req: RenderRequest, request: Request, response: Response):
+    key = render_key(
+        "document",
+        req.text,
+        theme=req.theme,
+        widgets_dir="/widgets",
+        title=req.title,
+        assets=shared_pool.asset_version,
+    )
+    etag = f'"{key}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    html_doc = render_cache.get(key)
+    if html_doc is None:
+        html_doc, inputs = await run_render(render_document_inputs_job, req.text, req.theme, req.title, "/widgets")
+        if inputs:
+            # Depends on files that may change without the text changing.
+            response.headers["Cache-Control"] = "no-store"
+            return {"html": html_doc}
+        render_cache.put(key, html_doc)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     return {"html": html_doc}
 
 
+@app.post("/api/render/stream")
+async def render_markdown_stream(req: RenderRequest):
+    """The document as HTML, sent as it renders instead of wrapped in JSON."""
+    chunks = render_executor.stream(render_document_stream_job, req.text, req.theme, req.title, "/widgets")
+    # Pull the head before answering so overload still maps to 503/504.
+    with render_errors():
+        head = await anext(chunks)
+
+    async def body():
+        try:
+            yield head
+            async for chunk in chunks:
+                yield chunk
+        except ValueError as exc:
+            # The status is already sent; report the bad block in the page.
+            yield f"<pre class='sbs-render-error'>{html.escape(str(exc))}</pre>\n</body>\n</html>"
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(body(), media_type="text/html; charset=utf-8", headers={"Cache-Control": "no-cache"})
+
+
+class PatchRequest(RenderRequest):
+    handle: str | None = None
+
+
+@app.post("/api/render/patch")
+async def render_markdown_patch(req: PatchRequest):
+    state = preview_states.get(req.handle)
+    previous = None
+    if state is not None and state.theme == req.theme and state.title == req.title:
+        previous = state.handle
+
+    handle, patch, html_doc = await run_render(
+        render_patch_job, previous, req.text, req.theme, req.title, "/widgets"
+    )
+
+    token = preview_states.put(
+        PreviewState(handle=handle, theme=req.theme, title=req.title),
+        token=req.handle if state is not None else None,
+    )
+    if patch is None:
+        return {"handle": token, "full": True, "html": html_doc}
+    return {
+        "handle": token,
+        "full": False,
+        "order": patch.order,
+        "blocks": patch.blocks,
+        "removed": patch.removed,
+    }
+
+
+def origin_allowed(origin: str | None, host: str | None) -> bool:
+    """Whether a page on `origin` may use the editor served as `host`.
+
+    Browsers cannot read cross-origin `/api/` responses because the app sends
+    no CORS headers, but WebSockets are not covered by that policy, so the
+    live preview checks the `Origin` header itself. Clients that send none
+    are not browsers and are let through.
+    """
+    if origin is None:
+        return True
+    origin = origin.rstrip("/")
+    return origin in allowed_origins or (host is not None and urlsplit(origin).netloc == host)
+
+
+@app.websocket("/ws/render")
+async def render_live(websocket: WebSocket):
+    if not origin_allowed(websocket.headers.get("origin"), websocket.headers.get("host")):
+        # Policy violation, before the handshake completes.
+        await websocket.close(code=1008)
+        return
+    session = PreviewSession(
+        websocket,
+        executor=render_executor,
+        limiter=live_render_slots,
+        widgets_dir="/widgets",
+    )
+    await session.run()
+
+
+@app.get("/api/render/cache")
+async def render_cache_stats():
+    return render_cache.stats().as_dict()
+
+
 # Static files for the editor UI will be mounted at root
 # We'll enable this after creating the static files
-app.mount("/", StaticFiles(directory="src/sbs_editor/static", html=True), name="static")
+app.mount("/", CachedStaticFiles(directory=STATIC_DIR, html=True, cache=static_cache), name="static")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,120 @@
+"""Shared renderer instances for the editor backend."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+from pathlib import Path
+import threading
+
+from typing import Iterator, Optional
+
+from sbs_renderer.assets import AssetManifest, load_manifest
+from sbs_renderer.blocks import BlockPatch, RenderHandle
+from sbs_renderer.renderer import SBSRenderer
+
+
+class RendererPool:
+    """Keep one warm `SBSRenderer` per (widgets_dir, theme) pair.
+
+    `SBSRenderer` keeps all per-render state in the `env` dict passed to
+    `render`, so a single instance can serve concurrent requests. The pool
+    is bounded because the theme comes straight from the request body.
+    """
+
+    def __init__(self, *, max_size: int = 32, asset_manifest: Optional[AssetManifest] = None):
+        self.max_size = max(1, max_size)
+        self.asset_manifest = asset_manifest
+        self._renderers: OrderedDict[tuple[str, str], SBSRenderer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, *, widgets_dir: str = "./widgets", theme: str = "default") -> SBSRenderer:
+        key = (widgets_dir.rstrip("/"), theme or "default")
+        with self._lock:
+            renderer = self._renderers.get(key)
+            if renderer is not None:
+                self._renderers.move_to_end(key)
+                return renderer
+
+            renderer = SBSRenderer(widgets_dir=key[0], theme=key[1], asset_manifest=self.asset_manifest)
+            self._renderers[key] = renderer
+            while len(self._renderers) > self.max_size:
+                self._renderers.popitem(last=False)
+            return renderer
+
+    @property
+    def asset_version(self) -> Optional[str]:
+        """Manifest version for render cache keys (``None`` without one)."""
+        return self.asset_manifest.version if self.asset_manifest is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._renderers.clear()
+
+    def __len__(self) -> int:
+        return len(self._renderers)
+
+
+# Process-wide pool used by render jobs. Each worker process of a process
+# backend gets its own copy on first use. SBS_ASSET_MANIFEST points at the
+# output of `python -m sbs_renderer assets` to link widgets by content hash.
+shared_pool = RendererPool(
+    asset_manifest=load_manifest(os.environ["SBS_ASSET_MANIFEST"]) if os.environ.get("SBS_ASSET_MANIFEST") else None
+)
+
+
+def render_document_job(text: str, theme: str, title: str, widgets_dir: str) -> str:
+    """Render a full HTML document with a pooled renderer.
+
+    Kept at module level so it can be shipped to process pool workers.
+    """
+
+    renderer = shared_pool.get(widgets_dir=widgets_dir, theme=theme)
+    return renderer.render_document(text, title=title)
+
+
+def render_document_inputs_job(text: str, theme: str, title: str, widgets_dir: str) -> tuple[str, frozenset[Path]]:
+    """Render a full HTML document along with the files it read.
+
+    Callers keeping their own cache must not store documents that read
+    files (see `SBSRenderer.render_document_inputs`).
+    """
+
+    renderer = shared_pool.get(widgets_dir=widgets_dir, theme=theme)
+    return renderer.render_document_inputs(text, title=title)
+
+
+def render_document_stream_job(text: str, theme: str, title: str, widgets_dir: str) -> Iterator[str]:
+    """Stream a full HTML document with a pooled renderer, block by block."""
+
+    renderer = shared_pool.get(widgets_dir=widgets_dir, theme=theme)
+    yield from renderer.render_document_stream(text, title=title)
+
+
+def render_patch_job(
+    handle: Optional[RenderHandle],
+    text: str,
+    theme: str,
+    title: str,
+    widgets_dir: str,
+) -> tuple[RenderHandle, Optional[BlockPatch], Optional[str]]:
+    """Block-render `text`, patching `handle` when one is given.
+
+    Returns the new handle plus either a patch or, when there is no previous
+    handle or the document now needs widget scripts it did not load, a full
+    HTML document.
+    """
+
+    renderer = shared_pool.get(widgets_dir=widgets_dir, theme=theme)
+    if handle is None:
+        handle = renderer.render_blocks(text)
+        return handle, None, renderer.render_blocks_document(handle, title=title)
+
+    patch = renderer.render_patch(handle, text)
+    new_handle = patch.handle
+    needs_scripts = bool(new_handle.used_widgets - handle.used_widgets) or (
+        new_handle.image_scale and not handle.image_scale
+    )
+    if needs_scripts:
+        return new_handle, None, renderer.render_blocks_document(new_handle, title=title)
+    return new_handle, patch, None
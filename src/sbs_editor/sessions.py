@@ -0,0 +1,187 @@
+"""Server-side state for incremental previews."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import secrets
+import threading
+from typing import Any, Optional
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from sbs_editor.executor import RenderExecutor, RenderSaturated, RenderTimeout
+from sbs_editor.pool import render_patch_job
+from sbs_renderer.blocks import RenderHandle
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PreviewState:
+    """Last block render of one editor tab."""
+
+    handle: RenderHandle
+    theme: str
+    title: str
+
+
+class HandleStore:
+    """Bounded LRU of preview states keyed by an opaque token.
+
+    Tokens are handed to the client; an unknown or evicted token simply
+    means the next preview is a full render.
+    """
+
+    def __init__(self, *, max_size: int = 64):
+        self.max_size = max(1, max_size)
+        self._states: OrderedDict[str, PreviewState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: Optional[str]) -> Optional[PreviewState]:
+        if not token:
+            return None
+        with self._lock:
+            state = self._states.get(token)
+            if state is not None:
+                self._states.move_to_end(token)
+            return state
+
+    def put(self, state: PreviewState, token: Optional[str] = None) -> str:
+        token = token or secrets.token_urlsafe(12)
+        with self._lock:
+            self._states[token] = state
+            self._states.move_to_end(token)
+            while len(self._states) > self.max_size:
+                self._states.popitem(last=False)
+        return token
+
+
+class PreviewSession:
+    """Live-preview channel for one editor tab over a WebSocket.
+
+    The client sends `{"rev", "text", "theme", "title"}` messages as the
+    author types. Only the newest unrendered revision is kept: anything
+    still waiting when a newer one arrives is dropped. Each session renders
+    at most one revision at a time and every render also needs a slot from
+    the process-wide `limiter`, so a burst of typists cannot flood the
+    render workers. Results are pushed back tagged with their revision.
+    Frames that are not a JSON object get a `400` error frame and the
+    session keeps going.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        executor: RenderExecutor,
+        limiter: asyncio.Semaphore,
+        widgets_dir: str = "/widgets",
+    ):
+        self.websocket = websocket
+        self.executor = executor
+        self.limiter = limiter
+        self.widgets_dir = widgets_dir
+        self.state: Optional[PreviewState] = None
+        self.dropped = 0
+        self._pending: Optional[dict[str, Any]] = None
+        self._wakeup = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+
+    async def run(self) -> None:
+        await self.websocket.accept()
+        worker = asyncio.create_task(self._render_loop())
+        worker.add_done_callback(_log_crash)
+        try:
+            while True:
+                try:
+                    message = await self.websocket.receive_json()
+                except ValueError:
+                    message = None
+                if isinstance(message, dict):
+                    self._submit(message)
+                else:
+                    await self._send({"type": "error", "rev": None, "status": 400, "detail": "expected a JSON object"})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            worker.cancel()
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        # The receive loop and the render loop both reply on this socket.
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    def _submit(self, message: dict[str, Any]) -> None:
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = message
+        self._wakeup.set()
+
+    async def _render_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            retry_after = None
+            async with self.limiter:
+                # Pick the request only once a slot is free so that anything
+                # superseded while waiting is never rendered.
+                request, self._pending = self._pending, None
+                if request is None:
+                    continue
+                try:
+                    reply = await self._render(request)
+                except RenderSaturated as exc:
+                    # Retry later unless a newer revision shows up in the meantime.
+                    if self._pending is None:
+                        self._pending = request
+                    retry_after = exc.retry_after
+                except Exception:
+                    logger.exception("live preview render of revision %r failed", request.get("rev"))
+                    reply = {"type": "error", "rev": request.get("rev"), "status": 500, "detail": "render failed"}
+            if retry_after is not None:
+                # Back off outside the limiter so other sessions can use the slot.
+                await asyncio.sleep(retry_after)
+                self._wakeup.set()
+            else:
+                await self._send(reply)
+
+    async def _render(self, request: dict[str, Any]) -> dict[str, Any]:
+        rev = request.get("rev")
+        text = str(request.get("text") or "")
+        theme = str(request.get("theme") or "default")
+        title = str(request.get("title") or "SBS Preview")
+
+        previous = None
+        state = self.state
+        if state is not None and not request.get("full") and (state.theme, state.title) == (theme, title):
+            previous = state.handle
+
+        try:
+            handle, patch, html_doc = await self.executor.run(
+                render_patch_job, previous, text, theme, title, self.widgets_dir
+            )
+        except RenderTimeout as exc:
+            return {"type": "error", "rev": rev, "status": 504, "detail": str(exc)}
+        except ValueError as exc:
+            # A bad game in this revision; keep the last good state for the next one.
+            return {"type": "error", "rev": rev, "status": 422, "detail": str(exc)}
+
+        self.state = PreviewState(handle=handle, theme=theme, title=title)
+        if patch is None:
+            return {"type": "render", "rev": rev, "full": True, "html": html_doc}
+        return {
+            "type": "render",
+            "rev": rev,
+            "full": False,
+            "order": patch.order,
+            "blocks": patch.blocks,
+            "removed": patch.removed,
+        }
+
+
+def _log_crash(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("live preview session stopped rendering", exc_info=task.exception())
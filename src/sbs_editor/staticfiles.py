@@ -0,0 +1,342 @@
+"""Static file serving for the editor app without a front proxy.
+
+`CachedStaticFiles` keeps Starlette's path handling but answers from a
+bounded in-memory `AssetCache` holding each file together with its gzip
+and brotli variants (gzip only if the `brotli` dependency is missing). Responses
+negotiate `Accept-Encoding`, carry a strong ETag per representation and
+answer `If-None-Match` with 304. URLs with a `?v=` content hash (see
+`sbs_renderer.assets`) are marked immutable; everything else revalidates.
+Requests with a `Range` header are left to Starlette's `FileResponse`.
+
+Variants are compressed when a file is first loaded, or ahead of time::
+
+    python -m sbs_editor.staticfiles widgets src/sbs_editor/static
+
+which writes `.gz`/`.br` files next to the sources (also usable by nginx
+`gzip_static`); they are picked up while newer than their source.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate
+import gzip
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+import threading
+from typing import Iterable, Optional, Union
+from urllib.parse import parse_qs
+
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import PathLike, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Preferred first when the client accepts several.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+_ETAG_SUFFIXES = {None: "", "br": "-br", "gzip": "-gz"}
+_MEDIA_TYPES = {
+    ".js": "text/javascript",
+    ".mjs": "text/javascript",
+    ".css": "text/css",
+    ".html": "text/html",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+}
+_COMPRESSIBLE = ("text/", "application/json", "application/javascript", "image/svg+xml", "application/xml")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    body: bytes
+    media_type: str
+    etag: str
+    mtime: float
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+    def select(self, accept_encoding: str) -> tuple[Optional[str], bytes]:
+        """Best representation for an `Accept-Encoding` header value."""
+
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding]
+        return None, self.body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        return f'"{self.etag}{_ETAG_SUFFIXES[encoding]}"'
+
+
+class AssetCache:
+    """Bounded LRU of static files and their compressed variants.
+
+    Entries are checked against the file's mtime and size on every lookup,
+    so edits are served right away. Files whose variants would not fit the
+    budget are still loaded, just not kept.
+    """
+
+    def __init__(self, *, max_bytes: int = 32 * 1024 * 1024, min_compress: int = 1024):
+        self.max_bytes = max(0, max_bytes)
+        self.min_compress = min_compress
+        self._entries: OrderedDict[str, tuple[tuple[int, int], StaticAsset]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, prefix: str = "SBS_STATIC_CACHE_") -> "AssetCache":
+        """Build a cache sized by `SBS_STATIC_CACHE_BYTES`."""
+
+        max_bytes = os.environ.get(prefix + "BYTES")
+        return cls(max_bytes=int(max_bytes) if max_bytes else 32 * 1024 * 1024)
+
+    def get(self, path: str, stat: Optional[os.stat_result] = None) -> StaticAsset:
+        stat = stat or os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        asset = load_asset(path, stat, min_compress=self.min_compress)
+        with self._lock:
+            self._store(path, version, asset)
+        return asset
+
+    def warm(self, directories: Iterable[Union[str, os.PathLike[str]]]) -> int:
+        """Load every file under `directories` until the budget is used."""
+
+        loaded = 0
+        for path in _walk(directories):
+            if self._bytes >= self.max_bytes:
+                break
+            try:
+                self.get(os.fspath(path))
+            except OSError:
+                continue
+            loaded += 1
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, path: str, version: tuple[int, int], asset: StaticAsset) -> None:
+        previous = self._entries.pop(path, None)
+        if previous is not None:
+            self._bytes -= previous[1].size
+        if asset.size > self.max_bytes:
+            return
+        self._entries[path] = (version, asset)
+        self._bytes += asset.size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+
+class CachedStaticFiles(StaticFiles):
+    """`StaticFiles` answering from an `AssetCache`."""
+
+    def __init__(self, *, directory: PathLike, html: bool = False, cache: Optional[AssetCache] = None):
+        super().__init__(directory=directory, html=html)
+        self.cache = cache if cache is not None else AssetCache()
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if "range" in Headers(scope=scope):
+            # Partial content is served from disk, uncompressed, by Starlette.
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return CachedFileResponse(self.cache, os.fspath(full_path), stat_result, status_code=status_code)
+
+
+class CachedFileResponse(Response):
+    """Loads the asset off the event loop, then negotiates the encoding."""
+
+    def __init__(self, cache: AssetCache, path: str, stat: os.stat_result, *, status_code: int = 200):
+        self.cache = cache
+        self.path = path
+        self.stat = stat
+        self.status_code = status_code
+        self.background = None
+        self.raw_headers = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        asset = await anyio.to_thread.run_sync(self.cache.get, self.path, self.stat)
+        request_headers = Headers(scope=scope)
+        encoding, body = asset.select(request_headers.get("accept-encoding", ""))
+        etag = asset.etag_for(encoding)
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+
+        headers = {
+            "content-type": _content_type(asset.media_type),
+            "etag": etag,
+            "last-modified": formatdate(asset.mtime, usegmt=True),
+            "cache-control": IMMUTABLE if query.get("v") else "no-cache",
+        }
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+
+        status = self.status_code
+        if status == 200 and etag_matches(request_headers.get("if-none-match"), etag):
+            status, body = 304, b""
+        else:
+            headers["content-length"] = str(len(body))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` check (weak comparison, as RFC 9110 asks for GET)."""
+
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0 and name:
+            accepted.add(name.strip().lower())
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+def load_asset(path: Union[str, os.PathLike[str]], stat: os.stat_result, *, min_compress: int = 1024) -> StaticAsset:
+    with open(path, "rb") as handle:
+        body = handle.read()
+    media_type = media_type_for(path)
+    variants: dict[str, bytes] = {}
+    if len(body) >= min_compress and media_type.startswith(_COMPRESSIBLE):
+        for encoding in ENCODINGS:
+            data = _precompressed(path, encoding, stat) or compress(body, encoding, best=False)
+            if len(data) < len(body):
+                variants[encoding] = data
+    return StaticAsset(
+        body=body,
+        media_type=media_type,
+        etag=hashlib.sha256(body).hexdigest()[:20],
+        mtime=stat.st_mtime,
+        variants=variants,
+    )
+
+
+def _content_type(media_type: str) -> str:
+    if media_type.startswith("text/") or media_type in ("application/json", "image/svg+xml"):
+        return f"{media_type}; charset=utf-8"
+    return media_type
+
+
+def media_type_for(path: Union[str, os.PathLike[str]]) -> str:
+    suffix = Path(path).suffix.lower()
+    return _MEDIA_TYPES.get(suffix) or mimetypes.guess_type(os.fspath(path))[0] or "application/octet-stream"
+
+
+def compress(data: bytes, encoding: str, *, best: bool = True) -> bytes:
+    """Compress for `encoding`; `best` spends more time (build-time use)."""
+
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11 if best else 5)
+    raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+def precompress(directories: Iterable[Union[str, os.PathLike[str]]], *, min_compress: int = 1024) -> int:
+    """Write `.gz` (and `.br`) siblings for compressible files; returns the count written."""
+
+    written = 0
+    for path in _walk(directories):
+        stat = path.stat()
+        if stat.st_size < min_compress or not media_type_for(path).startswith(_COMPRESSIBLE):
+            continue
+        data = None
+        for encoding in ENCODINGS:
+            if _precompressed(path, encoding, stat) is not None:
+                continue
+            data = data if data is not None else path.read_bytes()
+            target = path.with_name(path.name + _SUFFIXES[encoding])
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(compress(data, encoding))
+            os.replace(tmp, target)
+            written += 1
+    return written
+
+
+def _precompressed(path: Union[str, os.PathLike[str]], encoding: str, stat: os.stat_result) -> Optional[bytes]:
+    sibling = os.fspath(path) + _SUFFIXES[encoding]
+    try:
+        if os.stat(sibling).st_mtime_ns < stat.st_mtime_ns:
+            return None
+        with open(sibling, "rb") as handle:
+            return handle.read()
+    except OSError:
+        return None
+
+
+def _walk(directories: Iterable[Union[str, os.PathLike[str]]]) -> Iterable[Path]:
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+            for filename in sorted(filenames):
+                if filename.startswith(".") or filename.endswith((".gz", ".br", ".tmp")):
+                    continue
+                yield Path(dirpath) / filename
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sbs_editor.staticfiles",
+        description="Write precompressed .gz/.br variants of static assets",
+    )
+    parser.add_argument("directories", nargs="+", type=Path, help="Directories to precompress")
+    args = parser.parse_args(argv)
+    written = precompress(args.directories)
+    print(f"{written} variant(s) written ({', '.join(ENCODINGS)})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,12 +2,43 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+import sys
 
+from .cache import RenderCache
 from .renderer import SBSRenderer
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Render SBS Markdown to HTML")
+    argv = sys.argv[1:]
+    if argv and argv[0] == "build":
+        from .build import main as build_main
+
+        sys.exit(build_main(argv[1:]))
+    if argv and argv[0] == "book":
+        from .book import main as book_main
+
+        sys.exit(book_main(argv[1:]))
+    if argv and argv[0] == "serve":
+        from .serve import main as serve_main
+
+        sys.exit(serve_main(argv[1:]))
+    if argv and argv[0] == "assets":
+        from .assets import main as assets_main
+
+        sys.exit(assets_main(argv[1:]))
+    if argv and argv[0] == "eco":
+        from .eco import main as eco_main
+
+        sys.exit(eco_main(argv[1:]))
+
+    parser = argparse.ArgumentParser(
+        description="Render SBS Markdown to HTML",
+        epilog=(
+            "Use `python -m sbs_renderer build --help` to render many files in parallel "
+            "and `python -m sbs_renderer book --help` / `serve --help` to build or preview a toc.yaml book. "
+            "`python -m sbs_renderer assets` fingerprints the widgets for --asset-manifest."
+        ),
+    )
     parser.add_argument("source", type=Path, help="Markdown source file")
     parser.add_argument("output", type=Path, help="Destination HTML file")
     parser.add_argument(
@@ -21,10 +52,44 @@ def main() -> None:
         help="Theme name located under widgets/themes",
     )
     parser.add_argument("--title", default="SBS Document", help="Document title")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Reuse rendered output stored here when inputs are unchanged",
+    )
+    parser.add_argument(
+        "--static-diagrams",
+        action="store_true",
+        help="Draw non-interactive boards and deals as inline SVG",
+    )
+    parser.add_argument(
+        "--asset-manifest",
+        type=Path,
+        default=None,
+        help="Asset manifest from `python -m sbs_renderer assets`; links widgets by content hash",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the document block by block instead of building it in memory",
+    )
+    args = parser.parse_args(argv)
 
     text = args.source.read_text(encoding="utf-8")
-    renderer = SBSRenderer(widgets_dir=args.widgets_dir, theme=args.theme)
+    cache = RenderCache(disk_dir=args.cache_dir) if args.cache_dir else None
+    renderer = SBSRenderer(
+        widgets_dir=args.widgets_dir,
+        theme=args.theme,
+        cache=cache,
+        base_dir=args.source.parent,
+        static_diagrams=args.static_diagrams,
+        asset_manifest=args.asset_manifest,
+    )
+    if args.stream:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.writelines(renderer.render_document_stream(text, title=args.title))
+        return
     html_doc = renderer.render_document(text, title=args.title)
     args.output.write_text(html_doc, encoding="utf-8")
 
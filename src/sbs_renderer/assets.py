@@ -0,0 +1,227 @@
+"""Content-hashed URLs for the widget assets.
+
+`python -m sbs_renderer assets widgets` fingerprints every file under the
+widgets directory into `asset-manifest.json`: a short content hash per file
+plus the relative imports of each module and stylesheet. A renderer built
+with `SBSRenderer(asset_manifest=...)` then links assets as `file?v=<hash>`,
+versions nested module imports through an import map and preloads the
+static module graph of the widgets a page uses, so every widget URL it
+emits can be cached as immutable.
+
+Stylesheet `@import`s cannot be remapped, so a stylesheet's hash also
+covers the files it imports; the imported files themselves are requested
+unversioned and must be revalidated by the server.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from functools import cached_property
+import hashlib
+import json
+import os
+from pathlib import Path, PurePosixPath
+import posixpath
+import re
+import tempfile
+from typing import Any, Iterable, Optional, Union
+
+MANIFEST_FILE = "asset-manifest.json"
+FORMAT = 1
+
+_HASH_CHARS = 12
+_MODULE_SUFFIXES = (".js", ".mjs")
+# Relative specifiers only; bare and absolute imports are left alone.
+_STATIC_IMPORT_RE = re.compile(
+    r"""\b(?:import|export)\s*(?:[\w$*{}\s,]*?\bfrom\s*)?["'](\.{1,2}/[^"'\n]+)["']"""
+)
+_DYNAMIC_IMPORT_RE = re.compile(r"""\bimport\s*\(\s*["'](\.{1,2}/[^"'\n]+)["']\s*\)""")
+_CSS_IMPORT_RE = re.compile(r"""@import\s+(?:url\(\s*)?["']?([^"')\s;]+)""")
+
+
+@dataclass(frozen=True)
+class Asset:
+    hash: str
+    # Files loaded along with this one (static imports / `@import`).
+    imports: tuple[str, ...] = ()
+    # Modules this one may `import()` later; versioned but not preloaded.
+    lazy: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class AssetManifest:
+    """Asset hashes and import graph, keyed by path relative to the widgets."""
+
+    files: dict[str, Asset] = field(default_factory=dict)
+
+    @cached_property
+    def version(self) -> str:
+        """Digest of the whole manifest, for cache keys."""
+
+        payload = json.dumps(self.to_json(), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:_HASH_CHARS]
+
+    def url(self, prefix: str, path: str) -> str:
+        """`prefix/path`, with `?v=<hash>` when the file is in the manifest."""
+
+        base = f"{prefix}/{path}"
+        version = self._url_hashes.get(path)
+        return f"{base}?v={version}" if version else base
+
+    def import_map(self, prefix: str) -> dict[str, dict[str, str]]:
+        """Import map pinning every module under `prefix` to its hash."""
+
+        return {
+            "imports": {
+                f"{prefix}/{path}": self.url(prefix, path)
+                for path in sorted(self.files)
+                if path.endswith(_MODULE_SUFFIXES)
+            }
+        }
+
+    def module_graph(self, entries: Iterable[str]) -> list[str]:
+        """Entries and their static imports, dependencies first."""
+
+        order: list[str] = []
+        seen: set[str] = set()
+
+        def visit(path: str) -> None:
+            if path in seen or path not in self.files:
+                return
+            seen.add(path)
+            for child in self.files[path].imports:
+                visit(child)
+            order.append(path)
+
+        for entry in entries:
+            visit(entry)
+        return order
+
+    def to_json(self) -> dict[str, Any]:
+        files = {}
+        for path, asset in sorted(self.files.items()):
+            entry: dict[str, Any] = {"hash": asset.hash}
+            if asset.imports:
+                entry["imports"] = list(asset.imports)
+            if asset.lazy:
+                entry["lazy"] = list(asset.lazy)
+            files[path] = entry
+        return {"format": FORMAT, "files": files}
+
+    @classmethod
+    def from_json(cls, data: Any) -> "AssetManifest":
+        if not isinstance(data, dict) or data.get("format") != FORMAT or not isinstance(data.get("files"), dict):
+            raise ValueError("unsupported asset manifest")
+        return cls(
+            {
+                str(path): Asset(
+                    hash=str(entry["hash"]),
+                    imports=tuple(entry.get("imports") or ()),
+                    lazy=tuple(entry.get("lazy") or ()),
+                )
+                for path, entry in data["files"].items()
+            }
+        )
+
+    @cached_property
+    def _url_hashes(self) -> dict[str, str]:
+        hashes: dict[str, str] = {}
+
+        def url_hash(path: str, stack: tuple[str, ...] = ()) -> str:
+            if path in hashes:
+                return hashes[path]
+            asset = self.files[path]
+            if not path.endswith(".css") or not asset.imports:
+                hashes[path] = asset.hash
+                return asset.hash
+            digest = hashlib.sha256(asset.hash.encode("ascii"))
+            for child in asset.imports:
+                if child in self.files and child not in stack:
+                    digest.update(url_hash(child, stack + (path,)).encode("ascii"))
+            hashes[path] = digest.hexdigest()[:_HASH_CHARS]
+            return hashes[path]
+
+        for path in self.files:
+            url_hash(path)
+        return hashes
+
+
+def build_manifest(widgets_dir: Union[str, os.PathLike[str]]) -> AssetManifest:
+    """Fingerprint every file under `widgets_dir`."""
+
+    root = Path(widgets_dir)
+    files: dict[str, Asset] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        for filename in sorted(filenames):
+            if filename.startswith(".") or filename == MANIFEST_FILE or filename.endswith((".gz", ".br", ".tmp")):
+                continue
+            path = Path(dirpath) / filename
+            rel = path.relative_to(root).as_posix()
+            data = path.read_bytes()
+            imports: tuple[str, ...] = ()
+            lazy: tuple[str, ...] = ()
+            if rel.endswith(_MODULE_SUFFIXES):
+                text = data.decode("utf-8", errors="replace")
+                imports = _resolve_all(rel, _STATIC_IMPORT_RE.findall(text))
+                lazy = _resolve_all(rel, _DYNAMIC_IMPORT_RE.findall(text))
+            elif rel.endswith(".css"):
+                imports = _resolve_all(rel, _CSS_IMPORT_RE.findall(data.decode("utf-8", errors="replace")))
+            files[rel] = Asset(hash=hashlib.sha256(data).hexdigest()[:_HASH_CHARS], imports=imports, lazy=lazy)
+    return AssetManifest(files)
+
+
+def write_manifest(widgets_dir: Union[str, os.PathLike[str]], output: Optional[Path] = None) -> Path:
+    manifest = build_manifest(widgets_dir)
+    target = output or Path(widgets_dir) / MANIFEST_FILE
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        json.dump(manifest.to_json(), handle, indent=2)
+        handle.write("\n")
+    os.replace(tmp_name, target)
+    return target
+
+
+def load_manifest(path: Union[str, os.PathLike[str]]) -> AssetManifest:
+    """Read a manifest written by `write_manifest` (a widgets directory also works)."""
+
+    path = Path(path)
+    if path.is_dir():
+        path = path / MANIFEST_FILE
+    return AssetManifest.from_json(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _resolve_all(origin: str, specifiers: Iterable[str]) -> tuple[str, ...]:
+    found: list[str] = []
+    for specifier in specifiers:
+        target = specifier.split("?", 1)[0].split("#", 1)[0]
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(origin), target))
+        if resolved.startswith("../") or PurePosixPath(resolved).is_absolute():
+            continue
+        if resolved not in found:
+            found.append(resolved)
+    return tuple(found)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sbs_renderer assets",
+        description="Fingerprint widget assets into a manifest for content-hashed URLs",
+    )
+    parser.add_argument("widgets", type=Path, nargs="?", default=Path("widgets"), help="Widgets directory")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help=f"Manifest path (default: <widgets>/{MANIFEST_FILE})",
+    )
+    args = parser.parse_args(argv)
+    if not args.widgets.is_dir():
+        parser.error(f"{args.widgets} is not a directory")
+    target = write_manifest(args.widgets, args.output)
+    manifest = load_manifest(target)
+    print(f"{len(manifest.files)} asset(s) fingerprinted into {target} (version {manifest.version})")
+    return 0
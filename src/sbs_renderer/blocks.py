@@ -0,0 +1,323 @@
+"""Incremental rendering of SBS documents by top-level block.
+
+A document is split into its top-level markdown-it blocks (paragraphs,
+headings, lists, widget fences, `::: sbs-sticky` containers, ...) using the
+token `map` line ranges. Each block is rendered on its own and gets a stable
+ID, so a later edit only re-parses the region around the changed lines and
+ships the blocks that actually differ. Sticky containers are a single
+top-level block, so their figure/body wrapping always stays consistent.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+import hashlib
+import re
+from typing import TYPE_CHECKING, Any
+
+from markdown_it.token import Token
+
+from .image_attrs import normalize_image_attribute_syntax
+
+if TYPE_CHECKING:
+    from .renderer import SBSRenderer
+
+
+# Anything that could be a link reference definition. Definitions affect
+# inline rendering of every block, so edits touching them re-render all.
+_REFERENCE_LINE_RE = re.compile(r"^ {0,3}(?:>\s*)*\[[^\]]+\]:")
+_CONTINUATION_TYPES = {"bullet_list_open", "ordered_list_open", "blockquote_open"}
+
+
+@dataclass(frozen=True)
+class RenderedBlock:
+    """One rendered top-level block and the source lines it came from."""
+
+    id: str
+    start: int
+    end: int
+    key: str
+    html: str
+    widgets: frozenset[str] = frozenset()
+    image_scale: bool = False
+
+    def to_html(self) -> str:
+        return f"<div data-sbs-block='{self.id}'>\n{self.html}</div>\n"
+
+    def shifted(self, delta: int) -> "RenderedBlock":
+        if not delta:
+            return self
+        return RenderedBlock(
+            self.id, self.start + delta, self.end + delta, self.key, self.html, self.widgets, self.image_scale
+        )
+
+
+@dataclass
+class RenderHandle:
+    """State kept between renders of the same document."""
+
+    lines: list[str]
+    blocks: list[RenderedBlock]
+    references: dict[str, Any] = field(default_factory=dict)
+    next_id: int = 0
+
+    @property
+    def html(self) -> str:
+        return "".join(block.to_html() for block in self.blocks)
+
+    @property
+    def used_widgets(self) -> set[str]:
+        widgets: set[str] = set()
+        for block in self.blocks:
+            widgets.update(block.widgets)
+        return widgets
+
+    @property
+    def image_scale(self) -> bool:
+        return any(block.image_scale for block in self.blocks)
+
+
+@dataclass
+class BlockPatch:
+    """Difference between two renders, in terms of block IDs."""
+
+    handle: RenderHandle
+    order: list[str]
+    blocks: dict[str, str]
+    removed: list[str]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.blocks or self.removed)
+
+
+def render_blocks(renderer: "SBSRenderer", text: str) -> RenderHandle:
+    """Render `text` from scratch, one top-level block at a time."""
+
+    lines = _source_lines(text)
+    env: dict[str, Any] = {}
+    tokens = renderer.md.parse("\n".join(lines), env)
+    handle = RenderHandle(lines=lines, blocks=[], references=env.get("references", {}))
+    handle.blocks = _render_ranges(renderer, handle, tokens, lines, offset=0, reusable={})
+    return handle
+
+
+def render_patch(renderer: "SBSRenderer", previous: RenderHandle, text: str) -> BlockPatch:
+    """Re-render only the blocks affected by the change from `previous` to `text`."""
+
+    new_lines = _source_lines(text)
+    old_lines = previous.lines
+    old_blocks = previous.blocks
+
+    prefix = _common_prefix(old_lines, new_lines)
+    if prefix == len(old_lines) == len(new_lines):
+        return BlockPatch(handle=previous, order=[b.id for b in old_blocks], blocks={}, removed=[])
+    suffix = _common_suffix(old_lines, new_lines, limit=min(len(old_lines), len(new_lines)) - prefix)
+    old_change_end = len(old_lines) - suffix
+    delta = len(new_lines) - len(old_lines)
+
+    # Restart from the block that precedes the first changed line: the edit
+    # may extend it (lazy paragraph continuation, list items, setext headings).
+    first = 0
+    for index, block in enumerate(old_blocks):
+        if block.start >= prefix:
+            break
+        first = index
+    start = old_blocks[first].start if old_blocks and old_blocks[first].start < prefix else 0
+
+    # Candidate resync points: old blocks whose source is entirely in the
+    # unchanged suffix. Try the nearest first and widen until the window
+    # parse ends cleanly before the next reused block.
+    candidates = [i for i in range(first, len(old_blocks)) if old_blocks[i].start >= max(old_change_end, start + 1)]
+    candidates.append(len(old_blocks))
+
+    for resume in candidates:
+        old_end = old_blocks[resume].start if resume < len(old_blocks) else len(old_lines)
+        new_end = old_end + delta
+        if _touches_references(old_lines, start, old_end) or _touches_references(new_lines, start, new_end):
+            return _full_patch(renderer, previous, text)
+
+        window = new_lines[start:new_end]
+        env: dict[str, Any] = {"references": dict(previous.references)}
+        tokens = renderer.md.parse("\n".join(window), env)
+        if resume == len(old_blocks) or _ends_cleanly(tokens, window, new_lines, new_end):
+            break
+
+    replaced = old_blocks[first:resume] if old_blocks else []
+    reusable = {block.key: block for block in replaced}
+    handle = RenderHandle(
+        lines=new_lines,
+        blocks=[],
+        references=previous.references,
+        next_id=previous.next_id,
+    )
+    fresh = _render_ranges(renderer, handle, tokens, window, offset=start, reusable=reusable)
+    shifted = [block.shifted(delta) for block in old_blocks[resume:]]
+    handle.blocks = old_blocks[:first] + fresh + shifted
+
+    kept_ids = {block.id for block in fresh}
+    replaced_ids = {block.id for block in replaced}
+    return BlockPatch(
+        handle=handle,
+        order=[block.id for block in handle.blocks],
+        blocks={block.id: block.to_html() for block in fresh if block.id not in replaced_ids},
+        removed=[block.id for block in replaced if block.id not in kept_ids],
+    )
+
+
+# ----------------------------------------------------------------------
+# private helpers
+# ----------------------------------------------------------------------
+def _source_lines(text: str) -> list[str]:
+    # Mirror markdown-it's `normalize` core rule so line numbers line up.
+    normalized = normalize_image_attribute_syntax(text or "")
+    normalized = normalized.replace("\r\n", "\n").replace("\r", "\n").replace("\0", "\ufffd")
+    return normalized.split("\n")
+
+
+def _full_patch(renderer: "SBSRenderer", previous: RenderHandle, text: str) -> BlockPatch:
+    handle = render_blocks(renderer, text)
+    # Keep IDs of blocks whose source did not change so the client can keep them.
+    by_key: dict[str, list[RenderedBlock]] = {}
+    for block in previous.blocks:
+        by_key.setdefault(block.key, []).append(block)
+    next_id = previous.next_id
+    blocks: list[RenderedBlock] = []
+    for block in handle.blocks:
+        matches = by_key.get(block.key)
+        if matches and matches[0].html == block.html:
+            blocks.append(replace(block, id=matches.pop(0).id))
+        else:
+            blocks.append(replace(block, id=f"b{next_id}"))
+            next_id += 1
+    handle.blocks = blocks
+    handle.next_id = next_id
+
+    previous_ids = {block.id for block in previous.blocks}
+    current_ids = {block.id for block in blocks}
+    return BlockPatch(
+        handle=handle,
+        order=[block.id for block in blocks],
+        blocks={block.id: block.to_html() for block in blocks if block.id not in previous_ids},
+        removed=[block.id for block in previous.blocks if block.id not in current_ids],
+    )
+
+
+def _render_ranges(
+    renderer: "SBSRenderer",
+    handle: RenderHandle,
+    tokens: list[Token],
+    lines: list[str],
+    *,
+    offset: int,
+    reusable: dict[str, RenderedBlock],
+) -> list[RenderedBlock]:
+    blocks: list[RenderedBlock] = []
+    for begin, end in top_level_ranges(tokens):
+        line_map = tokens[begin].map or [0, 0]
+        source = "\n".join(lines[line_map[0]:line_map[1]])
+        # A block running to the end of the text (an unclosed fence, say)
+        # renders differently with and without a final newline.
+        if line_map[1] < len(lines):
+            source += "\n"
+        key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        start, stop = line_map[0] + offset, line_map[1] + offset
+
+        previous = reusable.pop(key, None)
+        if previous is not None:
+            blocks.append(replace(previous, start=start, end=stop))
+            continue
+
+        env: dict[str, Any] = {}
+        html_str = renderer.md.renderer.render(tokens[begin:end], renderer.md.options, env)
+        blocks.append(
+            RenderedBlock(
+                id=f"b{handle.next_id}",
+                start=start,
+                end=stop,
+                key=key,
+                html=html_str,
+                widgets=frozenset(env.get("_sbs_used_widgets", ())),
+                image_scale=bool(env.get("_sbs_used_image_scale")),
+            )
+        )
+        handle.next_id += 1
+    return blocks
+
+
+def top_level_ranges(tokens: list[Token]) -> list[tuple[int, int]]:
+    """Token index ranges `[begin, end)` of each top-level block."""
+
+    ranges: list[tuple[int, int]] = []
+    index = 0
+    while index < len(tokens):
+        if tokens[index].nesting != 1:
+            ranges.append((index, index + 1))
+            index += 1
+            continue
+        depth = 0
+        end = index
+        while True:
+            depth += tokens[end].nesting
+            end += 1
+            if depth == 0 or end >= len(tokens):
+                break
+        ranges.append((index, end))
+        index = end
+    return ranges
+
+
+def _ends_cleanly(tokens: list[Token], window: list[str], lines: list[str], new_end: int) -> bool:
+    """Whether parsing stopped at the window end exactly as a full parse would."""
+
+    ranges = top_level_ranges(tokens)
+    if not ranges:
+        return True
+    last = tokens[ranges[-1][0]]
+    if last.map is None or last.type in _CONTINUATION_TYPES:
+        return False
+    if last.map[1] >= len(window):
+        return False
+    if not all(not line.strip() for line in window[last.map[1]:]):
+        return False
+    next_line = lines[new_end] if new_end < len(lines) else ""
+    if next_line[:1].isspace():
+        return False
+
+    # Only blank lines follow the last block. Paragraph-like blocks cannot
+    # run past them, but fences, containers and HTML blocks may have been
+    # cut short by the window end unless they were explicitly closed.
+    if last.type == "fence":
+        return _closes_fence(window, last)
+    if last.type.startswith("container_"):
+        closing = window[last.map[1] - 1].strip()
+        return last.map[1] - last.map[0] >= 2 and closing.startswith(":::") and not closing.strip(":")
+    return last.type != "html_block"
+
+
+def _closes_fence(window: list[str], token: Token) -> bool:
+    assert token.map is not None
+    if token.map[1] - token.map[0] < 2:
+        return False
+    closing = window[token.map[1] - 1].strip()
+    marker = token.markup[:1]
+    return len(closing) >= len(token.markup) and closing == marker * len(closing)
+
+
+def _touches_references(lines: list[str], start: int, end: int) -> bool:
+    return any(_REFERENCE_LINE_RE.match(line) for line in lines[start:end])
+
+
+def _common_prefix(a: list[str], b: list[str]) -> int:
+    limit = min(len(a), len(b))
+    index = 0
+    while index < limit and a[index] == b[index]:
+        index += 1
+    return index
+
+
+def _common_suffix(a: list[str], b: list[str], *, limit: int) -> int:
+    count = 0
+    while count < limit and a[-1 - count] == b[-1 - count]:
+        count += 1
+    return count
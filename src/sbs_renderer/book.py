@@ -0,0 +1,489 @@
+"""Render a whole SBS book described by `toc.yaml`.
+
+An SBS 1.1 book is a directory with a `toc.yaml` (metadata plus a nested
+`chapters` tree whose leaves carry a `path` to a Markdown file) and an
+optional `assets/` directory. `build_book` renders the chapters in
+parallel, mirrors the chapter paths under the output directory, copies
+`assets/` alongside and writes a `manifest.json` describing the result.
+The manifest doubles as build state: the next build only re-renders
+chapters whose inputs changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+from pathlib import Path, PurePosixPath
+import re
+import shutil
+import time
+from typing import Any, Optional
+from urllib.parse import unquote
+
+import yaml
+
+from .assets import load_manifest as load_asset_manifest
+from .build import BuildJob, BuildResult, _is_inside, print_summary, run_jobs
+from .cache import renderer_version
+from .image_size import IMAGE_SUFFIXES
+
+TOC_FILE = "toc.yaml"
+ASSETS_DIR = "assets"
+MANIFEST_FILE = "manifest.json"
+
+# Up to this many dirty chapters are rendered in-process, not on a pool.
+SERIAL_THRESHOLD = 4
+
+# Link, image and src/href targets; only those resolving into assets/ count.
+_ASSET_REF_RE = re.compile(r"""(?:\]\(\s*<?|\b(?:src|href)\s*=\s*["']?)([^\s)"'<>]+)""")
+# Game collections named by widget fences (`source: games/wch.pgn`).
+_SOURCE_REF_RE = re.compile(r"""^[ \t]*source[ \t]*:[ \t]*["']?([^\s"'#]+)""", re.MULTILINE)
+
+
+class BookError(ValueError):
+    """Raised when a book directory or its `toc.yaml` is invalid."""
+
+
+@dataclass(frozen=True)
+class Chapter:
+    """A leaf of the table of contents that maps to a Markdown file."""
+
+    name: str
+    path: str
+    trail: tuple[str, ...] = ()
+
+    @property
+    def output(self) -> str:
+        return PurePosixPath(self.path).with_suffix(".html").as_posix()
+
+    @property
+    def depth(self) -> int:
+        return len(PurePosixPath(self.path).parent.parts)
+
+
+@dataclass
+class Book:
+    root: Path
+    name: str
+    author: Optional[str] = None
+    introduction: Optional[str] = None
+    chapters: list[Chapter] = field(default_factory=list)
+    toc: list[dict[str, Any]] = field(default_factory=list)
+
+
+def load_book(root: Path) -> Book:
+    """Parse `toc.yaml` and flatten the chapter tree in reading order."""
+
+    toc_path = root / TOC_FILE
+    try:
+        data = yaml.safe_load(toc_path.read_text(encoding="utf-8")) or {}
+    except OSError as exc:
+        raise BookError(f"cannot read {toc_path}: {exc}") from exc
+    if not isinstance(data, dict):
+        raise BookError(f"{toc_path}: expected a mapping")
+    if not data.get("book_name"):
+        raise BookError(f"{toc_path}: 'book_name' is required")
+
+    book = Book(
+        root=root,
+        name=str(data["book_name"]),
+        author=data.get("book_author"),
+        introduction=data.get("book_introduction"),
+    )
+    book.toc = _walk(data.get("chapters") or [], (), book.chapters, toc_path)
+    return book
+
+
+def _walk(
+    entries: Any,
+    trail: tuple[str, ...],
+    out: list[Chapter],
+    toc_path: Path,
+) -> list[dict[str, Any]]:
+    if not isinstance(entries, list):
+        raise BookError(f"{toc_path}: 'chapters' must be a list")
+
+    nodes: list[dict[str, Any]] = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("name"):
+            raise BookError(f"{toc_path}: every chapter needs a 'name'")
+        name = str(entry["name"])
+        if entry.get("path"):
+            path = PurePosixPath(str(entry["path"]))
+            if path.is_absolute() or ".." in path.parts:
+                raise BookError(f"{toc_path}: chapter {name!r} path must be relative to the book: {str(path)!r}")
+            chapter = Chapter(name=name, path=path.as_posix(), trail=trail)
+            out.append(chapter)
+            nodes.append({"name": name, "path": chapter.path, "output": chapter.output})
+        elif "chapters" in entry:
+            children = _walk(entry["chapters"], trail + (name,), out, toc_path)
+            nodes.append({"name": name, "chapters": children})
+        else:
+            raise BookError(f"{toc_path}: chapter {name!r} needs 'path' or 'chapters'")
+    return nodes
+
+
+def widgets_href(widgets_dir: str, depth: int) -> str:
+    """Widget asset prefix as seen from a chapter `depth` folders deep.
+
+    Absolute paths and URLs are used as-is; relative ones are taken to be
+    relative to the book output root.
+    """
+
+    if _is_external(widgets_dir):
+        return widgets_dir.rstrip("/")
+    relative = PurePosixPath(widgets_dir.rstrip("/") or ".")
+    return PurePosixPath(*([".."] * depth), relative).as_posix()
+
+
+def _is_external(widgets_dir: str) -> bool:
+    return widgets_dir.startswith("/") or "://" in widgets_dir
+
+
+@dataclass
+class BookBuild:
+    """Outcome of `build_book`: rendered chapters and the ones reused as-is."""
+
+    book: Book
+    results: list[BuildResult]
+    skipped: list[Chapter] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def build_book(
+    root: Path,
+    out_dir: Path,
+    *,
+    widgets_dir: str = "widgets",
+    theme: str = "default",
+    workers: Optional[int] = None,
+    copy_widgets: Optional[Path] = None,
+    force: bool = False,
+    static_diagrams: bool = False,
+    asset_manifest: Optional[Path] = None,
+) -> BookBuild:
+    """Render the chapters of the book at `root` whose inputs changed.
+
+    The previous `manifest.json` in `out_dir` records a digest of every
+    chapter's inputs (source, referenced assets, title, output location,
+    theme, widget prefix, diagram mode, widget asset versions and renderer
+    version). Chapters whose digest still matches and whose output exists
+    are not rendered again; `force` renders everything.
+    """
+
+    book = load_book(root)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = {} if force else _previous_chapters(out_dir)
+    version = renderer_version()
+    assets_version = load_asset_manifest(asset_manifest).version if asset_manifest is not None else None
+
+    # Asset locations only depend on chapter depth; work them out once.
+    hrefs = {depth: widgets_href(widgets_dir, depth) for depth in {c.depth for c in book.chapters}}
+    records: dict[str, dict[str, Any]] = {}
+    jobs: list[BuildJob] = []
+    dirty: list[Chapter] = []
+    skipped: list[Chapter] = []
+    for chapter in book.chapters:
+        if not _is_inside(out_dir / chapter.output, out_dir):
+            raise BookError(f"{chapter.path}: output {chapter.output!r} falls outside {out_dir}")
+        old = previous.get(chapter.path, {})
+        record = _chapter_inputs(
+            root,
+            chapter,
+            old,
+            version=version,
+            theme=theme,
+            href=hrefs[chapter.depth],
+            static_diagrams=static_diagrams,
+            assets_version=assets_version,
+        )
+        records[chapter.path] = record
+        if (
+            record.get("key")
+            and record["key"] == old.get("key")
+            and not old.get("error")
+            and (out_dir / chapter.output).exists()
+        ):
+            record.update(bytes=old.get("bytes", 0))
+            skipped.append(chapter)
+            continue
+        dirty.append(chapter)
+        jobs.append(
+            BuildJob(
+                source=root / chapter.path,
+                output=out_dir / chapter.output,
+                title=chapter.name,
+                widgets_dir=hrefs[chapter.depth],
+                root_dir=root,
+            )
+        )
+
+    # A handful of dirty chapters renders faster here than on a fresh pool.
+    if len(jobs) <= SERIAL_THRESHOLD:
+        workers = 1
+    results = run_jobs(
+        jobs,
+        widgets_dir=widgets_dir,
+        theme=theme,
+        workers=workers,
+        static_diagrams=static_diagrams,
+        asset_manifest=str(asset_manifest) if asset_manifest is not None else None,
+    )
+    for chapter, result in zip(dirty, results):
+        records[chapter.path].update(bytes=result.size, error=result.error)
+        if not result.ok:
+            records[chapter.path].pop("key", None)
+
+    sync_tree(root / ASSETS_DIR, out_dir / ASSETS_DIR)
+    if copy_widgets is not None and not _is_external(widgets_dir):
+        sync_tree(copy_widgets, out_dir / widgets_dir)
+
+    current = {chapter.output for chapter in book.chapters}
+    removed = []
+    for old in previous.values():
+        output = old.get("output")
+        # The manifest may be stale or hand-edited; never delete outside out_dir.
+        if output and output not in current and _is_inside(out_dir / output, out_dir):
+            (out_dir / output).unlink(missing_ok=True)
+            removed.append(output)
+
+    write_manifest(book, records, out_dir, widgets_dir=widgets_dir, theme=theme, version=version)
+    return BookBuild(book=book, results=results, skipped=skipped, removed=removed)
+
+
+def write_manifest(
+    book: Book,
+    records: dict[str, dict[str, Any]],
+    out_dir: Path,
+    *,
+    widgets_dir: str,
+    theme: str,
+    version: str,
+) -> Path:
+    chapters = []
+    for chapter in book.chapters:
+        record = records.get(chapter.path, {})
+        chapters.append(
+            {
+                "name": chapter.name,
+                "trail": list(chapter.trail),
+                "source": chapter.path,
+                "output": chapter.output,
+                "bytes": record.get("bytes", 0),
+                "error": record.get("error"),
+                "key": record.get("key"),
+                "content": record.get("content"),
+                "assets": record.get("assets", {}),
+            }
+        )
+    manifest = {
+        "book_name": book.name,
+        "book_author": book.author,
+        "book_introduction": book.introduction,
+        "renderer_version": version,
+        "theme": theme,
+        "widgets_dir": widgets_dir,
+        "toc": book.toc,
+        "chapters": chapters,
+    }
+    path = out_dir / MANIFEST_FILE
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def referenced_assets(root: Path, chapter: Chapter, text: str) -> list[str]:
+    """Book-relative paths of the files a chapter's output depends on.
+
+    These are the files under `assets/` that `text` links to, images
+    elsewhere in the book (their sizes are read for `scale=`), plus any
+    game collection in the book that a fence reads through `source:`.
+    """
+
+    book_dir = root.resolve()
+    assets_dir = (root / ASSETS_DIR).resolve()
+    base = (root / chapter.path).resolve().parent
+    found: set[str] = set()
+    for match in _ASSET_REF_RE.finditer(text):
+        target = match.group(1).split("#", 1)[0].split("?", 1)[0]
+        if not target or ":" in target or target.startswith("/"):
+            continue
+        path = (base / unquote(target)).resolve()
+        if not path.is_file():
+            continue
+        if path.is_relative_to(assets_dir) or (
+            path.is_relative_to(book_dir) and path.suffix.lower() in IMAGE_SUFFIXES
+        ):
+            found.add(path.relative_to(book_dir).as_posix())
+    for match in _SOURCE_REF_RE.finditer(text):
+        path = (base / match.group(1)).resolve()
+        if path.is_relative_to(book_dir) and path.is_file():
+            found.add(path.relative_to(book_dir).as_posix())
+    return sorted(found)
+
+
+def _previous_chapters(out_dir: Path) -> dict[str, dict[str, Any]]:
+    try:
+        data = json.loads((out_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    chapters = data.get("chapters") if isinstance(data, dict) else None
+    if not isinstance(chapters, list):
+        return {}
+    return {entry["source"]: entry for entry in chapters if isinstance(entry, dict) and entry.get("source")}
+
+
+def _chapter_inputs(
+    root: Path,
+    chapter: Chapter,
+    previous: dict[str, Any],
+    *,
+    version: str,
+    theme: str,
+    href: str,
+    static_diagrams: bool = False,
+    assets_version: Optional[str] = None,
+) -> dict[str, Any]:
+    source = root / chapter.path
+    try:
+        content = _file_digest(source, previous.get("content"))
+    except OSError:
+        # Leave it dirty; the render reports the missing file.
+        return {}
+
+    if content is previous.get("content"):
+        asset_paths = list(previous.get("assets") or {})
+    else:
+        text = source.read_text(encoding="utf-8", errors="replace")
+        asset_paths = referenced_assets(root, chapter, text)
+
+    old_assets = previous.get("assets") or {}
+    assets: dict[str, Any] = {}
+    for asset in asset_paths:
+        try:
+            assets[asset] = _file_digest(root / asset, old_assets.get(asset))
+        except OSError:
+            assets[asset] = None
+
+    payload = json.dumps(
+        [
+            version,
+            theme,
+            href,
+            static_diagrams,
+            assets_version,
+            chapter.name,
+            chapter.output,
+            content["sha256"],
+            [(name, digest and digest["sha256"]) for name, digest in sorted(assets.items())],
+        ],
+        ensure_ascii=False,
+    )
+    return {
+        "key": hashlib.sha256(payload.encode("utf-8")).hexdigest(),
+        "content": content,
+        "assets": assets,
+    }
+
+
+def _file_digest(path: Path, previous: Optional[dict[str, Any]]) -> dict[str, Any]:
+    """Content digest of `path`, reusing `previous` when size and mtime match."""
+
+    stat = path.stat()
+    if (
+        isinstance(previous, dict)
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime_ns") == stat.st_mtime_ns
+        and previous.get("sha256")
+    ):
+        return previous
+    return {
+        "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def sync_tree(source: Path, target: Path) -> int:
+    """Copy files from `source` into `target` unless size and mtime match."""
+
+    if not source.is_dir():
+        return 0
+    copied = 0
+    for dirpath, _dirnames, filenames in os.walk(source):
+        for filename in filenames:
+            src = Path(dirpath) / filename
+            dst = target / src.relative_to(source)
+            src_stat = src.stat()
+            try:
+                dst_stat = dst.stat()
+                if dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime >= src_stat.st_mtime:
+                    continue
+            except OSError:
+                pass
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dst)
+            copied += 1
+    return copied
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sbs_renderer book",
+        description="Render an SBS book directory (toc.yaml) to HTML",
+    )
+    parser.add_argument("book", type=Path, help="Book directory containing toc.yaml")
+    parser.add_argument("--out-dir", type=Path, default=Path("dist"), help="Output directory")
+    parser.add_argument(
+        "--widgets-dir",
+        default="widgets",
+        help="Widget asset location, relative to the output root or absolute/URL",
+    )
+    parser.add_argument(
+        "--copy-widgets",
+        type=Path,
+        default=None,
+        help="Copy widget assets from this directory into the output",
+    )
+    parser.add_argument(
+        "--theme",
+        default="default",
+        help="Theme name located under widgets/themes",
+    )
+    parser.add_argument(
+        "--static-diagrams",
+        action="store_true",
+        help="Draw non-interactive boards and deals as inline SVG",
+    )
+    parser.add_argument(
+        "--asset-manifest",
+        type=Path,
+        default=None,
+        help="Asset manifest from `python -m sbs_renderer assets`; links widgets by content hash",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-render every chapter")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        build = build_book(
+            args.book,
+            args.out_dir,
+            widgets_dir=args.widgets_dir,
+            theme=args.theme,
+            workers=args.jobs,
+            copy_widgets=args.copy_widgets,
+            force=args.force,
+            static_diagrams=args.static_diagrams,
+            asset_manifest=args.asset_manifest,
+        )
+    except BookError as exc:
+        parser.error(str(exc))
+    print_summary(build.results, time.perf_counter() - start)
+    print(f"{len(build.skipped)} chapter(s) up to date, {len(build.removed)} stale output(s) removed")
+    return 0 if all(result.ok for result in build.results) else 1
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import html
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from .utils import escape_script_payload, parse_fence_config
+from .diagrams import bridge_box, bridge_svg, figure
+from .pbn import parse_pbn
+from .utils import PBN_PAYLOAD_RE, escape_script_payload, reserve_style, split_fence
 
 
 _ATTR_MAP = {
@@ -14,6 +16,9 @@ _ATTR_MAP = {
 }
 
 _BOOL_ATTRS = set()
+# `.sbs-bridge-widget` margin, border and padding in bridge-component.js.
+_CHROME_WIDTH = 32
+_CHROME_HEIGHT = 72
 
 
 @dataclass
@@ -25,30 +30,7 @@ class BridgeBlock:
     @classmethod
     def from_fence(cls, raw: str) -> "BridgeBlock":
         """Parse the fenced block body as YAML-like config."""
-        # Handle explicit config/data split via '---'
-        if "---" in raw:
-            parts = raw.split("---", 1)
-            config_part = parts[0].strip()
-            pbn_part = parts[1].strip()
-
-            import yaml
-            # Try to parse the first part as YAML
-            try:
-                config = yaml.safe_load(config_part)
-                if config is None:
-                    config = {}
-                if isinstance(config, dict):
-                    # Prioritize 'pbn' as the key
-                    config["pbn"] = pbn_part
-                    return cls(config)
-            except yaml.YAMLError:
-                pass
-
-        parsed = parse_fence_config(raw)
-        if parsed is not None:
-            return cls(parsed)
-        # No configuration found and no explicit PBN separator.
-        return cls({})
+        return cls(split_fence(raw, "pbn", payload_re=PBN_PAYLOAD_RE))
 
     def to_html(self) -> str:
         """Serialize to the <sbs-bridge> custom element."""
@@ -84,15 +66,50 @@ class BridgeBlock:
                 continue
             attr_pairs.append((f"data-{key}", str(value)))
 
+        box = self.reserved_box()
+        if box is not None:
+            attr_pairs.append(("style", reserve_style(*box)))
+
         attr_html = " ".join(
             f"{name}='{html.escape(str(value), quote=True)}'" for name, value in attr_pairs
         ).strip()
 
+        return f"<sbs-bridge {attr_html}>{self.payload_script()}</sbs-bridge>"
+
+    def payload_script(self) -> Optional[str]:
+        """The `<script>` carrying the PBN, exactly as `to_html` embeds it."""
+
+        pbn_payload = (self.config.get("pbn") or self.config.get("data") or "").strip()
+        if not pbn_payload:
+            return None
         # Preserve raw PBN text so the web component receives literal quotes and
         # suit symbols. Escape only the closing script tag sentinel.
-        script = escape_script_payload(pbn_payload)
-        return (
-            f"<sbs-bridge {attr_html}>"
-            f"<script type='application/pbn'>{script}</script>"
-            "</sbs-bridge>"
+        return f"<script type='application/pbn'>{escape_script_payload(pbn_payload)}</script>"
+
+    def reserved_box(self) -> Optional[tuple[float, float]]:
+        """Approximate size of the hydrated widget, from the static drawing's layout."""
+
+        pbn_payload = (self.config.get("pbn") or self.config.get("data") or "").strip()
+        if not pbn_payload or (self.config.get("format") or "pbn").strip() != "pbn":
+            return None
+        deal = parse_pbn(pbn_payload)
+        if not deal.hands and not deal.auction:
+            return None
+        width, height = bridge_box(deal, layout=self.config.get("layout"))
+        return width + _CHROME_WIDTH, height + _CHROME_HEIGHT
+
+    def to_static_html(self) -> Optional[str]:
+        """SVG figure of the deal; ``None`` if there is nothing to draw."""
+
+        pbn_payload = (self.config.get("pbn") or self.config.get("data") or "").strip()
+        if not pbn_payload or (self.config.get("format") or "pbn").strip() != "pbn":
+            return None
+        deal = parse_pbn(pbn_payload)
+        if not deal.hands and not deal.auction:
+            return None
+        svg = bridge_svg(
+            deal,
+            lang=(self.config.get("lang") or "zh").strip(),
+            layout=self.config.get("layout"),
         )
+        return figure("bridge", svg)
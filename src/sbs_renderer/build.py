@@ -0,0 +1,325 @@
+"""Batch rendering of many SBS Markdown files in one process tree.
+
+`python -m sbs_renderer build` renders every matched source on a pool of
+worker processes. Each worker keeps its `SBSRenderer` instances warm, so
+interpreter startup and the markdown-it/yaml imports are paid once per
+core instead of once per file.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import glob
+import os
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Any, Iterable, Optional
+
+import yaml
+
+from .renderer import SBSRenderer
+
+_HEADING_RE = re.compile(r"^#\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+# Renderers owned by the current (worker) process, keyed by options.
+_RENDERERS: dict[tuple[str, str, Optional[str], bool, Optional[str], Optional[str]], SBSRenderer] = {}
+
+
+@dataclass(frozen=True)
+class BuildJob:
+    """One source file to render."""
+
+    source: Path
+    output: Path
+    title: Optional[str] = None
+    theme: Optional[str] = None
+    widgets_dir: Optional[str] = None
+    # Tree that relative image paths may resolve into (a book's root).
+    root_dir: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    source: Path
+    output: Path
+    seconds: float
+    size: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def get_renderer(
+    widgets_dir: str,
+    theme: str,
+    base_dir: Optional[Path] = None,
+    static_diagrams: bool = False,
+    asset_manifest: Optional[str] = None,
+    root_dir: Optional[Path] = None,
+) -> SBSRenderer:
+    """Return this process's warm renderer for the given options."""
+
+    key = (
+        widgets_dir,
+        theme or "default",
+        str(base_dir) if base_dir is not None else None,
+        static_diagrams,
+        asset_manifest,
+        str(root_dir) if root_dir is not None else None,
+    )
+    renderer = _RENDERERS.get(key)
+    if renderer is None:
+        renderer = _RENDERERS[key] = SBSRenderer(
+            widgets_dir=widgets_dir,
+            theme=key[1],
+            base_dir=base_dir,
+            root_dir=root_dir,
+            static_diagrams=static_diagrams,
+            asset_manifest=asset_manifest,
+        )
+    return renderer
+
+
+def guess_title(text: str, fallback: str) -> str:
+    match = _HEADING_RE.search(text)
+    return match.group(1) if match else fallback
+
+
+def render_job(
+    job: BuildJob,
+    widgets_dir: str,
+    theme: str,
+    static_diagrams: bool = False,
+    asset_manifest: Optional[str] = None,
+) -> BuildResult:
+    """Render a single job; never raises so one bad file cannot stop a build."""
+
+    start = time.perf_counter()
+    try:
+        text = job.source.read_text(encoding="utf-8")
+        # Relative image paths are relative to the source file.
+        renderer = get_renderer(
+            job.widgets_dir or widgets_dir,
+            job.theme or theme,
+            job.source.parent,
+            static_diagrams,
+            asset_manifest,
+            job.root_dir,
+        )
+        title = job.title or guess_title(text, job.source.stem)
+        html_doc = renderer.render_document(text, title=title)
+        job.output.parent.mkdir(parents=True, exist_ok=True)
+        job.output.write_text(html_doc, encoding="utf-8")
+    except Exception as exc:  # noqa: BLE001 - reported in the summary
+        return BuildResult(job.source, job.output, time.perf_counter() - start, error=f"{type(exc).__name__}: {exc}")
+    return BuildResult(job.source, job.output, time.perf_counter() - start, size=len(html_doc))
+
+
+def _renderer_options(job: BuildJob, widgets_dir: str, theme: str) -> tuple[str, str, Path, Optional[Path]]:
+    """The `get_renderer` options `render_job` uses for `job`."""
+
+    return (job.widgets_dir or widgets_dir, job.theme or theme, job.source.parent, job.root_dir)
+
+
+def _warm_worker(
+    options: tuple[tuple[str, str, Path, Optional[Path]], ...],
+    static_diagrams: bool,
+    asset_manifest: Optional[str],
+) -> None:
+    for widgets_dir, theme, base_dir, root_dir in options:
+        get_renderer(widgets_dir, theme, base_dir, static_diagrams, asset_manifest, root_dir)
+
+
+def run_jobs(
+    jobs: list[BuildJob],
+    *,
+    widgets_dir: str = "./widgets",
+    theme: str = "default",
+    workers: Optional[int] = None,
+    static_diagrams: bool = False,
+    asset_manifest: Optional[str] = None,
+) -> list[BuildResult]:
+    """Render `jobs`, in parallel when more than one worker is requested.
+
+    Results are returned in job order.
+    """
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    if workers == 1:
+        return [render_job(job, widgets_dir, theme, static_diagrams, asset_manifest) for job in jobs]
+
+    results: dict[int, BuildResult] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_warm_worker,
+        # One renderer per source directory, as `render_job` looks them up.
+        initargs=(
+            tuple(dict.fromkeys(_renderer_options(job, widgets_dir, theme) for job in jobs)),
+            static_diagrams,
+            asset_manifest,
+        ),
+    ) as executor:
+        futures = {
+            executor.submit(render_job, job, widgets_dir, theme, static_diagrams, asset_manifest): i
+            for i, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return [results[i] for i in range(len(jobs))]
+
+
+def collect_jobs(
+    patterns: Iterable[str],
+    *,
+    out_dir: Path,
+    base: Optional[Path] = None,
+) -> list[BuildJob]:
+    """Expand globs into jobs mirroring the source tree under `out_dir`."""
+
+    sources: list[Path] = []
+    seen: set[Path] = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for match in matches:
+            path = Path(match)
+            if path.is_dir():
+                continue
+            resolved = path.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                sources.append(path)
+
+    if base is None:
+        parents = [str(path.resolve().parent) for path in sources]
+        base = Path(os.path.commonpath(parents)) if parents else Path.cwd()
+    base = base.resolve()
+
+    jobs = []
+    for source in sources:
+        try:
+            relative = source.resolve().relative_to(base)
+        except ValueError:
+            relative = Path(source.name)
+        jobs.append(BuildJob(source=source, output=(out_dir / relative).with_suffix(".html")))
+    return jobs
+
+
+def load_manifest(path: Path, *, out_dir: Path) -> list[BuildJob]:
+    """Read a YAML manifest of sources.
+
+    The manifest is a list whose items are either a source path or a mapping
+    with `source` and optional `output`, `title` and `theme`. Paths are
+    relative to the manifest's directory; outputs to `out_dir`, which they
+    may not leave.
+    """
+
+    data: Any = yaml.safe_load(path.read_text(encoding="utf-8")) or []
+    if isinstance(data, dict):
+        data = data.get("documents") or []
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of documents")
+
+    root = path.parent
+    jobs = []
+    for entry in data:
+        if isinstance(entry, str):
+            entry = {"source": entry}
+        if not isinstance(entry, dict) or not entry.get("source"):
+            raise ValueError(f"{path}: each document needs a 'source'")
+        source = root / str(entry["source"])
+        output = entry.get("output") or Path(str(entry["source"])).with_suffix(".html")
+        if not _is_inside(out_dir / str(output), out_dir):
+            raise ValueError(f"{path}: output {str(output)!r} falls outside {out_dir}")
+        jobs.append(
+            BuildJob(
+                source=source,
+                output=out_dir / str(output),
+                title=entry.get("title"),
+                theme=entry.get("theme"),
+            )
+        )
+    return jobs
+
+
+def _is_inside(path: Path, base: Path) -> bool:
+    """Whether `path` stays under `base` once `..` and symlinks are resolved."""
+
+    return path.resolve().is_relative_to(base.resolve())
+
+
+def print_summary(results: list[BuildResult], wall: float, *, stream=None) -> None:
+    stream = stream or sys.stdout
+    for result in sorted(results, key=lambda r: r.seconds, reverse=True):
+        status = "ok " if result.ok else "ERR"
+        line = f"{status} {result.seconds * 1000:9.1f} ms  {result.source} -> {result.output}"
+        if result.error:
+            line += f"  ({result.error})"
+        print(line, file=stream)
+
+    busy = sum(result.seconds for result in results)
+    failed = sum(1 for result in results if not result.ok)
+    print(
+        f"{len(results)} file(s), {failed} failed, "
+        f"{wall:.2f}s wall, {busy:.2f}s rendering"
+        + (f", {busy / wall:.1f}x parallel" if wall > 0 else ""),
+        file=stream,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sbs_renderer build",
+        description="Render many SBS Markdown files in parallel",
+    )
+    parser.add_argument("sources", nargs="*", help="Markdown files or glob patterns")
+    parser.add_argument("--manifest", type=Path, help="YAML list of documents to render")
+    parser.add_argument("--out-dir", type=Path, default=Path("dist"), help="Output directory")
+    parser.add_argument("--base", type=Path, help="Source root mirrored under --out-dir")
+    parser.add_argument(
+        "--widgets-dir",
+        default="./widgets",
+        help="Directory containing SBS widget assets",
+    )
+    parser.add_argument(
+        "--theme",
+        default="default",
+        help="Theme name located under widgets/themes",
+    )
+    parser.add_argument(
+        "--static-diagrams",
+        action="store_true",
+        help="Draw non-interactive boards and deals as inline SVG",
+    )
+    parser.add_argument(
+        "--asset-manifest",
+        default=None,
+        help="Asset manifest from `python -m sbs_renderer assets`; links widgets by content hash",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    jobs: list[BuildJob] = []
+    if args.manifest:
+        jobs.extend(load_manifest(args.manifest, out_dir=args.out_dir))
+    if args.sources:
+        jobs.extend(collect_jobs(args.sources, out_dir=args.out_dir, base=args.base))
+    if not jobs:
+        parser.error("no sources given (pass files/globs or --manifest)")
+
+    start = time.perf_counter()
+    results = run_jobs(
+        jobs,
+        widgets_dir=args.widgets_dir,
+        theme=args.theme,
+        workers=args.jobs,
+        static_diagrams=args.static_diagrams,
+        asset_manifest=args.asset_manifest,
+    )
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(result.ok for result in results) else 1
@@ -0,0 +1,203 @@
+"""Content-addressed cache for rendered SBS output.
+
+Keys are SHA-256 digests of the Markdown source, the renderer options and a
+version stamp derived from the renderer's own source files, so upgrading the
+renderer invalidates every entry without manual bookkeeping.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+import hashlib
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Any, Optional, Union
+
+
+@lru_cache(maxsize=None)
+def renderer_version() -> str:
+    """Return a stamp that changes whenever the renderer package changes."""
+
+    package_dir = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for path in sorted(package_dir.rglob("*")):
+        if not path.is_file() or "__pycache__" in path.parts or path.suffix in {".pyc", ".pyo"}:
+            continue
+        digest.update(path.relative_to(package_dir).as_posix().encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def render_key(
+    kind: str,
+    text: str,
+    *,
+    theme: str = "default",
+    widgets_dir: str = "./widgets",
+    title: Optional[str] = None,
+    base_dir: Optional[str] = None,
+    static_diagrams: bool = False,
+    assets: Optional[str] = None,
+) -> str:
+    """Hash the render inputs into a cache key.
+
+    `kind` separates fragment (`render`) and full document (`document`)
+    entries rendered from the same text. `assets` is the asset manifest
+    version when widget URLs are content-hashed.
+    """
+
+    options = json.dumps(
+        [
+            renderer_version(),
+            kind,
+            theme or "default",
+            widgets_dir.rstrip("/"),
+            title,
+            base_dir,
+            static_diagrams,
+            assets,
+        ],
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha256(options.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update((text or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_hits: int = 0
+    disk_writes: int = 0
+    entries: int = 0
+    bytes: int = 0
+    max_bytes: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class RenderCache:
+    """Two-tier cache for rendered HTML.
+
+    The memory tier is an LRU bounded by the UTF-8 size of the stored HTML.
+    When `disk_dir` is set, every entry is also written there (one file per
+    key) and memory misses fall back to it, so entries survive restarts.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[Union[str, os.PathLike[str]]] = None,
+    ):
+        self.max_bytes = max(0, max_bytes)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._bytes = 0
+        self._stats = CacheStats(max_bytes=self.max_bytes)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str = "SBS_RENDER_CACHE_") -> "RenderCache":
+        """Build a cache from `SBS_RENDER_CACHE_BYTES` / `SBS_RENDER_CACHE_DIR`."""
+
+        max_bytes = os.environ.get(prefix + "BYTES")
+        return cls(
+            max_bytes=int(max_bytes) if max_bytes else 64 * 1024 * 1024,
+            disk_dir=os.environ.get(prefix + "DIR") or None,
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return entry[0]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            self._stats.disk_hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._store(key, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._stats.entries = len(self._entries)
+            self._stats.bytes = self._bytes
+            return CacheStats(**asdict(self._stats))
+
+    def clear(self) -> None:
+        """Drop the memory tier. Disk entries are left in place."""
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    # ------------------------------------------------------------------
+    # private helpers
+    # ------------------------------------------------------------------
+    def _store(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats.evictions += 1
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / key[:2] / f"{key}.html"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        path = self._disk_path(key)
+        if path is None or path.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(value)
+            os.replace(tmp_name, path)
+        except OSError:
+            return
+        with self._lock:
+            self._stats.disk_writes += 1
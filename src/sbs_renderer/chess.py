@@ -4,9 +4,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import html
-from typing import Any, Dict
+import json
+import re
+from typing import Any, Dict, Optional
 
-from .utils import escape_script_payload, parse_fence_config
+from .diagrams import chess_svg, figure, parse_fen_board
+from .eco import classify, is_standard_start, normalize_san, san_moves
+from .pgn import START_FEN, replay
+from .utils import PGN_PAYLOAD_RE, escape_script_payload, reserve_style, split_fence
 
 
 _ATTR_MAP = {
@@ -23,6 +28,13 @@ _BOOL_ATTRS = {
 _NUM_ATTRS = {
     "size": "size",
 }
+_DEFAULT_SIZE = 480
+_LEADING_INT_RE = re.compile(r"\s*(\d+)")
+# Widget chrome around the board, from chess-component.js: the mini
+# layout's padding and border, and the other layouts' padding, header and
+# grid gap.
+_MINI_CHROME = 26
+_PANEL_CHROME = 132
 
 
 @dataclass
@@ -33,32 +45,7 @@ class ChessBlock:
 
     @classmethod
     def from_fence(cls, raw: str) -> "ChessBlock":
-        # Handle explicit config/data split via '---'
-        if "---" in raw:
-            parts = raw.split("---", 1)
-            config_part = parts[0].strip()
-            pgn_part = parts[1].strip()
-
-            import yaml
-            # Try to parse the first part as YAML
-            try:
-                config = yaml.safe_load(config_part)
-                if config is None:
-                    config = {}
-                if isinstance(config, dict):
-                    # Prioritize 'pgn' as the key for consistency
-                    config["pgn"] = pgn_part
-                    return cls(config)
-            except yaml.YAMLError:
-                pass
-
-        parsed = parse_fence_config(raw)
-        if parsed is not None:
-            return cls(parsed)
-
-        # No configuration found and no explicit PGN separator.
-        # We return an empty block to avoid unwanted PGN parsing errors.
-        return cls({})
+        return cls(split_fence(raw, "pgn", payload_re=PGN_PAYLOAD_RE))
 
     def to_html(self) -> str:
         config = self.config or {}
@@ -96,23 +83,96 @@ class ChessBlock:
 
         # Additional custom attributes become data-* for future use.
         for key, value in config.items():
-            if key in _ATTR_MAP or key in _BOOL_ATTRS or key in _NUM_ATTRS or key in {"pgn", "data"}:
+            if key in _ATTR_MAP or key in _BOOL_ATTRS or key in _NUM_ATTRS or key in {"pgn", "data", "timeline"}:
                 continue
             add_attr(f"data-{key}", value)
 
+        add_attr("style", reserve_style(*self.reserved_box()))
+
+        pgn_payload = str(config.get("pgn") or config.get("data") or "").strip()
+        # Opt-in: replay the game here (raising PgnError on a bad move) and
+        # ship one FEN per ply so static boards paint without chess.js.
+        timeline = replay(pgn_payload, config.get("fen")) if pgn_payload and config.get("timeline") else None
+        if timeline is not None:
+            if timeline.fens[0] == START_FEN:
+                for name, value in _opening_attrs([normalize_san(san) for san in timeline.sans]):
+                    add_attr(name, value)
+        elif pgn_payload and is_standard_start(config.get("fen")):
+            for name, value in _opening_attrs(san_moves(pgn_payload)):
+                add_attr(name, value)
+
         attr_html = " ".join(
             f"{name}='{html.escape(value, quote=True)}'" for name, value in attrs
         ).strip()
 
-        pgn_payload = str(config.get("pgn") or config.get("data") or "").strip()
-        script_html = ""
-        if pgn_payload:
-            escaped = escape_script_payload(pgn_payload)
-            script_html = (
-                "<script type='application/x-chess-pgn'>"
-                f"{escaped}"
-                "</script>"
-            )
+        script_html = self.payload_script() or ""
+        if timeline is not None and not config.get("interactive"):
+            data = json.dumps({"fens": timeline.fens, "sans": timeline.sans}, separators=(",", ":"))
+            script_html += f"<script type='application/x-chess-timeline'>{escape_script_payload(data)}</script>"
 
         tag_open = "<sbs-chess" + (" " + attr_html if attr_html else "") + ">"
         return f"{tag_open}{script_html}</sbs-chess>"
+
+    def payload_script(self) -> Optional[str]:
+        """The `<script>` carrying the PGN, exactly as `to_html` embeds it."""
+
+        config = self.config or {}
+        pgn_payload = str(config.get("pgn") or config.get("data") or "").strip()
+        if not pgn_payload:
+            return None
+        return f"<script type='application/x-chess-pgn'>{escape_script_payload(pgn_payload)}</script>"
+
+    def reserved_box(self) -> tuple[Optional[float], float]:
+        """Approximate size of the hydrated widget; no width for the full-width layouts."""
+
+        config = self.config or {}
+        size = _LEADING_INT_RE.match(str(config.get("size") or ""))
+        width = height = (int(size.group(1)) if size else _DEFAULT_SIZE) + 2
+        if config.get("coords") is not False:
+            # Coordinate labels: clamp(0.55rem, size / 24, 1.15rem) plus the grid gap.
+            font = min(max(8.8, width / 24), 18.4)
+            width += font * 0.7 + 5.6
+            height += font * 1.2 + 5.6
+        if config.get("layout") == "mini":
+            return width + _MINI_CHROME, height + _MINI_CHROME
+        return None, height + _PANEL_CHROME
+
+    def to_static_html(self) -> Optional[str]:
+        """SVG figure for a display-only position; ``None`` if it needs the widget."""
+
+        config = self.config or {}
+        if config.get("interactive") or str(config.get("pgn") or config.get("data") or "").strip():
+            return None
+        fen = str(config.get("fen") or "").strip()
+        board = parse_fen_board(START_FEN if fen in ("", "startpos") else fen)
+        if board is None:
+            return None
+        size = _LEADING_INT_RE.match(str(config.get("size") or ""))
+        svg = chess_svg(
+            board,
+            orientation=str(config.get("orientation") or "white"),
+            coords=config.get("coords") is not False,
+            size=int(size.group(1)) if size else _DEFAULT_SIZE,
+            theme=config.get("theme"),
+        )
+        title = config.get("title")
+        return figure("chess", svg, str(title) if title else None)
+
+
+def _opening_attrs(moves: list[str]) -> list[tuple[str, str]]:
+    """ECO attributes so the widget does not need the opening dictionary.
+
+    `openings` lists `[ply, eco, en, zh]` for every ply where the name
+    changes (an empty list means the line is unknown); `eco` and the
+    `opening-*` labels repeat the classification of the whole game.
+    """
+
+    openings = classify(moves) if moves else None
+    if openings is None:
+        return []
+    attrs = [("openings", json.dumps([entry.to_json() for entry in openings], ensure_ascii=False, separators=(",", ":")))]
+    if openings:
+        final = openings[-1]
+        attrs.append(("eco", final.eco))
+        attrs.extend((f"opening-{lang}", label) for lang, label in final.labels.items() if label)
+    return attrs
@@ -0,0 +1,294 @@
+"""Games referenced from external collection files.
+
+A fence may name an entry of a PGN, SGF or PBN file instead of carrying the
+record itself::
+
+    ```sbs-chess
+    source: games/wch2024.pgn
+    game: 37
+    ```
+
+The first lookup in a file scans it once for the byte offset of every game
+and stores that index on disk, keyed by the file's modification time and
+size. Later lookups (in this or any other process) load the index and read
+only the requested slice through `mmap`, so pulling one game out of a large
+database does not parse the rest of it.
+
+Games are numbered from 1 in file order. PBN deals can also be picked by
+their `[Board "n"]` tag.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+import hashlib
+import mmap
+import os
+from pathlib import Path
+import re
+import struct
+import tempfile
+from typing import Any, Optional, Union
+
+from .utils import split_fence
+
+# Fence language -> collection format.
+FORMATS = {"sbs-chess": "pgn", "sbs-go": "sgf", "sbs-bridge": "pbn"}
+
+INDEX_DIR_ENV = "SBS_COLLECTION_INDEX_DIR"
+MAGIC = b"SBSIDX1\0"
+
+# Index file layout (native byte order; the index is a local cache):
+#   header   magic, format, source mtime_ns, source size, game count
+#   offsets  game count + 1 unsigned 64-bit offsets (the last is the size)
+#   boards   game count signed 64-bit `Board` tag values (-1: none)
+_HEADER = struct.Struct("=8s4sqQQ")
+
+# PGN and PBN games are tag sections preceded by the start of the file or
+# a blank line; `%` escape lines (PBN headers) may come in between. The
+# file head is matched separately: an `\A` alternative would keep the
+# regex engine from skipping ahead to newlines, making the scan ~10x slower.
+_ESCAPES = rb"(?:[ \t\r]*(?:%[^\n]*)?\n)*[ \t]*(?=\[)"
+_TAG_HEAD_RE = re.compile(rb"(?:\xef\xbb\xbf)?" + _ESCAPES)
+_TAG_GAME_RE = re.compile(rb"\n[ \t\r]*\n" + _ESCAPES)
+_BOARD_TAG_RE = re.compile(rb'\[Board\s+"\s*(\d+)\s*"\s*\]')
+# SGF values (with escapes) are skipped whole so brackets inside comments
+# do not count towards the game tree depth.
+_SGF_TOKEN_RE = re.compile(rb"\[(?:[^\]\\]|\\.)*\]|[()]", re.DOTALL)
+
+
+class CollectionError(ValueError):
+    """A fence references a collection entry that cannot be read."""
+
+
+@dataclass(frozen=True)
+class GameIndex:
+    offsets: array
+    boards: array
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def span(self, number: int) -> tuple[int, int]:
+        return self.offsets[number - 1], self.offsets[number]
+
+    def game_for_board(self, board: int) -> Optional[int]:
+        return self._board_games.get(board)
+
+    @cached_property
+    def _board_games(self) -> dict[int, int]:
+        games: dict[int, int] = {}
+        for position, value in enumerate(self.boards):
+            if value >= 0:
+                games.setdefault(value, position + 1)
+        return games
+
+
+def fence_entry(
+    lang: str,
+    content: str,
+    base_dir: Optional[Union[str, os.PathLike[str]]] = None,
+    root: Optional[Union[str, os.PathLike[str]]] = None,
+    inputs: Optional[set[Path]] = None,
+) -> Optional[str]:
+    """Game text referenced by a fence's `source`, or ``None`` without one.
+
+    Sources resolve against `base_dir` and must stay inside `root`
+    (`base_dir` by default); without a `base_dir` they are refused, so a
+    render request can never name an arbitrary file on the server. Errors
+    quote the source as written. The collection file is added to
+    `inputs`. Go keeps `board` as the board size, so only bridge fences
+    may select a deal by board number.
+    """
+
+    fmt = FORMATS.get(lang)
+    if fmt is None or "source" not in content:
+        return None
+    config = split_fence(content, fmt)
+    source = config.get("source")
+    if not source:
+        return None
+    source = str(source)
+    if base_dir is None:
+        raise CollectionError(f"{source}: collection sources need a document directory")
+    path = (Path(base_dir) / source).resolve()
+    if not path.is_relative_to(Path(root if root is not None else base_dir).resolve()):
+        raise CollectionError(f"{source}: outside the document directory")
+    if inputs is not None:
+        inputs.add(path)
+    board = _entry_number(config.get("board"), "board") if fmt == "pbn" else None
+    return read_game(path, fmt, game=_entry_number(config.get("game"), "game"), board=board, name=source)
+
+
+def read_game(
+    path: Union[str, os.PathLike[str]],
+    fmt: str,
+    *,
+    game: Optional[int] = None,
+    board: Optional[int] = None,
+    name: Optional[str] = None,
+) -> str:
+    """Return the text of one entry of the collection at `path`.
+
+    `game` is the 1-based position in the file; `board` (PBN only) matches
+    the `Board` tag. Raises `CollectionError` when the entry is missing,
+    naming the file as `name` (default: `path`).
+    """
+
+    name = name or os.fspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError as exc:
+        raise CollectionError(f"{name}: {exc.strerror or exc}") from None
+    index = load_index(os.path.abspath(path), fmt, stat.st_mtime_ns, stat.st_size)
+    if board is not None:
+        number = index.game_for_board(board)
+        if number is None:
+            raise CollectionError(f"{name}: no board {board}")
+    else:
+        number = 1 if game is None else game
+        if not 1 <= number <= len(index):
+            raise CollectionError(f"{name}: no game {number} ({len(index)} in file)")
+    start, end = index.span(number)
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        data = view[start:end]
+    try:
+        return data.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        # Older databases are often Latin-1.
+        return data.decode("latin-1").strip()
+
+
+def _entry_number(value: Any, key: str) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise CollectionError(f"{key} must be a number, got {value!r}") from None
+
+
+def clear_cache() -> None:
+    load_index.cache_clear()
+
+
+@lru_cache(maxsize=64)
+def load_index(path: str, fmt: str, mtime_ns: int, size: int) -> GameIndex:
+    """Index of the file at `path` as of (`mtime_ns`, `size`).
+
+    The on-disk copy is used when it matches; otherwise the file is scanned
+    and the index written back (best effort).
+    """
+
+    index_path = _index_path(path, fmt)
+    index = _read_index(index_path, fmt, mtime_ns, size) if index_path is not None else None
+    if index is None:
+        index = scan(path, fmt)
+        if index_path is not None:
+            _write_index(index_path, index, fmt, mtime_ns, size)
+    return index
+
+
+def scan(path: Union[str, os.PathLike[str]], fmt: str) -> GameIndex:
+    """Find the byte offset of every game in the file at `path`."""
+
+    if fmt not in ("pgn", "sgf", "pbn"):
+        raise CollectionError(f"unknown collection format {fmt!r}")
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return GameIndex(array("Q", [0]), array("q"))
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            if fmt == "sgf":
+                return _scan_sgf(view)
+            return _scan_tags(view, boards=fmt == "pbn")
+
+
+def _scan_tags(view: mmap.mmap, *, boards: bool) -> GameIndex:
+    head = _TAG_HEAD_RE.match(view)
+    starts = array("Q", [head.end()] if head else [])
+    for match in _TAG_GAME_RE.finditer(view):
+        # Leading blank lines match both patterns.
+        if not starts or match.end() != starts[-1]:
+            starts.append(match.end())
+    offsets = array("Q", starts)
+    offsets.append(len(view))
+    numbers = array("q", [-1]) * len(starts)
+    if boards and starts:
+        game = 0
+        for match in _BOARD_TAG_RE.finditer(view):
+            while game + 1 < len(starts) and starts[game + 1] <= match.start():
+                game += 1
+            if numbers[game] < 0:
+                numbers[game] = int(match.group(1))
+    return GameIndex(offsets, numbers)
+
+
+def _scan_sgf(view: mmap.mmap) -> GameIndex:
+    offsets = array("Q")
+    depth = 0
+    for match in _SGF_TOKEN_RE.finditer(view):
+        token = match.group()
+        if token == b"(":
+            if depth == 0:
+                offsets.append(match.start())
+            depth += 1
+        elif token == b")" and depth:
+            depth -= 1
+    count = len(offsets)
+    offsets.append(len(view))
+    return GameIndex(offsets, array("q", [-1]) * count)
+
+
+def index_dir() -> Optional[Path]:
+    """Directory for persisted indexes (`SBS_COLLECTION_INDEX_DIR`)."""
+
+    configured = os.environ.get(INDEX_DIR_ENV)
+    if configured is not None:
+        return Path(configured) if configured else None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "sbs-renderer" / "collections"
+
+
+def _index_path(path: str, fmt: str) -> Optional[Path]:
+    directory = index_dir()
+    if directory is None:
+        return None
+    name = hashlib.sha256(f"{fmt}\0{path}".encode("utf-8")).hexdigest()[:32]
+    return directory / f"{name}.idx"
+
+
+def _read_index(index_path: Path, fmt: str, mtime_ns: int, size: int) -> Optional[GameIndex]:
+    try:
+        data = index_path.read_bytes()
+        magic, stored_fmt, stored_mtime, stored_size, count = _HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    if (
+        magic != MAGIC
+        or stored_fmt != fmt.encode("ascii").ljust(4, b"\0")
+        or (stored_mtime, stored_size) != (mtime_ns, size)
+        or len(data) != _HEADER.size + 8 * (2 * count + 1)
+    ):
+        return None
+    split = _HEADER.size + 8 * (count + 1)
+    offsets = array("Q")
+    offsets.frombytes(data[_HEADER.size : split])
+    boards = array("q")
+    boards.frombytes(data[split:])
+    return GameIndex(offsets, boards)
+
+
+def _write_index(index_path: Path, index: GameIndex, fmt: str, mtime_ns: int, size: int) -> None:
+    header = _HEADER.pack(MAGIC, fmt.encode("ascii").ljust(4, b"\0"), mtime_ns, size, len(index))
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=index_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header)
+            handle.write(index.offsets.tobytes())
+            handle.write(index.boards.tobytes())
+        os.replace(tmp_name, index_path)
+    except OSError:
+        return
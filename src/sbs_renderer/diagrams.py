@@ -0,0 +1,409 @@
+"""Static SVG diagrams for boards that do not need a widget.
+
+With `SBSRenderer(static_diagrams=True)`, non-interactive chess positions,
+go snapshots and bridge deals are drawn here instead of being emitted as
+custom elements. The drawings follow the widgets' own renderers (geometry,
+glyphs, labels); colours come from class names styled in
+`widgets/diagrams.css`, so themes can restyle both. A page whose diagrams
+are all static needs no widget JavaScript at all.
+"""
+
+from __future__ import annotations
+
+import html
+from typing import Optional
+
+from .pbn import Deal
+from .sgf import Snapshot
+
+_SVG_NS = "http://www.w3.org/2000/svg"
+
+
+def figure(kind: str, svg: str, caption: Optional[str] = None) -> str:
+    caption_html = f"<figcaption>{html.escape(caption)}</figcaption>" if caption else ""
+    return f"<figure class='sbs-diagram sbs-diagram-{kind}'>{svg}{caption_html}</figure>"
+
+
+def _num(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def _text(x: float, y: float, text: str, cls: str = "", **attrs: str) -> str:
+    extra = "".join(f' {name.replace("_", "-")}="{value}"' for name, value in attrs.items())
+    cls_attr = f' class="{cls}"' if cls else ""
+    return f'<text x="{_num(x)}" y="{_num(y)}"{cls_attr}{extra}>{text}</text>'
+
+
+# ----------------------------------------------------------------------
+# Chess (widgets/chess/chess-renderer.js)
+# ----------------------------------------------------------------------
+_PIECE_GLYPHS = {
+    "p": "♟︎", "r": "♜", "n": "♞", "b": "♝", "q": "♛", "k": "♚",
+    "P": "♙", "R": "♖", "N": "♘", "B": "♗", "Q": "♕", "K": "♔",
+}
+_SQUARE = 10
+_CHESS_MARGIN = 4
+
+
+def parse_fen_board(fen: str) -> Optional[list[list[str]]]:
+    """Rows (rank 8 first) of piece letters or "" from a FEN, or ``None``."""
+
+    placement = fen.split()[0] if fen.split() else ""
+    rows = placement.split("/")
+    if len(rows) != 8:
+        return None
+    board = []
+    for row in rows:
+        squares: list[str] = []
+        for char in row:
+            if char in "12345678":
+                squares.extend([""] * int(char))
+            elif char in _PIECE_GLYPHS:
+                squares.append(char)
+            else:
+                return None
+        if len(squares) != 8:
+            return None
+        board.append(squares)
+    return board
+
+
+def chess_svg(board: list[list[str]], *, orientation: str = "white", coords: bool = True, size: int = 480, theme: Optional[str] = None) -> str:
+    flipped = orientation == "black"
+    margin = _CHESS_MARGIN if coords else 0
+    extent = 8 * _SQUARE + margin
+    width = size * extent / (8 * _SQUARE)
+    classes = "sbs-chess-board" + (f" theme-{html.escape(theme, quote=True)}" if theme else "")
+    parts = [
+        f'<svg xmlns="{_SVG_NS}" class="{classes}" viewBox="0 0 {extent} {extent}" '
+        f'width="{_num(width)}" height="{_num(width)}" role="img" aria-label="Chess diagram">'
+    ]
+    order = list(range(8))[::-1] if flipped else list(range(8))
+    for row, rank in enumerate(order):
+        for col, file in enumerate(order):
+            x, y = margin + col * _SQUARE, row * _SQUARE
+            shade = "light" if (rank + file) % 2 == 0 else "dark"
+            parts.append(f'<rect class="square {shade}" x="{x}" y="{y}" width="{_SQUARE}" height="{_SQUARE}"/>')
+            piece = board[rank][file]
+            if piece:
+                parts.append(_text(x + _SQUARE / 2, y + _SQUARE / 2, _PIECE_GLYPHS[piece], "piece", font_size="7.8"))
+    if coords:
+        parts.append('<g class="coords">')
+        for index, value in enumerate(order):
+            rank_label = str(8 - value)
+            file_label = "abcdefgh"[value]
+            parts.append(_text(margin / 2, index * _SQUARE + _SQUARE / 2, rank_label, font_size="2.6"))
+            parts.append(_text(margin + index * _SQUARE + _SQUARE / 2, 8 * _SQUARE + margin / 2, file_label, font_size="2.6"))
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+# ----------------------------------------------------------------------
+# Go (widgets/go/go-board.js)
+# ----------------------------------------------------------------------
+_GO_COORDS = "ABCDEFGHJKLMNOPQRST"  # 'I' is skipped
+_STAR_POINTS = {
+    19: [(3, 3), (9, 3), (15, 3), (3, 9), (9, 9), (15, 9), (3, 15), (9, 15), (15, 15)],
+    13: [(3, 3), (9, 3), (6, 6), (3, 9), (9, 9)],
+    9: [(2, 2), (6, 2), (4, 4), (2, 6), (6, 6)],
+}
+
+
+def go_svg(state: Snapshot, *, theme: str = "book", coords: bool = True, width: Optional[str] = None) -> str:
+    size = state.size
+    padding = 6 if coords else 2
+    cell = (100 - 2 * padding) / (size - 1)
+
+    def at(index: int) -> str:
+        return _num(padding + index * cell)
+
+    width_attr = f' style="width:{html.escape(width, quote=True)}"' if width else ""
+    parts = [
+        f'<svg xmlns="{_SVG_NS}" class="sbs-go-board theme-{html.escape(theme, quote=True)}" '
+        f'viewBox="0 0 100 100"{width_attr} role="img" aria-label="Go diagram">',
+        '<rect class="board-bg" x="0" y="0" width="100" height="100"/>',
+        '<g class="grid">',
+    ]
+    far = _num(100 - padding)
+    for i in range(size):
+        parts.append(f'<line x1="{padding}" y1="{at(i)}" x2="{far}" y2="{at(i)}"/>')
+        parts.append(f'<line x1="{at(i)}" y1="{padding}" x2="{at(i)}" y2="{far}"/>')
+    parts.append("</g>")
+    for sx, sy in _STAR_POINTS.get(size, ()):
+        parts.append(f'<circle class="star-point" cx="{at(sx)}" cy="{at(sy)}" r="0.8"/>')
+    if coords:
+        label_pos = padding / 2
+        parts.append('<g class="coords">')
+        for i in range(min(size, len(_GO_COORDS))):
+            for x, y, label in (
+                (padding + i * cell, label_pos, _GO_COORDS[i]),
+                (padding + i * cell, 100 - label_pos, _GO_COORDS[i]),
+                (label_pos, padding + i * cell, str(size - i)),
+                (100 - label_pos, padding + i * cell, str(size - i)),
+            ):
+                parts.append(_text(x, y, label, font_size="2.2"))
+        parts.append("</g>")
+
+    parts.append('<g class="stones">')
+    for index, stone in enumerate(state.board):
+        x, y = index % size, index // size
+        if stone != ".":
+            colour = "black" if stone == "B" else "white"
+            parts.append(f'<circle class="stone {colour}" cx="{at(x)}" cy="{at(y)}" r="{_num(cell * 0.48)}"/>')
+        marker = state.markers.get(f"{x},{y}")
+        if marker:
+            parts.append(_go_marker(padding + x * cell, padding + y * cell, marker, stone, cell))
+    parts.append("</g></svg>")
+    return "".join(parts)
+
+
+def _go_marker(x: float, y: float, marker: dict[str, str], stone: str, cell: float) -> str:
+    kind = marker.get("type")
+    ink = "white" if stone == "B" else "black"
+    stroke = f'fill="none" stroke="{ink}" stroke-width="0.5"'
+    empty = stone == "."
+    parts = ['<g class="marker">']
+
+    def backdrop(radius: float) -> None:
+        if empty:
+            parts.append(f'<circle cx="{_num(x)}" cy="{_num(y)}" r="{_num(cell * radius)}" fill="white" fill-opacity="0.8"/>')
+
+    if kind == "last":
+        parts.append(f'<circle cx="{_num(x)}" cy="{_num(y)}" r="{_num(cell * 0.2)}" {stroke}/>')
+    elif kind in ("number", "letter"):
+        backdrop(0.35)
+        value = str(marker.get("value", ""))
+        scale = 0.35 if len(value) >= 3 else 0.42 if len(value) == 2 else 0.5
+        parts.append(_text(x, y, html.escape(value), font_size=_num(cell * scale), fill=ink))
+    elif kind == "circle":
+        backdrop(0.3)
+        parts.append(f'<circle cx="{_num(x)}" cy="{_num(y)}" r="{_num(cell * 0.25)}" {stroke}/>')
+    elif kind == "square":
+        if empty:
+            half = cell * 0.25
+            parts.append(
+                f'<rect x="{_num(x - half)}" y="{_num(y - half)}" width="{_num(2 * half)}" height="{_num(2 * half)}" '
+                'fill="white" fill-opacity="0.8"/>'
+            )
+        half = cell * 0.2
+        parts.append(f'<rect x="{_num(x - half)}" y="{_num(y - half)}" width="{_num(2 * half)}" height="{_num(2 * half)}" {stroke}/>')
+    elif kind == "triangle":
+        backdrop(0.3)
+        r = cell * 0.25
+        points = f"{_num(x)},{_num(y - r)} {_num(x - r * 0.866)},{_num(y + r * 0.5)} {_num(x + r * 0.866)},{_num(y + r * 0.5)}"
+        parts.append(f'<polygon points="{points}" {stroke}/>')
+    parts.append("</g>")
+    return "".join(parts)
+
+
+# ----------------------------------------------------------------------
+# Bridge (widgets/bridge/bridge-widget.js)
+# ----------------------------------------------------------------------
+_BRIDGE_I18N = {
+    "en": {
+        "Event": "Event", "Site": "Site", "Date": "Date", "Scoring": "Scoring",
+        "Vulnerable": "Vulnerable", "Dealer": "Dealer", "Declarer": "Declarer",
+        "North": "North", "South": "South", "East": "East", "West": "West",
+        "N": "N", "S": "S", "E": "E", "W": "W",
+        "None": "None", "All": "All", "NS": "N-S", "EW": "E-W",
+        "Bidding": "Bidding", "Pass": "Pass", "Lead": "Lead",
+    },
+    "zh": {
+        "Event": "赛事", "Site": "地点", "Date": "日期", "Scoring": "计分",
+        "Vulnerable": "局况", "Dealer": "发牌", "Declarer": "庄家",
+        "North": "北", "South": "南", "East": "东", "West": "西",
+        "N": "北", "S": "南", "E": "东", "W": "西",
+        "None": "双方无局", "All": "双方有局", "NS": "南北有局", "EW": "东西有局",
+        "Bidding": "叫牌过程", "Pass": "Pass", "Lead": "首攻",
+    },
+}
+_SUIT_SYMBOLS = {"S": "♠", "H": "♥", "D": "♦", "C": "♣"}
+_DIRECTION_NAMES = {"N": "North", "S": "South", "E": "East", "W": "West"}
+
+# Layout metrics in px; card text is monospaced so widths are predictable.
+_CARD_FONT = 14
+_CARD_CHAR = 8.4
+_ROW = 18
+_HAND_PAD = 10
+_CENTER_WIDTH = 160
+_CENTER_HEIGHT = 110
+_COL_GAP = 16
+_ROW_GAP = 10
+_BID_COL = 56
+
+
+def bridge_svg(deal: Deal, *, lang: str = "zh", layout: Optional[str] = None) -> str:
+    body, width, height = _bridge_drawing(deal, lang=lang, layout=layout)
+    width_px, height_px = _num(width + 2), _num(height + 2)
+    return (
+        f'<svg xmlns="{_SVG_NS}" class="sbs-bridge-deal" viewBox="-1 -1 {width_px} {height_px}" '
+        f'width="{width_px}" height="{height_px}" role="img" aria-label="Bridge deal">'
+        + "".join(body)
+        + "</svg>"
+    )
+
+
+def bridge_box(deal: Deal, *, layout: Optional[str] = None) -> tuple[float, float]:
+    """Width and height `bridge_svg` would draw the deal at."""
+
+    _, width, height = _bridge_drawing(deal, lang="en", layout=layout)
+    return width + 2, height + 2
+
+
+def _bridge_drawing(deal: Deal, *, lang: str, layout: Optional[str]) -> tuple[list[str], float, float]:
+    labels = _BRIDGE_I18N.get(lang, {})
+
+    def t(key: str) -> str:
+        return labels.get(key, key)
+
+    def direction(value: Optional[str]) -> str:
+        if not value:
+            return ""
+        return t(_DIRECTION_NAMES[value]) if value in _DIRECTION_NAMES else value
+
+    tags = deal.tags
+    hands = deal.hands or {}
+    present = {d: hand for d, hand in hands.items() if hand and any(v.strip() for v in hand.values())}
+    lead = tags.get("Lead") or (deal.play[0] if deal.play else None)
+    auction = [call for call in deal.auction if call != "AP"]
+    show_meta = layout not in ("compact", "mini")
+    show_extras = layout != "mini"
+    if not show_extras:
+        lead = None
+        auction = []
+
+    longest = max([len(v) or 1 for hand in present.values() for v in hand.values()] + [3])
+    hand_w = round(2 * _HAND_PAD + 20 + longest * _CARD_CHAR)
+    hand_h = 2 * _HAND_PAD + 16 + 4 * _ROW
+
+    has_left = "W" in present or bool(lead)
+    has_right = "E" in present
+    columns = ([hand_w] if has_left else []) + [_CENTER_WIDTH] + ([hand_w] if has_right else [])
+    width = sum(columns) + _COL_GAP * (len(columns) - 1)
+    center_x = hand_w + _COL_GAP if has_left else 0
+    right_x = center_x + _CENTER_WIDTH + _COL_GAP
+
+    meta = [f"{t(key)}: {tags[key]}" for key in ("Event", "Site", "Date", "Scoring") if tags.get(key)]
+    y = 0.0
+    body: list[str] = []
+    if meta and show_meta:
+        body.append(_text(width / 2, 12, html.escape(" | ".join(meta)), "meta", text_anchor="middle"))
+        y = 26
+
+    north_y = y
+    middle_y = y + (hand_h + _ROW_GAP if "N" in present else 0)
+    middle_h = max(hand_h, _CENTER_HEIGHT)
+    south_y = middle_y + middle_h + _ROW_GAP
+    height = south_y - _ROW_GAP + (hand_h + _ROW_GAP if "S" in present else 0)
+
+    slots = {
+        "N": (center_x + (_CENTER_WIDTH - hand_w) / 2, north_y),
+        "W": (0, middle_y + (middle_h - hand_h) / 2),
+        "E": (right_x, middle_y + (middle_h - hand_h) / 2),
+        "S": (center_x + (_CENTER_WIDTH - hand_w) / 2, south_y),
+    }
+    for key in "NWES":
+        if key in present:
+            x, top = slots[key]
+            body.append(_bridge_hand(x, top, hand_w, hand_h, direction(key), present[key]))
+
+    body.append(_bridge_center(center_x, middle_y + (middle_h - _CENTER_HEIGHT) / 2, tags, t, direction))
+
+    if lead:
+        lead_html = f'<tspan class="label">{html.escape(t("Lead"))}:</tspan> {_suit_text(lead)}'
+        if "W" not in present:
+            lead_y = middle_y + middle_h / 2
+        elif "N" in present:
+            lead_y = north_y + hand_h - 8
+        else:
+            lead_y = south_y + 12
+            height = max(height, south_y + 20)
+        body.append(_text(hand_w / 2, lead_y, lead_html, "lead", text_anchor="middle", dominant_baseline="central"))
+
+    if auction:
+        top = height + 16
+        body.append(_bridge_auction(width / 2, top, tags.get("Dealer"), auction, t))
+        rows = (_auction_offset(tags.get("Dealer")) + len(auction) + 3) // 4
+        height = top + 40 + rows * 20
+
+    return body, width, height
+
+
+def _suit_text(text: str) -> str:
+    out = []
+    for char in str(text):
+        if char in _SUIT_SYMBOLS:
+            out.append(f'<tspan class="suit-{char}">{_SUIT_SYMBOLS[char]}</tspan>')
+        else:
+            out.append(html.escape(char))
+    return "".join(out)
+
+
+def _bridge_hand(x: float, y: float, w: float, h: float, label: str, hand: dict[str, str]) -> str:
+    parts = [f'<g class="hand"><rect x="{_num(x)}" y="{_num(y)}" width="{_num(w)}" height="{_num(h)}" rx="4"/>']
+    parts.append(_text(x + w / 2, y + _HAND_PAD + 8, html.escape(label), "hand-label", text_anchor="middle"))
+    for row, suit in enumerate("SHDC"):
+        baseline = y + _HAND_PAD + 16 + (row + 1) * _ROW - 4
+        parts.append(_text(x + _HAND_PAD + 8, baseline, _SUIT_SYMBOLS[suit], f"suit-symbol suit-{suit}", text_anchor="middle"))
+        cards = hand.get(suit) or "-"
+        parts.append(_text(x + _HAND_PAD + 20, baseline, html.escape(cards), "cards"))
+    parts.append("</g>")
+    return "".join(parts)
+
+
+def _bridge_center(x: float, y: float, tags: dict[str, str], t, direction) -> str:
+    w, h = _CENTER_WIDTH, _CENTER_HEIGHT
+    parts = [f'<g class="table-center"><rect x="{_num(x)}" y="{_num(y)}" width="{w}" height="{h}" rx="6"/>']
+
+    def row(top: float, label: str, value: str) -> None:
+        parts.append(_text(x + 8, top, html.escape(f"{label}:"), "center-label"))
+        parts.append(_text(x + w - 8, top, html.escape(value), "center-value", text_anchor="end"))
+
+    row(y + 16, t("Vulnerable"), _vulnerability(tags.get("Vulnerable"), t))
+    row(y + 32, t("Dealer"), direction(tags.get("Dealer")) or "-")
+    contract = tags.get("Contract")
+    if not contract:
+        contract_html = "-"
+    elif contract == "Pass":
+        contract_html = html.escape(t("Pass"))
+    else:
+        contract_html = _suit_text(contract)
+    parts.append(f'<rect class="contract" x="{_num(x + w / 2 - 45)}" y="{_num(y + 42)}" width="90" height="34" rx="4"/>')
+    parts.append(_text(x + w / 2, y + 59, contract_html, "contract-text", text_anchor="middle", dominant_baseline="central"))
+    row(y + 98, t("Declarer"), direction(tags.get("Declarer")) or "-")
+    parts.append("</g>")
+    return "".join(parts)
+
+
+def _vulnerability(value: Optional[str], t) -> str:
+    if not value:
+        return "-"
+    lowered = value.lower()
+    if lowered in ("none", "love", "-"):
+        return t("None")
+    if lowered in ("both", "all"):
+        return t("All")
+    if lowered == "ns":
+        return t("NS")
+    if lowered == "ew":
+        return t("EW")
+    return value
+
+
+def _auction_offset(dealer: Optional[str]) -> int:
+    return "WNES".index(dealer) if dealer and len(dealer) == 1 and dealer in "WNES" else 0
+
+
+def _bridge_auction(center: float, top: float, dealer: Optional[str], auction: list[str], t) -> str:
+    left = center - 2 * _BID_COL
+    parts = ['<g class="auction">', _text(center, top + 10, html.escape(t("Bidding")), "bidding-title", text_anchor="middle")]
+    for col, player in enumerate("WNES"):
+        parts.append(_text(left + (col + 0.5) * _BID_COL, top + 30, html.escape(t(player)), "bidding-head", text_anchor="middle"))
+    parts.append(f'<line x1="{_num(left)}" y1="{_num(top + 36)}" x2="{_num(left + 4 * _BID_COL)}" y2="{_num(top + 36)}"/>')
+    for index, call in enumerate(auction, start=_auction_offset(dealer)):
+        row, col = divmod(index, 4)
+        label = html.escape(t("Pass")) if call == "Pass" else _suit_text(call)
+        parts.append(_text(left + (col + 0.5) * _BID_COL, top + 52 + row * 20, label, "call", text_anchor="middle"))
+    parts.append("</g>")
+    return "".join(parts)
@@ -0,0 +1,295 @@
+"""ECO opening classification for chess fences.
+
+The widget used to download `widgets/chess/eco-dictionary.js` (about 2 MB)
+to name the opening on every page with a board. The renderer now does the
+lookup instead, against a binary move trie shipped as `data/eco-index.bin`.
+The index is memory-mapped lazily once per process and read in place:
+loading costs one header read whatever the table size, and worker
+processes share its pages instead of each holding a parsed copy.
+
+The index is generated from the prototype dictionary::
+
+    python -m sbs_renderer eco prototype/chess/eco-dictionary.json
+
+Lookups mirror the widget: only games from the standard start position are
+classified, and the longest known prefix of the SAN move list wins.
+"""
+
+from __future__ import annotations
+
+import argparse
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import tempfile
+from typing import Any, Optional, Sequence, Union
+
+from .pgn import START_FEN, main_line
+
+INDEX_PATH = Path(__file__).resolve().parent / "data" / "eco-index.bin"
+MAGIC = b"SBSECO1\0"
+
+# Index layout (little-endian arrays of fixed-width records):
+#   header    magic, node/edge/opening/string counts, string blob size, 0
+#   keys      per edge: the SAN as an integer (its zero-padded 8 ASCII bytes
+#             read big-endian, so integer order is byte order); the edges
+#             of a node are contiguous and sorted
+#   children  per edge: node reached by the move
+#   nodes     per node: first edge, edge count, opening id (-1: none);
+#             node 0 is the root
+#   openings  per opening: eco, en, zh string ids
+#   strings   string_count + 1 offsets into the UTF-8 blob, then the blob
+_HEADER = struct.Struct("<8sIIIIII")
+_KEY_BYTES = 8
+_OPENING_SLOT = -1
+
+
+@dataclass(frozen=True)
+class Opening:
+    eco: str
+    labels: dict[str, str]
+    ply: int
+
+    def to_json(self) -> list[Any]:
+        return [self.ply, self.eco, self.labels.get("en", ""), self.labels.get("zh", "")]
+
+
+def is_standard_start(fen: Any) -> bool:
+    """True when `fen` (as given in a fence config) means the initial position."""
+
+    if fen is None:
+        return True
+    text = str(fen).strip()
+    return text in ("", "startpos") or " ".join(text.split()) == START_FEN
+
+
+def san_moves(pgn: str) -> list[str]:
+    """Main-line SAN moves of the first game in `pgn`, normalized for lookup.
+
+    Tag pairs, comments, variations, NAGs and move numbers are dropped, as
+    are check marks and `!?` suffixes (the index is stored without them).
+    """
+
+    return [san for san in map(normalize_san, main_line(pgn)) if san]
+
+
+def normalize_san(san: str) -> str:
+    san = san.rstrip("+#!?")
+    return san.replace("0", "O") if san.startswith("0-0") else san
+
+
+def classify(moves: Sequence[str]) -> Optional[list[Opening]]:
+    """Openings reached along `moves`, one entry per change of name.
+
+    The last entry is the classification of the whole line; the opening at
+    ply `n` is the last entry whose `ply` is at most `n`. Returns ``None``
+    when the index is unavailable.
+    """
+
+    index = load_index()
+    if index is None:
+        return None
+    found: list[Opening] = []
+    node = 0
+    previous = -1
+    for ply, san in enumerate(moves, start=1):
+        child = index.child(node, san)
+        if child is None:
+            break
+        node = child
+        opening_id = index.opening_id(node)
+        if opening_id >= 0 and opening_id != previous:
+            eco, en, zh = index.opening(opening_id)
+            found.append(Opening(eco=eco, labels={"en": en, "zh": zh}, ply=ply))
+            previous = opening_id
+    return found
+
+
+class EcoIndex:
+    """Read-only view of a binary ECO index (see the layout above).
+
+    The sections are exposed as typed memoryviews over the buffer, so
+    opening a memory-mapped index costs one header read, lookups copy
+    nothing but the strings they return, and the pages are shared by every
+    process that maps the same file.
+    """
+
+    def __init__(self, buffer: Any):
+        self._buffer = buffer
+        magic, nodes, edges, openings, strings, blob, _reserved = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not an ECO index")
+        self.node_count = nodes
+        self.opening_count = openings
+        offset = _HEADER.size
+        self._keys, offset = _section(buffer, offset, edges, "Q")
+        self._children, offset = _section(buffer, offset, edges, "I")
+        self._nodes, offset = _section(buffer, offset, 3 * nodes, "i")
+        self._openings, offset = _section(buffer, offset, 3 * openings, "I")
+        self._offsets, offset = _section(buffer, offset, strings + 1, "I")
+        self._blob = memoryview(buffer)[offset : offset + blob]
+
+    @classmethod
+    def open(cls, path: Union[str, os.PathLike[str]]) -> "EcoIndex":
+        with open(path, "rb") as handle:
+            return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def child(self, node: int, san: str) -> Optional[int]:
+        """Node reached from `node` by playing `san`, or ``None``."""
+
+        key = _san_key(san)
+        if key is None:
+            return None
+        first = self._nodes[3 * node]
+        end = first + self._nodes[3 * node + 1]
+        position = bisect_left(self._keys, key, first, end)
+        if position < end and self._keys[position] == key:
+            return self._children[position]
+        return None
+
+    def opening_id(self, node: int) -> int:
+        return self._nodes[3 * node + 2]
+
+    def opening(self, opening_id: int) -> tuple[str, str, str]:
+        """`(eco, en, zh)` of an interned opening record."""
+
+        base = 3 * opening_id
+        eco, en, zh = (self._string(self._openings[base + slot]) for slot in range(3))
+        return eco, en, zh
+
+    def _string(self, string_id: int) -> str:
+        start, end = self._offsets[string_id], self._offsets[string_id + 1]
+        return str(self._blob[start:end], "utf-8")
+
+
+def _section(buffer: Any, offset: int, count: int, code: str) -> tuple[Sequence[int], int]:
+    end = offset + count * struct.calcsize(code)
+    if end > len(buffer):
+        raise ValueError("truncated ECO index")
+    if sys.byteorder == "little":
+        return memoryview(buffer)[offset:end].cast(code), end
+    # Big-endian hosts read a swapped copy instead of the mapped bytes.
+    values = array(code, bytes(buffer[offset:end]))
+    values.byteswap()
+    return values, end
+
+
+@lru_cache(maxsize=1)
+def load_index() -> Optional[EcoIndex]:
+    """Map the packaged index once per process; ``None`` if it is missing."""
+
+    try:
+        return EcoIndex.open(INDEX_PATH)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def build_index(dictionary: dict[str, Any]) -> bytes:
+    """Encode the widget dictionary (`{"lookup": {...}}`) as a binary index."""
+
+    strings: list[str] = []
+    string_ids: dict[str, int] = {}
+    openings: list[tuple[int, int, int]] = []
+    opening_ids: dict[tuple[int, int, int], int] = {}
+
+    def intern(text: str) -> int:
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    # Build the trie in memory, then lay it out breadth-first so every
+    # node's children occupy one contiguous, key-sorted run of edges.
+    trie: dict[str, Any] = {}
+    for key, entry in dictionary["lookup"].items():
+        labels = entry.get("labels") or {}
+        record = (
+            intern(entry["eco"]),
+            intern(labels.get("en") or entry.get("name") or ""),
+            intern(labels.get("zh") or ""),
+        )
+        if record not in opening_ids:
+            opening_ids[record] = len(openings)
+            openings.append(record)
+        node = trie
+        for san in key.split():
+            san_key = _san_key(san)
+            if san_key is None:
+                raise ValueError(f"SAN move too long for the index: {san!r}")
+            node = node.setdefault(san_key, {})
+        node[_OPENING_SLOT] = opening_ids[record]
+
+    nodes: list[tuple[int, int, int]] = []
+    edges: list[tuple[int, int]] = []
+    queue = [trie]
+    next_id = 1
+    for node in queue:  # the queue grows while it is walked
+        children = sorted((key, child) for key, child in node.items() if key != _OPENING_SLOT)
+        nodes.append((len(edges), len(children), node.get(_OPENING_SLOT, -1)))
+        for key, child in children:
+            edges.append((key, next_id))
+            queue.append(child)
+            next_id += 1
+
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = [0]
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk))
+    blob = b"".join(encoded)
+    out = bytearray(_HEADER.pack(MAGIC, len(nodes), len(edges), len(openings), len(strings), len(blob), 0))
+    out += struct.pack(f"<{len(edges)}Q", *(key for key, _child in edges))
+    out += struct.pack(f"<{len(edges)}I", *(child for _key, child in edges))
+    out += struct.pack(f"<{3 * len(nodes)}i", *(value for record in nodes for value in record))
+    out += struct.pack(f"<{3 * len(openings)}I", *(value for record in openings for value in record))
+    out += struct.pack(f"<{len(offsets)}I", *offsets)
+    out += blob
+    return bytes(out)
+
+
+def write_index(dictionary_path: Path, target: Path = INDEX_PATH) -> None:
+    dictionary = json.loads(dictionary_path.read_text(encoding="utf-8"))
+    payload = build_index(dictionary)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Replace atomically: live processes keep their mapping of the old file.
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".eco-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        # mkstemp creates the file 0600; the service may run as another user.
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    load_index.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _san_key(san: str) -> Optional[int]:
+    # SAN is ASCII and at most 6 characters without check marks; pad to 8
+    # bytes so big-endian integer order equals byte order.
+    raw = normalize_san(san).encode("ascii", "replace")
+    if len(raw) > _KEY_BYTES:
+        return None
+    return int.from_bytes(raw.ljust(_KEY_BYTES, b"\0"), "big")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sbs_renderer eco",
+        description="Rebuild the packaged ECO index from eco-dictionary.json",
+    )
+    parser.add_argument("dictionary", type=Path, help="Path to eco-dictionary.json")
+    parser.add_argument("--output", type=Path, default=INDEX_PATH, help="Index file to write")
+    args = parser.parse_args(argv)
+
+    write_index(args.dictionary, args.output)
+    print(f"Wrote {args.output} ({args.output.stat().st_size} bytes)")
+    return 0
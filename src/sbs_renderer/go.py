@@ -4,11 +4,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import html
-from typing import Any, Dict
+import json
+import re
+from typing import Any, Dict, Optional
 
-import yaml
-
-from .utils import escape_script_payload, parse_fence_config
+from .diagrams import figure, go_svg
+from .sgf import Snapshot, snapshot
+from .utils import SGF_PAYLOAD_RE, escape_script_payload, reserve_style, split_fence
 
 
 _ATTR_MAP = {
@@ -28,6 +30,14 @@ _NUM_ATTRS = {
 _OTHER_ATTRS = {
     "showMoveNumbers": "show-move-numbers",
 }
+_LEADING_INT_RE = re.compile(r"\s*([+-]?\d+)")
+_PIXELS_RE = re.compile(r"\s*\d+(?:px)?\s*")
+# From go-component.js: container padding and border, and the control row
+# interactive boards add below the board.
+_CHROME = 18
+_CONTROLS_HEIGHT = 41
+# Without `size` the board SVG falls back to the browser's default width.
+_DEFAULT_WIDTH = 300
 
 
 @dataclass
@@ -38,29 +48,7 @@ class GoBlock:
 
     @classmethod
     def from_fence(cls, raw: str) -> "GoBlock":
-        # Handle explicit config/data split via '---'
-        if "---" in raw:
-            parts = raw.split("---", 1)
-            config_part = parts[0].strip()
-            sgf_part = parts[1].strip()
-            
-            # Try to parse the first part as YAML
-            try:
-                config = yaml.safe_load(config_part)
-                if config is None:
-                    config = {}
-                if isinstance(config, dict):
-                    config["sgf"] = sgf_part
-                    return cls(config)
-            except yaml.YAMLError:
-                pass
-
-        parsed = parse_fence_config(raw)
-        if parsed is not None:
-            return cls(parsed)
-
-        # No configuration found and no explicit SGF separator.
-        return cls({})
+        return cls(split_fence(raw, "sgf", payload_re=SGF_PAYLOAD_RE))
 
     def to_html(self) -> str:
         config = self.config or {}
@@ -91,11 +79,89 @@ class GoBlock:
         for key, attr in _OTHER_ATTRS.items():
             add_attr(attr, config.get(key))
 
+        box = self.reserved_box()
+        if box is not None:
+            add_attr("style", reserve_style(*box))
+
         attr_str = " ".join(
             f'{name}="{html.escape(val)}"' if val else name for name, val in attrs
         )
         if attr_str:
             attr_str = " " + attr_str
 
-        sgf = config.get("sgf", "")
-        return f"<sbs-go{attr_str}><script type=\"text/sgf\">{escape_script_payload(sgf)}</script></sbs-go>"
+        script_html = self.payload_script()
+        # The position shown on load, so the widget paints without replaying.
+        state = self.snapshot()
+        if state is not None:
+            data = json.dumps(state.to_json(), ensure_ascii=False, separators=(",", ":"))
+            script_html += f"<script type=\"application/x-go-snapshot\">{escape_script_payload(data)}</script>"
+        return f"<sbs-go{attr_str}>{script_html}</sbs-go>"
+
+    def payload_script(self) -> str:
+        """The `<script>` carrying the SGF, exactly as `to_html` embeds it."""
+
+        sgf = (self.config or {}).get("sgf", "")
+        return f"<script type=\"text/sgf\">{escape_script_payload(sgf)}</script>"
+
+    def reserved_box(self) -> Optional[tuple[float, float]]:
+        """Approximate size of the hydrated widget; ``None`` for a non-pixel `size`."""
+
+        config = self.config or {}
+        size = config.get("size")
+        if isinstance(size, str) and size.strip() and not _PIXELS_RE.fullmatch(size):
+            return None
+        # Anything else unusable (`true`, zero, negative) gets the default board.
+        match = None if isinstance(size, bool) else _LEADING_INT_RE.match(str(size or ""))
+        board = int(match.group(1)) if match else 0
+        if board <= 0:
+            board = _DEFAULT_WIDTH
+        # The board is square whatever its line count.
+        controls = _CONTROLS_HEIGHT if config.get("interactive") else 0
+        return board + _CHROME, board + _CHROME + controls
+
+    def to_static_html(self) -> Optional[str]:
+        """SVG figure of a non-interactive board; ``None`` if it needs the widget."""
+
+        config = self.config or {}
+        if config.get("interactive"):
+            return None
+        state = self.snapshot()
+        if state is None:
+            return None
+        size = config.get("size")
+        if isinstance(size, bool):
+            size = None
+        width = f"{size}px" if isinstance(size, int) or str(size or "").isdigit() else size
+        svg = go_svg(
+            state,
+            theme=str(config.get("theme") or "book"),
+            coords=config.get("coords") is not False,
+            width=str(width) if width else None,
+        )
+        return figure("go", svg)
+
+    def snapshot(self) -> Optional[Snapshot]:
+        config = self.config or {}
+        return snapshot(
+            config.get("sgf", ""),
+            board_size=_int_or_none(config.get("board")),
+            initial_move=_int_or_none(_first_set(config, "initialMove", "move")),
+            show_move_numbers=config.get("showMoveNumbers"),
+        )
+
+
+def _first_set(config: Dict[str, Any], *keys: str) -> Any:
+    # Mirrors the attribute order above: the browser keeps the first
+    # `initial-move` when both spellings are given.
+    for key in keys:
+        if config.get(key) is not None:
+            return config[key]
+    return None
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    # `parseInt` semantics: leading digits count, anything else is unset.
+    match = _LEADING_INT_RE.match(str(value))
+    return int(match.group(1)) if match else None
@@ -3,7 +3,8 @@
 Implements the spec-level attributes used to control image display:
 
 - align: left|center|right
-- scale: float > 0, relative to the intrinsic image size
+- scale: float > 0, relative to the intrinsic image size (resolved at render
+  time when the renderer can read a local image, otherwise in the browser)
 - width/height: pixel integers
 
 Notes
@@ -15,15 +16,27 @@ normalize the source Markdown before it reaches the parser.
 
 from __future__ import annotations
 
+import math
 import re
 from dataclasses import dataclass
-from typing import Any, Mapping
+from typing import Any, Callable, Mapping
 
 from markdown_it.token import Token
 
 
 _IMAGE_META_KEY = "_sbs_image_display"
 
+# Line boundaries as understood by `str.splitlines`; matches never cross them.
+_EOL = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+# An image immediately followed by an attribute block. The literal `![`
+# prefix lets the regex engine skip ahead between candidates.
+_IMAGE_ATTRS_RE = re.compile(
+    rf"(?P<image>!\[[^\]{_EOL}]*\]\([^){_EOL}]*\))[^\S{_EOL}]*\{{(?P<attrs>[^}}{_EOL}]*)\}}"
+)
+_FENCE_RE = re.compile(f"```[^{_EOL}]*")
+# Bare floats (e.g. scale=0.5) get quoted so attrs_plugin parses them.
+_FLOAT_ATTR_RE = re.compile(r"(\b[\w-]+\s*=\s*)(\d+\.\d+)\b")
+
 
 @dataclass(frozen=True)
 class ImageDisplayAttrs:
@@ -41,41 +54,54 @@ def normalize_image_attribute_syntax(text: str) -> str:
     - Wraps bare floats in double quotes so attrs_plugin treats them as values.
 
     We keep this scoped to image lines to avoid surprising other attribute uses.
+    Images and fence lines are located with precompiled literal-prefix
+    searches and merged in one pass; text without `![` is returned as-is.
     """
 
-    if not text or "," not in text and "." not in text:
+    if not text or "![" not in text or "{" not in text or ("," not in text and "." not in text):
         return text
 
-    in_fence = False
-    fence_re = re.compile(r"^\s*```")
-    img_attrs_re = re.compile(r"(!\[[^\]]*\]\([^\)]*\))\s*\{([^}]*)\}")
-
-    out_lines: list[str] = []
-    for line in (text or "").splitlines(keepends=True):
-        if fence_re.match(line):
-            in_fence = not in_fence
-            out_lines.append(line)
+    out: list[str] = []
+    position = 0
+    fences = _fence_lines(text)
+    fence_index = 0
+    for match in _IMAGE_ATTRS_RE.finditer(text):
+        start = match.start()
+        while fence_index < len(fences) and fences[fence_index][0] <= start:
+            fence_index += 1
+        # Odd number of fence lines before us: inside a fence. Images on the
+        # fence line itself are left alone as well.
+        if fence_index % 2 or (fence_index and start < fences[fence_index - 1][1]):
             continue
+        attrs = match.group("attrs").replace(",", " ")
+        if "." in attrs:
+            attrs = _FLOAT_ATTR_RE.sub(_quote_float, attrs)
+        # Whitespace between the image and its attribute block is dropped.
+        out.append(text[position : match.end("image")])
+        out.append(f"{{{attrs}}}")
+        position = match.end()
+
+    if not out:
+        return text
+    out.append(text[position:])
+    return "".join(out)
 
-        if in_fence:
-            out_lines.append(line)
-            continue
 
-        def repl(match: re.Match[str]) -> str:
-            prefix = match.group(1)
-            attrs = match.group(2)
-            normalized = attrs.replace(",", " ")
-            # Quote bare floats (e.g. scale=0.5) so attrs_plugin parses them.
-            normalized = re.sub(
-                r"(\b[\w-]+\s*=\s*)(\d+\.\d+)\b",
-                lambda m: f"{m.group(1)}\"{m.group(2)}\"",
-                normalized,
-            )
-            return f"{prefix}{{{normalized}}}"
+def _quote_float(match: re.Match[str]) -> str:
+    return f'{match.group(1)}"{match.group(2)}"'
+
 
-        out_lines.append(img_attrs_re.sub(repl, line))
+def _fence_lines(text: str) -> list[tuple[int, int]]:
+    """(start, end) offsets of lines that open or close a code fence."""
 
-    return "".join(out_lines)
+    lines: list[tuple[int, int]] = []
+    for match in _FENCE_RE.finditer(text):
+        start = match.start()
+        while start > 0 and text[start - 1] not in _EOL and text[start - 1].isspace():
+            start -= 1
+        if start == 0 or text[start - 1] in _EOL:
+            lines.append((start, match.end()))
+    return lines
 
 
 def capture_image_display_attr(
@@ -93,9 +119,6 @@ def capture_image_display_attr(
     if token.type != "image":
         return
 
-    if name == "scale":
-        env["_sbs_used_image_scale"] = True
-
     meta = token.meta or {}
     raw = meta.get(_IMAGE_META_KEY)
     img_meta: dict[str, Any] = raw if isinstance(raw, dict) else {}
@@ -106,23 +129,28 @@ def capture_image_display_attr(
 
 def apply_image_display_attrs(
     token: Token,
-) -> None:
+    *,
+    intrinsic_size: Callable[[str], tuple[int, int] | None] | None = None,
+) -> bool:
     """Apply captured image display attrs to the image token.
 
     Mutates token.attrs (dict) by appending a computed `style` string.
+    `intrinsic_size` maps an image `src` to its pixel size when known, which
+    lets `scale` be resolved here. Returns True when a `scale` is left for
+    the browser to apply (`widgets/image-attrs.js`).
     """
 
     meta = token.meta or {}
     raw = meta.get(_IMAGE_META_KEY)
     if not isinstance(raw, Mapping):
-        return
+        return False
 
     attrs = _parse_attrs(raw)
     if attrs is None:
-        return
+        return False
 
     if not isinstance(token.attrs, dict):
-        return
+        return False
 
     style_parts: list[str] = []
     existing_style = token.attrs.get("style")
@@ -131,10 +159,22 @@ def apply_image_display_attrs(
 
     _apply_align_style(style_parts, attrs.align)
 
+    scaled: tuple[int, int] | None = None
+    runtime_scale = False
     if attrs.scale is not None and attrs.scale > 0:
-        # Scale is applied at runtime (browser) so it can use naturalWidth/Height
-        # for both local and remote images.
-        token.attrs["data-sbs-scale"] = f"{attrs.scale:g}"
+        size = intrinsic_size(str(token.attrs.get("src") or "")) if intrinsic_size else None
+        if size is None:
+            # Unknown size (e.g. remote images): scale at runtime (browser)
+            # once naturalWidth/Height are available.
+            token.attrs["data-sbs-scale"] = f"{attrs.scale:g}"
+            runtime_scale = True
+        else:
+            # Same rounding as image-attrs.js (Math.round, at least 1px).
+            scaled = (
+                max(1, math.floor(size[0] * attrs.scale + 0.5)),
+                max(1, math.floor(size[1] * attrs.scale + 0.5)),
+            )
+            _apply_width_height_style(style_parts, *scaled)
     else:
         _apply_width_height_style(style_parts, attrs.width, attrs.height)
 
@@ -145,6 +185,12 @@ def apply_image_display_attrs(
     for key in ("align", "scale", "width", "height"):
         token.attrs.pop(key, None)
 
+    if scaled is not None:
+        # Real attributes let the browser reserve the box before loading.
+        token.attrs["width"] = str(scaled[0])
+        token.attrs["height"] = str(scaled[1])
+    return runtime_scale
+
 
 def _parse_attrs(raw: Mapping[str, Any]) -> ImageDisplayAttrs | None:
     def norm(value: Any) -> str:
@@ -0,0 +1,165 @@
+"""Read intrinsic image dimensions from file headers.
+
+Only the few bytes that carry the size are read; pixels are never decoded.
+Supported formats are PNG, GIF, JPEG, WebP and SVG (from `width`/`height`
+or the `viewBox`). Results are cached per path and modification time.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import os
+from pathlib import Path
+import re
+import struct
+from typing import BinaryIO, Optional, Union
+from urllib.parse import unquote, urlsplit
+
+Size = tuple[int, int]
+
+_SVG_HEAD_BYTES = 64 * 1024
+_SVG_TAG_RE = re.compile(rb"<svg\b[^>]*>", re.IGNORECASE | re.DOTALL)
+_SVG_ATTR_RE = re.compile(rb"""\s([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_SVG_LENGTH_RE = re.compile(r"\s*([0-9]*\.?[0-9]+)\s*(px)?\s*")
+# File types `image_size` can read; book builds treat such files as inputs.
+IMAGE_SUFFIXES = (".png", ".gif", ".jpg", ".jpeg", ".webp", ".svg")
+# JPEG start-of-frame markers (SOF0..SOF15 minus DHT, JPG and DAC).
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(path: Union[str, os.PathLike[str]]) -> Optional[Size]:
+    """Return `(width, height)` of the image at `path`, or ``None``."""
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _cached_size(os.fspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def local_image_path(
+    src: str,
+    base_dir: Union[str, os.PathLike[str]],
+    root: Optional[Union[str, os.PathLike[str]]] = None,
+) -> Optional[Path]:
+    """Map a relative image `src` to a file under `base_dir`.
+
+    URLs with a scheme or host, site-absolute paths and `data:` URIs are
+    not local and yield ``None``, as do paths leading outside `root`
+    (`base_dir` by default).
+    """
+
+    parts = urlsplit(src or "")
+    if parts.scheme or parts.netloc or not parts.path or parts.path.startswith("/"):
+        return None
+    path = Path(base_dir) / unquote(parts.path)
+    if not path.resolve().is_relative_to(Path(root if root is not None else base_dir).resolve()):
+        return None
+    return path
+
+
+def clear_cache() -> None:
+    _cached_size.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _cached_size(path: str, _mtime_ns: int, _size: int) -> Optional[Size]:
+    try:
+        with open(path, "rb") as handle:
+            return probe(handle)
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def probe(handle: BinaryIO) -> Optional[Size]:
+    """Detect the format from the leading bytes and read the dimensions."""
+
+    head = handle.read(32)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        return _positive(*struct.unpack(">II", head[16:24]))
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return _positive(*struct.unpack("<HH", head[6:10]))
+    if head.startswith(b"\xff\xd8"):
+        handle.seek(2)
+        return _jpeg_size(handle)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return _webp_size(head)
+    handle.seek(0)
+    return _svg_size(handle.read(_SVG_HEAD_BYTES))
+
+
+def _positive(width: int, height: int) -> Optional[Size]:
+    return (width, height) if width > 0 and height > 0 else None
+
+
+def _jpeg_size(handle: BinaryIO) -> Optional[Size]:
+    while True:
+        byte = handle.read(1)
+        while byte and byte != b"\xff":
+            byte = handle.read(1)
+        while byte == b"\xff":
+            byte = handle.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD9 or marker == 0xDA:  # end of image / start of scan
+            return None
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # parameterless markers
+            continue
+        length = struct.unpack(">H", handle.read(2))[0]
+        if marker in _JPEG_SOF:
+            _precision, height, width = struct.unpack(">BHH", handle.read(5))
+            return _positive(width, height)
+        handle.seek(length - 2, os.SEEK_CUR)
+
+
+def _webp_size(head: bytes) -> Optional[Size]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return _positive(width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = int.from_bytes(head[21:25], "little")
+        return _positive((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return _positive(width, height)
+    return None
+
+
+def _svg_size(data: bytes) -> Optional[Size]:
+    match = _SVG_TAG_RE.search(data)
+    if match is None:
+        return None
+    attrs: dict[str, str] = {}
+    for name, double, single in _SVG_ATTR_RE.findall(match.group(0)):
+        attrs[name.decode("ascii", "replace").lower()] = (double or single).decode("utf-8", "replace")
+
+    width = _svg_length(attrs.get("width"))
+    height = _svg_length(attrs.get("height"))
+    view_box = (attrs.get("viewbox") or "").replace(",", " ").split()
+    if len(view_box) == 4:
+        try:
+            box_width, box_height = float(view_box[2]), float(view_box[3])
+        except ValueError:
+            box_width = box_height = 0.0
+        if box_width > 0 and box_height > 0:
+            # Fill in a missing side from the viewBox aspect ratio.
+            if width is None and height is None:
+                width, height = box_width, box_height
+            elif width is None and height is not None:
+                width = height * box_width / box_height
+            elif height is None and width is not None:
+                height = width * box_height / box_width
+    if width is None or height is None:
+        return None
+    return _positive(round(width), round(height))
+
+
+def _svg_length(value: Optional[str]) -> Optional[float]:
+    # Relative units (%, em, ...) depend on the page; treat them as unknown.
+    if value is None:
+        return None
+    match = _SVG_LENGTH_RE.fullmatch(value)
+    return float(match.group(1)) if match else None
@@ -0,0 +1,76 @@
+"""PBN (Portable Bridge Notation) reading for bridge fences.
+
+A port of `widgets/bridge/pbn-parser.js`, so diagrams drawn by the renderer
+show the same tags, hands, auction and play as the widget would.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import re
+from typing import Optional
+
+_TAG_RE = re.compile(r'\[\s*(\w+)\s+"([^"]*)"\s*\]')
+_DIRECTIONS = "NESW"
+
+Hand = dict[str, str]
+
+
+@dataclass
+class Deal:
+    tags: dict[str, str] = field(default_factory=dict)
+    hands: Optional[dict[str, Optional[Hand]]] = None
+    auction: list[str] = field(default_factory=list)
+    play: list[str] = field(default_factory=list)
+
+
+def parse_pbn(text: str) -> Deal:
+    deal = Deal()
+    if not text:
+        return deal
+    auction_end = play_end = -1
+    for match in _TAG_RE.finditer(text):
+        deal.tags[match.group(1)] = match.group(2)
+        if match.group(1) == "Auction":
+            auction_end = match.end()
+        if match.group(1) == "Play":
+            play_end = match.end()
+    if auction_end != -1:
+        deal.auction = _section(text, auction_end)
+    if play_end != -1:
+        deal.play = _section(text, play_end)
+    deal.hands = parse_deal(deal.tags.get("Deal"))
+    return deal
+
+
+def parse_deal(value: Optional[str]) -> Optional[dict[str, Optional[Hand]]]:
+    """Hands of a `Deal` tag such as `N:AKQ.J.T98.765 - ...` by direction."""
+
+    if not value:
+        return None
+    parts = value.split(":")
+    if len(parts) != 2:
+        return None
+    first = parts[0].strip().upper()
+    if len(first) != 1 or first not in _DIRECTIONS:
+        return None
+    cards = parts[1].split()
+    start = _DIRECTIONS.index(first)
+    hands: dict[str, Optional[Hand]] = {}
+    for offset in range(4):
+        direction = _DIRECTIONS[(start + offset) % 4]
+        hand = cards[offset] if offset < len(cards) else ""
+        if hand and hand != "-":
+            suits = hand.split(".")
+            hands[direction] = {suit: suits[i] if i < len(suits) else "" for i, suit in enumerate("SHDC")}
+        else:
+            hands[direction] = None
+    return hands
+
+
+def _section(text: str, start: int) -> list[str]:
+    content = text[start:]
+    next_tag = content.find("[")
+    if next_tag != -1:
+        content = content[:next_tag]
+    return content.replace("*", "").split()
@@ -0,0 +1,443 @@
+"""PGN replay for chess fences.
+
+Just enough of the rules of chess to follow a game record: legal move
+generation, SAN parsing (as permissive as chess.js' non-strict mode) and
+canonical SAN/FEN output. `replay` turns a fence's PGN into one FEN per ply
+so a static board can be painted without replaying the game in the browser,
+and rejects illegal or ambiguous moves while the book is built.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import NamedTuple, Optional
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+_TAG_LINE_RE = re.compile(r'^\s*\[[A-Za-z0-9_]+\s+"[^"]*"\]\s*$', re.MULTILINE)
+_FEN_TAG_RE = re.compile(r'^\s*\[FEN\s+"([^"]*)"\]\s*$', re.MULTILINE)
+# Comments, variations and annotations are consumed as single tokens; the
+# remaining words are move numbers, results or SAN moves.
+_PGN_TOKEN_RE = re.compile(r"\{[^}]*\}|;[^\n]*|\$\d+|[()]|[^\s{}();$]+")
+_MOVE_NUMBER_RE = re.compile(r"\d+\.*")
+_RESULTS = frozenset({"1-0", "0-1", "1/2-1/2", "*"})
+_SAN_RE = re.compile(r"([PNBRQK])?([a-h])?([1-8])?x?-?([a-h][1-8])(?:=?([NBRQnbrq]))?")
+
+_FILES = "abcdefgh"
+_KNIGHT_STEPS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+_KING_STEPS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+_ROOK_DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_BISHOP_DIRS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+_SLIDES = {"B": _BISHOP_DIRS, "R": _ROOK_DIRS, "Q": _ROOK_DIRS + _BISHOP_DIRS}
+# Castling right lost when a piece leaves or is captured on these squares.
+_CASTLING_SQUARES = {0: "Q", 4: "KQ", 7: "K", 56: "q", 60: "kq", 63: "k"}
+
+
+class PgnError(ValueError):
+    """A game record that cannot be replayed."""
+
+
+class Move(NamedTuple):
+    origin: int
+    target: int
+    promotion: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Timeline:
+    fens: list[str]
+    sans: list[str]
+
+
+def _square(name: str) -> int:
+    return (int(name[1]) - 1) * 8 + _FILES.index(name[0])
+
+
+def _name(square: int) -> str:
+    return f"{_FILES[square % 8]}{square // 8 + 1}"
+
+
+def _steps(deltas: tuple[tuple[int, int], ...]) -> list[tuple[int, ...]]:
+    table = []
+    for square in range(64):
+        file, rank = square % 8, square // 8
+        table.append(tuple(
+            (rank + dr) * 8 + file + df
+            for df, dr in deltas
+            if 0 <= file + df < 8 and 0 <= rank + dr < 8
+        ))
+    return table
+
+
+def _rays(deltas: tuple[tuple[int, int], ...]) -> list[tuple[tuple[int, ...], ...]]:
+    table = []
+    for square in range(64):
+        file, rank = square % 8, square // 8
+        rays = []
+        for df, dr in deltas:
+            ray = []
+            f, r = file + df, rank + dr
+            while 0 <= f < 8 and 0 <= r < 8:
+                ray.append(r * 8 + f)
+                f, r = f + df, r + dr
+            rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return table
+
+
+_KNIGHT = _steps(_KNIGHT_STEPS)
+_KING = _steps(_KING_STEPS)
+_RAYS = {piece: _rays(dirs) for piece, dirs in _SLIDES.items()}
+
+
+class Position:
+    """A chess position; `play` returns a new position."""
+
+    __slots__ = ("board", "turn", "castling", "ep", "halfmove", "fullmove")
+
+    def __init__(self, board: list[str], turn: str, castling: str, ep: Optional[int], halfmove: int, fullmove: int):
+        self.board = board
+        self.turn = turn
+        self.castling = castling
+        self.ep = ep
+        self.halfmove = halfmove
+        self.fullmove = fullmove
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "Position":
+        parts = fen.split()
+        if len(parts) < 4:
+            raise PgnError(f"invalid FEN {fen!r}")
+        placement, turn, castling, ep = parts[:4]
+        board = [""] * 64
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise PgnError(f"invalid FEN board {placement!r}")
+        for index, row in enumerate(rows):
+            rank, file = 7 - index, 0
+            for char in row:
+                if char.isdigit():
+                    file += int(char)
+                elif char in "pnbrqkPNBRQK" and file < 8:
+                    board[rank * 8 + file] = char
+                    file += 1
+                else:
+                    raise PgnError(f"invalid FEN row {row!r}")
+            if file != 8:
+                raise PgnError(f"invalid FEN row {row!r}")
+        if board.count("K") != 1 or board.count("k") != 1:
+            raise PgnError(f"FEN needs one king per side: {fen!r}")
+        if any(board[square] in ("P", "p") for square in (*range(8), *range(56, 64))):
+            raise PgnError(f"FEN has a pawn on the back rank: {fen!r}")
+        if turn not in ("w", "b") or not re.fullmatch(r"-|K?Q?k?q?", castling) or not re.fullmatch(r"-|[a-h][36]", ep):
+            raise PgnError(f"invalid FEN {fen!r}")
+        try:
+            halfmove = int(parts[4]) if len(parts) > 4 else 0
+            fullmove = int(parts[5]) if len(parts) > 5 else 1
+        except ValueError:
+            raise PgnError(f"invalid FEN counters {fen!r}") from None
+        return cls(board, turn, castling.replace("-", ""), None if ep == "-" else _square(ep), halfmove, fullmove)
+
+    # ------------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------------
+    def attacked(self, square: int, by: str) -> bool:
+        """True if a piece of colour `by` attacks `square`."""
+
+        board = self.board
+        white = by == "w"
+        pawn, knight, king = ("P", "N", "K") if white else ("p", "n", "k")
+        file, rank = square % 8, square // 8
+        pawn_rank = rank - 1 if white else rank + 1
+        if 0 <= pawn_rank < 8:
+            for df in (-1, 1):
+                if 0 <= file + df < 8 and board[pawn_rank * 8 + file + df] == pawn:
+                    return True
+        if any(board[target] == knight for target in _KNIGHT[square]):
+            return True
+        if any(board[target] == king for target in _KING[square]):
+            return True
+        for sliders, rays in (("BQ", _RAYS["B"][square]), ("RQ", _RAYS["R"][square])):
+            if not white:
+                sliders = sliders.lower()
+            for ray in rays:
+                for target in ray:
+                    piece = board[target]
+                    if piece:
+                        if piece in sliders:
+                            return True
+                        break
+        return False
+
+    def in_check(self) -> bool:
+        king = self.board.index("K" if self.turn == "w" else "k")
+        return self.attacked(king, "b" if self.turn == "w" else "w")
+
+    def pseudo_moves(self, kind: Optional[str] = None, target: Optional[int] = None) -> list[Move]:
+        """Moves that obey piece movement, optionally filtered by piece kind
+        (upper-case letter) and target square."""
+
+        board, white = self.board, self.turn == "w"
+        moves: list[Move] = []
+        for origin, piece in enumerate(board):
+            if not piece or piece.isupper() != white:
+                continue
+            upper = piece.upper()
+            if kind is not None and upper != kind:
+                continue
+            if upper == "P":
+                self._pawn_moves(origin, moves)
+            elif upper == "N" or upper == "K":
+                for square in (_KNIGHT if upper == "N" else _KING)[origin]:
+                    other = board[square]
+                    if not other or other.isupper() != white:
+                        moves.append(Move(origin, square))
+                if upper == "K":
+                    self._castling_moves(origin, moves)
+            else:
+                for ray in _RAYS[upper][origin]:
+                    for square in ray:
+                        other = board[square]
+                        if not other:
+                            moves.append(Move(origin, square))
+                            continue
+                        if other.isupper() != white:
+                            moves.append(Move(origin, square))
+                        break
+        if target is not None:
+            moves = [move for move in moves if move.target == target]
+        return moves
+
+    def _pawn_moves(self, origin: int, moves: list[Move]) -> None:
+        board, white = self.board, self.turn == "w"
+        step, start_rank, last_rank = (8, 1, 7) if white else (-8, 6, 0)
+        file, rank = origin % 8, origin // 8
+
+        def add(square: int) -> None:
+            if square // 8 == last_rank:
+                moves.extend(Move(origin, square, promotion) for promotion in "qrbn")
+            else:
+                moves.append(Move(origin, square))
+
+        ahead = origin + step
+        if not 0 <= ahead < 64:
+            return
+        if not board[ahead]:
+            add(ahead)
+            if rank == start_rank and 0 <= ahead + step < 64 and not board[ahead + step]:
+                moves.append(Move(origin, ahead + step))
+        for df in (-1, 1):
+            if not 0 <= file + df < 8:
+                continue
+            square = ahead + df
+            other = board[square]
+            if (other and other.isupper() != white) or square == self.ep:
+                add(square)
+
+    def _castling_moves(self, origin: int, moves: list[Move]) -> None:
+        white = self.turn == "w"
+        home = 4 if white else 60
+        if origin != home:
+            return
+        enemy = "b" if white else "w"
+        rook = "R" if white else "r"
+        for right, rook_square, between, passing in (
+            ("K", home + 3, (home + 1, home + 2), (home + 1, home + 2)),
+            ("Q", home - 4, (home - 1, home - 2, home - 3), (home - 1, home - 2)),
+        ):
+            if (right if white else right.lower()) not in self.castling:
+                continue
+            if self.board[rook_square] != rook or any(self.board[square] for square in between):
+                continue
+            if self.attacked(home, enemy) or any(self.attacked(square, enemy) for square in passing):
+                continue
+            moves.append(Move(origin, passing[1]))
+
+    def legal(self, moves: list[Move]) -> list[Move]:
+        return [move for move in moves if self._is_legal(move)]
+
+    def _is_legal(self, move: Move) -> bool:
+        after = self.play(move)
+        king = after.board.index("K" if self.turn == "w" else "k")
+        return not after.attacked(king, after.turn)
+
+    def has_legal_move(self) -> bool:
+        return any(self._is_legal(move) for move in self.pseudo_moves())
+
+    def play(self, move: Move) -> "Position":
+        board = self.board.copy()
+        piece = board[move.origin]
+        upper = piece.upper()
+        captured = board[move.target]
+        board[move.origin] = ""
+        board[move.target] = (move.promotion.upper() if piece.isupper() else move.promotion) if move.promotion else piece
+        ep = None
+        if upper == "P":
+            if move.target == self.ep and not captured:
+                board[move.target + (-8 if piece.isupper() else 8)] = ""
+                captured = "p"
+            if abs(move.target - move.origin) == 16:
+                ep = (move.origin + move.target) // 2
+        elif upper == "K" and abs(move.target - move.origin) == 2:
+            rook_from, rook_to = (move.origin + 3, move.origin + 1) if move.target > move.origin else (move.origin - 4, move.origin - 1)
+            board[rook_to], board[rook_from] = board[rook_from], ""
+        castling = self.castling
+        for square in (move.origin, move.target):
+            for right in _CASTLING_SQUARES.get(square, ""):
+                castling = castling.replace(right, "")
+        white = self.turn == "w"
+        return Position(
+            board,
+            "b" if white else "w",
+            castling,
+            ep,
+            0 if upper == "P" or captured else self.halfmove + 1,
+            self.fullmove if white else self.fullmove + 1,
+        )
+
+    # ------------------------------------------------------------------
+    # Notation
+    # ------------------------------------------------------------------
+    def parse_san(self, san: str) -> Move:
+        """Resolve a SAN move (decorations, `0-0` and surplus
+        disambiguation allowed) to a legal move."""
+
+        clean = re.sub(r"[+#?!]+$", "", san.strip()).replace("0", "O")
+        castle = {"O-O": 2, "O-O-O": -2}.get(clean)
+        if castle is not None:
+            king = self.board.index("K" if self.turn == "w" else "k")
+            moves = self.legal(self.pseudo_moves("K", king + castle))
+        else:
+            match = _SAN_RE.fullmatch(clean)
+            if match is None:
+                raise PgnError(f"unreadable move {san!r}")
+            kind, file, rank, target, promotion = match.groups()
+            moves = [
+                move
+                for move in self.legal(self.pseudo_moves(kind or "P", _square(target)))
+                if (file is None or _FILES[move.origin % 8] == file)
+                and (rank is None or str(move.origin // 8 + 1) == rank)
+                and move.promotion == (promotion.lower() if promotion else None)
+            ]
+        if not moves:
+            raise PgnError(f"illegal move {san!r}")
+        if len(moves) > 1:
+            raise PgnError(f"ambiguous move {san!r}")
+        return moves[0]
+
+    def san(self, move: Move) -> str:
+        """Canonical SAN, as chess.js writes it."""
+
+        piece = self.board[move.origin].upper()
+        if piece == "K" and abs(move.target - move.origin) == 2:
+            text = "O-O" if move.target > move.origin else "O-O-O"
+        else:
+            capture = bool(self.board[move.target]) or (piece == "P" and move.target == self.ep)
+            if piece == "P":
+                text = f"{_FILES[move.origin % 8]}x" if capture else ""
+            else:
+                text = piece + self._disambiguator(move) + ("x" if capture else "")
+            text += _name(move.target)
+            if move.promotion:
+                text += "=" + move.promotion.upper()
+        after = self.play(move)
+        if after.in_check():
+            text += "+" if after.has_legal_move() else "#"
+        return text
+
+    def _disambiguator(self, move: Move) -> str:
+        piece = self.board[move.origin].upper()
+        rivals = [
+            other.origin
+            for other in self.legal(self.pseudo_moves(piece, move.target))
+            if other.origin != move.origin
+        ]
+        if not rivals:
+            return ""
+        same_file = any(origin % 8 == move.origin % 8 for origin in rivals)
+        same_rank = any(origin // 8 == move.origin // 8 for origin in rivals)
+        name = _name(move.origin)
+        if same_file and same_rank:
+            return name
+        return name[1] if same_file else name[0]
+
+    def fen(self) -> str:
+        rows = []
+        for rank in range(7, -1, -1):
+            row, empty = "", 0
+            for piece in self.board[rank * 8 : rank * 8 + 8]:
+                if piece:
+                    row += (str(empty) if empty else "") + piece
+                    empty = 0
+                else:
+                    empty += 1
+            rows.append(row + (str(empty) if empty else ""))
+        return " ".join([
+            "/".join(rows),
+            self.turn,
+            self.castling or "-",
+            _name(self.ep) if self._ep_capturable() else "-",
+            str(self.halfmove),
+            str(self.fullmove),
+        ])
+
+    def _ep_capturable(self) -> bool:
+        # Like chess.js, only print the square when a capture is legal there.
+        if self.ep is None:
+            return False
+        return bool(self.legal(self.pseudo_moves("P", self.ep)))
+
+
+def main_line(pgn: str) -> list[str]:
+    """Main-line move tokens of the first game in `pgn`.
+
+    Tag pairs, comments, variations, NAGs, move numbers and the result are
+    dropped; the moves keep their own decorations.
+    """
+
+    moves: list[str] = []
+    depth = 0
+    for token in _PGN_TOKEN_RE.findall(_TAG_LINE_RE.sub("", pgn or "")):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth or token[0] in "{;$":
+            continue
+        elif token in _RESULTS:
+            break
+        else:
+            if token[0].isdigit() and "." in token:
+                token = _MOVE_NUMBER_RE.sub("", token, count=1)
+            if token:
+                moves.append(token)
+    return moves
+
+
+def replay(pgn: str, fen: Optional[str] = None) -> Timeline:
+    """Play the main line of `pgn` from `fen`.
+
+    The start position is `fen`, else the PGN's `[FEN]` tag, else the
+    initial position. Raises `PgnError` naming the first bad move.
+    """
+
+    if fen is not None and not isinstance(fen, str):
+        raise PgnError(f"FEN must be a string, not {type(fen).__name__}")
+    if not fen or not fen.strip() or fen.strip() == "startpos":
+        tag = _FEN_TAG_RE.search(pgn or "")
+        fen = tag.group(1) if tag else START_FEN
+    position = Position.from_fen(fen.strip())
+    fens = [position.fen()]
+    sans: list[str] = []
+    for token in main_line(pgn):
+        try:
+            move = position.parse_san(token)
+        except PgnError as exc:
+            number = position.fullmove
+            dots = "." if position.turn == "w" else "..."
+            raise PgnError(f"move {number}{dots} {token}: {exc}") from None
+        sans.append(position.san(move))
+        position = position.play(move)
+        fens.append(position.fen())
+    return Timeline(fens=fens, sans=sans)
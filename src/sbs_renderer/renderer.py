@@ -2,20 +2,34 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
+import hashlib
 import html
-from textwrap import dedent
-from typing import Any, Callable, Optional, Protocol, cast
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Protocol, Union, cast
 
 from markdown_it import MarkdownIt
 from markdown_it.token import Token
 from mdit_py_plugins.attrs import attrs_plugin
+from .assets import AssetManifest, load_manifest
+from .blocks import BlockPatch, RenderHandle, render_blocks, render_patch, top_level_ranges
 from .bridge import BridgeBlock
+from .cache import RenderCache, render_key
 from .chess import ChessBlock
+from .collection import FORMATS, fence_entry
 from .go import GoBlock
 from .image_attrs import apply_image_display_attrs, capture_image_display_attr, normalize_image_attribute_syntax
+from .image_size import image_size, local_image_path
 from .sticky import use_sticky, wrap_sticky_if_needed
 
 
+_DOCUMENT_TAIL = "</body>\n</html>"
+# Payload scripts shorter than this are cheaper to repeat than to reference.
+_SHARED_PAYLOAD_MIN = 128
+
+
 class _FenceRenderer(Protocol):
     rules: dict[str, Any]
 
@@ -23,8 +37,14 @@ class _FenceRenderer(Protocol):
 
 
 class _HtmlBlock(Protocol):
+    config: dict[str, Any]
+
     def to_html(self) -> str: ...
 
+    def to_static_html(self) -> Optional[str]: ...
+
+    def payload_script(self) -> Optional[str]: ...
+
 
 class _AttrHandler(Protocol):
     def __call__(
@@ -45,9 +65,30 @@ class SBSRenderer:
         *,
         widgets_dir: str = "./widgets",
         theme: str = "default",
+        cache: Optional[RenderCache] = None,
+        fence_cache_size: int = 256,
+        base_dir: Optional[Union[str, os.PathLike[str]]] = None,
+        root_dir: Optional[Union[str, os.PathLike[str]]] = None,
+        static_diagrams: bool = False,
+        asset_manifest: Optional[Union[AssetManifest, str, os.PathLike[str]]] = None,
     ):
         self.widgets_dir = widgets_dir.rstrip("/")
         self.theme = theme or "default"
+        self.cache = cache
+        # Relative image paths resolve against this directory so `scale=`
+        # can use the file's intrinsic size instead of a runtime script.
+        self.base_dir = Path(base_dir) if base_dir is not None else None
+        # Only images inside this tree are read (a book's root; `base_dir`
+        # by default), so a page never depends on files outside it.
+        self.root_dir = Path(root_dir) if root_dir is not None else self.base_dir
+        # Draw display-only boards as inline SVG; pages left without live
+        # widgets then load no widget JavaScript.
+        self.static_diagrams = static_diagrams
+        # With a manifest, widget URLs carry content hashes and can be
+        # cached forever (see `assets.py`).
+        if asset_manifest is not None and not isinstance(asset_manifest, AssetManifest):
+            asset_manifest = load_manifest(asset_manifest)
+        self.assets: Optional[AssetManifest] = asset_manifest
         self.md = MarkdownIt("commonmark", {"linkify": True, "typographer": True})
         self.md.use(attrs_plugin)
         use_sticky(self.md)
@@ -55,6 +96,10 @@ class SBSRenderer:
         self._default_fence = self._renderer.rules.get("fence")
         self._default_image = self._renderer.rules.get("image")
         self._fence_handlers: dict[str, Callable[[Token, dict[str, Any]], str]] = {}
+        self._block_factories: dict[str, Callable[[str], _HtmlBlock]] = {}
+        # Fence HTML only depends on (lang, content); memoize it so unchanged
+        # fences are not re-parsed on every render of a long document.
+        self._fence_html = lru_cache(maxsize=max(0, fence_cache_size))(self._build_fence_html)
         self._attr_handlers: dict[str, _AttrHandler] = {}
         self._register_fence_handlers()
         self._register_attr_handlers()
@@ -138,66 +183,234 @@ class SBSRenderer:
         widget: str,
         block_factory: Callable[[str], _HtmlBlock],
     ) -> None:
+        self._block_factories[lang] = block_factory
+
         def handler(token: Token, env: dict[str, Any]) -> str:
-            self._note_widget_used(env, widget)
-            block = block_factory(token.content)
-            return wrap_sticky_if_needed(block.to_html(), env)
+            # Usage tracking and sticky wrapping depend on the document, so
+            # they run per occurrence even when the fragment is memoized.
+            # Games pulled from a collection file join the memo key, so an
+            # edited collection never serves a stale fragment.
+            entry = fence_entry(lang, token.content, self.base_dir, self.root_dir, self._inputs(env))
+            html_str, live, payload = self._fence_html(lang, token.content, entry)
+            if live:
+                self._note_widget_used(env, widget)
+                if payload is not None:
+                    html_str = self._share_payload(html_str, payload, f"sbs-{widget}", env)
+            return wrap_sticky_if_needed(html_str, env)
 
         self._fence_handlers[lang] = handler
 
+    def _build_fence_html(
+        self, lang: str, content: str, entry: Optional[str] = None
+    ) -> tuple[str, bool, Optional[str]]:
+        """Fence HTML, whether it is a live widget needing its script, and its payload script."""
+        block = self._block_factories[lang](content)
+        if entry is not None:
+            fmt = FORMATS[lang]
+            block.config.pop("source", None)
+            block.config.pop("game", None)
+            if fmt == "pbn":
+                block.config.pop("board", None)
+            block.config[fmt] = entry
+        if self.static_diagrams:
+            static = block.to_static_html()
+            if static is not None:
+                return static, False, None
+        return block.to_html(), True, block.payload_script()
+
+    def _share_payload(self, html_str: str, script: str, tag: str, env: dict[str, Any]) -> str:
+        """Embed each distinct game payload once per render.
+
+        The first widget carrying a payload keeps its script, tagged with an
+        ID derived from the content; later widgets with the same payload
+        point at it through `data-sbs-payload` instead of repeating it.
+        Block renders use one `env` per block, so a reference never crosses
+        into a block a live preview may replace on its own.
+        """
+        if len(script) < _SHARED_PAYLOAD_MIN:
+            return html_str
+        shared = env.setdefault("_sbs_shared_payloads", set())
+        payload_id = "sbs-payload-" + hashlib.sha1(script.encode("utf-8")).hexdigest()[:12]
+        if payload_id in shared:
+            html_str = html_str.replace(script, "", 1)
+            return html_str.replace(f"<{tag}", f"<{tag} data-sbs-payload='{payload_id}'", 1)
+        shared.add(payload_id)
+        return html_str.replace(script, script.replace("<script", f"<script id='{payload_id}'", 1), 1)
+
     # ------------------------------------------------------------------
     # Rendering
     # ------------------------------------------------------------------
+    def cache_key(self, text: str, *, title: Optional[str] = None) -> str:
+        """Content address of a render; pass `title` for full documents."""
+        return render_key(
+            "document" if title is not None else "render",
+            text,
+            theme=self.theme,
+            widgets_dir=self.widgets_dir,
+            title=title,
+            base_dir=os.fspath(self.base_dir) if self.base_dir is not None else None,
+            static_diagrams=self.static_diagrams,
+            assets=self.assets.version if self.assets is not None else None,
+        )
+
     def render(self, text: str, env: Optional[dict[str, Any]] = None) -> str:
-        """Render Markdown to an HTML fragment."""
+        """Render Markdown to an HTML fragment.
+
+        The cache is only consulted when the caller does not pass `env`,
+        since a cached fragment cannot replay side effects on it.
+        """
+        key = None
         if env is None:
             env = {}
+            if self.cache is not None:
+                key = self.cache_key(text)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+
         normalized = normalize_image_attribute_syntax(text)
-        return self.md.render(normalized, env)
+        html_str = self.md.render(normalized, env)
+        if key is not None and self.cache is not None and not env.get("_sbs_inputs"):
+            self.cache.put(key, html_str)
+        return html_str
 
     def render_document(self, text: str, *, title: str = "SBS Document") -> str:
+        if self.cache is None:
+            return self.render_document_inputs(text, title=title)[0]
+
+        key = self.cache_key(text, title=title)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        html_str, inputs = self.render_document_inputs(text, title=title)
+        if not inputs:
+            self.cache.put(key, html_str)
+        return html_str
+
+    def render_document_inputs(self, text: str, *, title: str = "SBS Document") -> tuple[str, frozenset[Path]]:
+        """Render a full document, bypassing the cache, with the files it read.
+
+        Those are the collections named by `source:` and the local images
+        whose size was looked up for `scale=`. A document that read none
+        depends on its text and the renderer options alone, which is what
+        makes it safe to cache.
+        """
+        env: dict[str, Any] = {}
+        html_str = self._render_document(text, title=title, env=env)
+        return html_str, frozenset(env.get("_sbs_inputs", ()))
+
+    def render_document_stream(self, text: str, *, title: str = "SBS Document") -> Iterator[str]:
+        """Yield a full HTML document piece by piece.
+
+        The head with the stylesheets comes first, then the body one
+        top-level block at a time, so neither the caller nor the renderer
+        holds the whole page. The widget scripts a page needs are only known
+        once its body is rendered, so they close the body instead of sitting
+        in the head (module scripts run after parsing either way). A cached
+        document is yielded whole; streamed output is not cached.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.cache_key(text, title=title))
+            if cached is not None:
+                yield cached
+                return
+
+        yield self._document_head(title) + "\n"
         env: dict[str, Any] = {}
+        tokens = self.md.parse(normalize_image_attribute_syntax(text), env)
+        for begin, end in top_level_ranges(tokens):
+            yield self.md.renderer.render(tokens[begin:end], self.md.options, env)
+        script_tags = self._script_tags(
+            used_widgets=env.get("_sbs_used_widgets"),
+            image_scale=bool(env.get("_sbs_used_image_scale")),
+        )
+        yield (script_tags + "\n" if script_tags else "") + _DOCUMENT_TAIL
+
+    def render_blocks(self, text: str) -> RenderHandle:
+        """Render Markdown as top-level blocks with stable IDs.
+
+        The returned handle feeds `render_patch` for the next revision.
+        """
+        return render_blocks(self, text)
+
+    def render_patch(self, handle: RenderHandle, text: str) -> BlockPatch:
+        """Re-render only the top-level blocks changed since `handle`."""
+        return render_patch(self, handle, text)
+
+    def render_blocks_document(self, handle: RenderHandle, *, title: str = "SBS Document") -> str:
+        """Wrap a block render in a full HTML document."""
+        return self._wrap_document(
+            handle.html,
+            title=title,
+            used_widgets=handle.used_widgets,
+            image_scale=handle.image_scale,
+        )
+
+    def _render_document(self, text: str, *, title: str, env: dict[str, Any]) -> str:
         body = self.render(text, env)
-        title_html = html.escape(title)
+        return self._wrap_document(
+            body,
+            title=title,
+            used_widgets=env.get("_sbs_used_widgets"),
+            image_scale=bool(env.get("_sbs_used_image_scale")),
+        )
+
+    def _wrap_document(
+        self,
+        body: str,
+        *,
+        title: str,
+        used_widgets: Optional[set[str]],
+        image_scale: bool,
+    ) -> str:
+        script_tags = self._script_tags(used_widgets=used_widgets, image_scale=image_scale)
+        return "\n".join([self._document_head(title, script_tags), body, _DOCUMENT_TAIL])
+
+    def _document_head(self, title: str, script_tags: str = "") -> str:
+        """Everything up to and including the opening `<body>` tag."""
         css_hrefs = [
-            f"{self.widgets_dir}/sbs-ext.css",
-            f"{self.widgets_dir}/themes/{self.theme}.css",
+            self._asset_url("sbs-ext.css"),
+            self._asset_url(f"themes/{self.theme}.css"),
+        ]
+        lines = [
+            "<!DOCTYPE html>",
+            "<html lang='en'>",
+            "<head>",
+            "<meta charset='utf-8'>",
+            "<meta name='viewport' content='width=device-width, initial-scale=1'>",
+            f"<title>{html.escape(title)}</title>",
+            *(f"<link rel='stylesheet' href='{href}'>" for href in css_hrefs),
         ]
-        css_links = "\n".join(f"<link rel='stylesheet' href='{href}'>" for href in css_hrefs)
+        if script_tags:
+            lines.append(script_tags)
+        lines += ["</head>", "<body>"]
+        return "\n".join(lines)
 
-        used_widgets = env.get("_sbs_used_widgets")
-        script_srcs: list[str] = []
+    def _script_tags(self, *, used_widgets: Optional[set[str]], image_scale: bool) -> str:
+        scripts: list[str] = []
         if used_widgets:
-            script_srcs.append(f"{self.widgets_dir}/index.js")
+            scripts.append("index.js")
 
-        if env.get("_sbs_used_image_scale"):
-            script_srcs.append(f"{self.widgets_dir}/image-attrs.js")
-
-        script_tags = "\n".join(
-            f"<script type='module' src='{src}'></script>" for src in script_srcs
-        )
-        html_str = dedent("""\
-            <!DOCTYPE html>
-            <html lang='en'>
-            <head>
-            <meta charset='utf-8'>
-            <meta name='viewport' content='width=device-width, initial-scale=1'>
-            <title>{title_html}</title>
-            {css_links}
-            {script_tags}
-            </head>
-            <body>
-            {body}
-            </body>
-            </html>
-        """).strip("\n").format(
-            title_html=title_html,
-            css_links=css_links,
-            script_tags=script_tags,
-            body=body,
-        )
-        return html_str
+        if image_scale:
+            scripts.append("image-attrs.js")
 
+        script_lines = [
+            f"<script type='module' src='{self._asset_url(path)}'></script>" for path in scripts
+        ]
+        if self.assets is not None and scripts:
+            # `widgets/index.js` imports each widget by a relative URL; the
+            # import map pins those to hashed URLs, and the preloads fetch
+            # the used widgets' module graph in parallel instead of one
+            # import at a time.
+            import_map = json.dumps(self.assets.import_map(self.widgets_dir), separators=(",", ":"))
+            entries = scripts + [f"{widget}/index.js" for widget in sorted(used_widgets or ())]
+            preloads = [
+                f"<link rel='modulepreload' href='{self._asset_url(path)}'>"
+                for path in self.assets.module_graph(entries)
+                if path not in scripts
+            ]
+            script_lines = [f"<script type='importmap'>{import_map}</script>", *preloads, *script_lines]
+        return "\n".join(script_lines)
 
     # ------------------------------------------------------------------
     # private helpers
@@ -221,12 +434,33 @@ class SBSRenderer:
     def _render_image(self, tokens, idx, options, env):
         token = tokens[idx]
         self._apply_registered_attrs(token, env)
-        apply_image_display_attrs(token)
+        if apply_image_display_attrs(token, intrinsic_size=lambda src: self._intrinsic_size(src, env)):
+            env["_sbs_used_image_scale"] = True
 
         if self._default_image:
             return self._default_image(tokens, idx, options, env)
 
         return self._renderer.render_token(tokens, idx, options, env)
 
+    def _asset_url(self, path: str) -> str:
+        if self.assets is None:
+            return f"{self.widgets_dir}/{path}"
+        return self.assets.url(self.widgets_dir, path)
+
+    def _inputs(self, env: dict[str, Any]) -> set[Path]:
+        # Files a render read (collections, probed images). Output that
+        # depends on them is never cached, since they may change on their own.
+        return env.setdefault("_sbs_inputs", set())
+
+    def _intrinsic_size(self, src: str, env: dict[str, Any]) -> Optional[tuple[int, int]]:
+        if self.base_dir is None:
+            return None
+        path = local_image_path(src, self.base_dir, self.root_dir)
+        if path is None:
+            return None
+        # Recorded even when missing: the file may appear later.
+        self._inputs(env).add(path.resolve())
+        return image_size(path)
+
     def _note_widget_used(self, env: dict[str, Any], widget: str) -> None:
         env.setdefault("_sbs_used_widgets", set()).add(widget)
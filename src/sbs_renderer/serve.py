@@ -0,0 +1,391 @@
+"""Development server for SBS books with live reload.
+
+`python -m sbs_renderer serve <book-dir>` renders chapters in memory with
+warm `SBSRenderer` instances, polls the book's Markdown sources, `toc.yaml`,
+`assets/` and the images and collections each chapter read for changes,
+re-renders only the chapters that changed and
+pushes a notification to open pages over Server-Sent Events. Pages swap in
+the new body in place (keeping the scroll position) and fall back to a full
+reload when the head or the set of widget types changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import html
+import json
+import mimetypes
+import os
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import unquote, urlsplit
+
+from .book import ASSETS_DIR, TOC_FILE, Book, BookError, Chapter, load_book, referenced_assets
+from .renderer import SBSRenderer
+
+EVENTS_PATH = "/_sbs/events"
+WIDGETS_PREFIX = "/widgets"
+
+RELOAD_SCRIPT = """\
+<script>
+(() => {
+  const widgetTags = (doc) => new Set([...doc.querySelectorAll('sbs-chess, sbs-go, sbs-bridge')].map((el) => el.localName));
+  const refresh = async () => {
+    const response = await fetch(location.href, { cache: 'no-store' });
+    const next = new DOMParser().parseFromString(await response.text(), 'text/html');
+    const before = widgetTags(document);
+    const sameWidgets = [...widgetTags(next)].every((tag) => before.has(tag));
+    if (next.head.innerHTML !== document.head.innerHTML || !sameWidgets) {
+      location.reload();
+      return;
+    }
+    const scroll = window.scrollY;
+    document.body.replaceWith(document.adoptNode(next.body));
+    window.scrollTo(0, scroll);
+  };
+  const source = new EventSource('%(events)s');
+  source.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+    if (data.path === '*' || data.path === location.pathname) {
+      refresh().catch(() => location.reload());
+    }
+  };
+})();
+</script>
+"""
+
+
+class Broadcaster:
+    """Fan-out of change notifications to connected SSE clients."""
+
+    def __init__(self) -> None:
+        self._clients: set[queue.Queue[Optional[str]]] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue[Optional[str]]:
+        client: queue.Queue[Optional[str]] = queue.Queue()
+        with self._lock:
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client: queue.Queue[Optional[str]]) -> None:
+        with self._lock:
+            self._clients.discard(client)
+
+    def publish(self, message: dict[str, Any]) -> None:
+        payload = json.dumps(message)
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.put(payload)
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.put(None)
+
+
+class BookSite:
+    """In-memory rendering of a book, kept in sync with the files on disk."""
+
+    def __init__(self, root: Path, *, widgets_dir: Path, theme: str = "default"):
+        self.root = root
+        self.widgets_dir = widgets_dir
+        self.theme = theme
+        # One warm renderer per chapter directory, so relative image paths
+        # (and their intrinsic sizes) resolve like in the built book.
+        self._renderers: dict[Path, SBSRenderer] = {}
+        self.events = Broadcaster()
+        self._lock = threading.Lock()
+        self._pages: dict[str, str] = {}
+        # Files each rendered page read besides its source (images, collections).
+        self._deps: dict[str, frozenset[Path]] = {}
+        # Bumped whenever pages are replaced or dropped, so a render that
+        # started before a change is not stored over the newer state.
+        self._generation = 0
+        self._mtimes: dict[Path, int] = {}
+        self.book: Book = load_book(root)
+        self._by_output = {"/" + chapter.output: chapter for chapter in self.book.chapters}
+
+    # ------------------------------------------------------------------
+    # pages
+    # ------------------------------------------------------------------
+    def page(self, url_path: str) -> Optional[str]:
+        with self._lock:
+            cached = self._pages.get(url_path)
+            if cached is not None:
+                return cached
+            chapter = self._by_output.get(url_path)
+            generation = self._generation
+        if chapter is None:
+            return self._index() if url_path in ("/", "/index.html") else None
+        # Render outside the lock so one slow chapter does not stall the others.
+        page, deps = self._render(chapter)
+        with self._lock:
+            if self._generation == generation:
+                self._pages[url_path] = page
+                self._deps[url_path] = deps
+            return page
+
+    def _render(self, chapter: Chapter) -> tuple[str, frozenset[Path]]:
+        source = self.root / chapter.path
+        renderer = self._renderers.get(source.parent)
+        if renderer is None:
+            renderer = self._renderers.setdefault(
+                source.parent,
+                SBSRenderer(widgets_dir=WIDGETS_PREFIX, theme=self.theme, base_dir=source.parent, root_dir=self.root),
+            )
+        text = source.read_text(encoding="utf-8")
+        try:
+            document, deps = renderer.render_document_inputs(text, title=chapter.name)
+        except ValueError as exc:
+            # Show the error in place; the page reloads once the source is fixed.
+            print(f"[serve] {chapter.path}: {exc}")
+            document = _error_page(chapter.name, f"{chapter.path}: {exc}")
+            # Fixing a bad game may mean editing the collection, not the chapter.
+            deps = frozenset((self.root / path).resolve() for path in referenced_assets(self.root, chapter, text))
+        return _inject(document, RELOAD_SCRIPT % {"events": EVENTS_PATH}), deps
+
+    def _index(self) -> str:
+        items = []
+        for chapter in self.book.chapters:
+            label = " / ".join((*chapter.trail, chapter.name))
+            items.append(f"<li><a href='/{html.escape(chapter.output)}'>{html.escape(label)}</a></li>")
+        title = html.escape(self.book.name)
+        body = f"<h1>{title}</h1>\n<ol>\n" + "\n".join(items) + "\n</ol>\n"
+        return _inject(
+            f"<!DOCTYPE html>\n<html lang='en'>\n<head>\n<meta charset='utf-8'>\n<title>{title}</title>\n"
+            f"</head>\n<body>\n{body}</body>\n</html>",
+            RELOAD_SCRIPT % {"events": EVENTS_PATH},
+        )
+
+    # ------------------------------------------------------------------
+    # change detection
+    # ------------------------------------------------------------------
+    def _watched(self) -> list[Path]:
+        paths = [self.root / TOC_FILE]
+        paths.extend(self.root / chapter.path for chapter in self.book.chapters)
+        for dirpath, _dirnames, filenames in os.walk(self.root / ASSETS_DIR):
+            paths.extend(Path(dirpath) / name for name in filenames)
+        with self._lock:
+            deps = set().union(*self._deps.values())
+        paths.extend(sorted(deps))
+        return paths
+
+    def snapshot(self) -> dict[Path, int]:
+        mtimes: dict[Path, int] = {}
+        for path in self._watched():
+            try:
+                mtimes[path] = path.stat().st_mtime_ns
+            except OSError:
+                # Watched but missing, so that creating it counts as a change.
+                mtimes[path] = -1
+        return mtimes
+
+    def poll(self) -> list[str]:
+        """Apply changes since the last poll and return the URL paths affected."""
+
+        current = self.snapshot()
+        previous, self._mtimes = self._mtimes, current
+        if not previous:
+            return []
+        with self._lock:
+            chapters = list(self._by_output.items())
+            deps = dict(self._deps)
+        # Dependencies first watched since the last poll were just read by
+        # the render that found them; only later edits are changes.
+        fresh = set().union(*deps.values()) - previous.keys()
+        changed = {
+            path
+            for path in current.keys() | previous.keys()
+            if current.get(path) != previous.get(path) and path not in fresh
+        }
+        if not changed:
+            return []
+
+        if self.root / TOC_FILE in changed:
+            try:
+                book = load_book(self.root)
+            except BookError as exc:
+                print(f"[serve] {exc}")
+                return []
+            with self._lock:
+                self.book = book
+                self._by_output = {"/" + chapter.output: chapter for chapter in book.chapters}
+                self._pages.clear()
+                self._deps.clear()
+                self._generation += 1
+            self._mtimes = self.snapshot()
+            self.events.publish({"path": "*"})
+            return ["*"]
+
+        touched: list[str] = []
+        assets_dir = self.root / ASSETS_DIR
+        for url_path, chapter in chapters:
+            if self.root / chapter.path not in changed and not deps.get(url_path, frozenset()) & changed:
+                continue
+            # Render right away so the browser's follow-up fetch is a hit.
+            try:
+                page, page_deps = self._render(chapter)
+            except (OSError, UnicodeDecodeError) as exc:
+                print(f"[serve] {chapter.path}: {exc}")
+                continue
+            with self._lock:
+                self._pages[url_path] = page
+                self._deps[url_path] = page_deps
+                self._generation += 1
+            touched.append(url_path)
+        if any(path.is_relative_to(assets_dir) for path in changed):
+            # Image sizes may have changed; render pages again on demand.
+            with self._lock:
+                self._pages.clear()
+                self._deps.clear()
+                self._generation += 1
+            touched = ["*"]
+
+        for url_path in touched:
+            self.events.publish({"path": url_path})
+        return touched
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        self._mtimes = self.snapshot()
+        while not stop.wait(interval):
+            start = time.perf_counter()
+            for url_path in self.poll():
+                print(f"[serve] updated {url_path} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def _error_page(title: str, message: str) -> str:
+    return (
+        f"<!DOCTYPE html>\n<html lang='en'>\n<head>\n<meta charset='utf-8'>\n<title>{html.escape(title)}</title>\n"
+        f"</head>\n<body>\n<pre class='sbs-render-error'>{html.escape(message)}</pre>\n</body>\n</html>"
+    )
+
+
+def _inject(document: str, snippet: str) -> str:
+    index = document.rfind("</body>")
+    if index < 0:
+        return document + snippet
+    return document[:index] + snippet + document[index:]
+
+
+def make_handler(site: BookSite) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "sbs-serve"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+            return
+
+        def do_GET(self) -> None:  # noqa: N802 - stdlib naming
+            path = unquote(urlsplit(self.path).path)
+            if path == EVENTS_PATH:
+                self._stream_events()
+                return
+            if path.startswith(WIDGETS_PREFIX + "/"):
+                self._send_file(site.widgets_dir, path[len(WIDGETS_PREFIX) + 1 :])
+                return
+            if path.startswith(f"/{ASSETS_DIR}/"):
+                self._send_file(site.root / ASSETS_DIR, path[len(ASSETS_DIR) + 2 :])
+                return
+            try:
+                page = site.page(path)
+            except (OSError, UnicodeDecodeError) as exc:
+                self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(exc))
+                return
+            if page is None:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            self._send(page.encode("utf-8"), "text/html; charset=utf-8")
+
+        def _send(self, body: bytes, content_type: str) -> None:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_file(self, base: Path, relative: str) -> None:
+            base = base.resolve()
+            target = (base / relative).resolve()
+            if not target.is_relative_to(base) or not target.is_file():
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+            self._send(target.read_bytes(), content_type)
+
+        def _stream_events(self) -> None:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            client = site.events.subscribe()
+            try:
+                self.wfile.write(b": connected\n\n")
+                self.wfile.flush()
+                while True:
+                    try:
+                        message = client.get(timeout=15)
+                    except queue.Empty:
+                        self.wfile.write(b": ping\n\n")
+                    else:
+                        if message is None:
+                            return
+                        self.wfile.write(f"data: {message}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            finally:
+                site.events.unsubscribe(client)
+
+    return Handler
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m sbs_renderer serve",
+        description="Serve an SBS book with live reload while editing",
+    )
+    parser.add_argument("book", type=Path, help="Book directory containing toc.yaml")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--widgets-dir",
+        type=Path,
+        default=Path("./widgets"),
+        help="Directory containing SBS widget assets, served under /widgets",
+    )
+    parser.add_argument(
+        "--theme",
+        default="default",
+        help="Theme name located under widgets/themes",
+    )
+    parser.add_argument("--interval", type=float, default=0.05, help="Polling interval in seconds")
+    args = parser.parse_args(argv)
+
+    try:
+        site = BookSite(args.book, widgets_dir=args.widgets_dir, theme=args.theme)
+    except BookError as exc:
+        parser.error(str(exc))
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(site))
+    server.daemon_threads = True
+    stop = threading.Event()
+    watcher = threading.Thread(target=site.watch, args=(args.interval, stop), name="sbs-watch", daemon=True)
+    watcher.start()
+    print(f"Serving {site.book.name!r} on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        site.events.close()
+        server.server_close()
+    return 0
@@ -0,0 +1,260 @@
+"""SGF replay for go fences.
+
+Reads the main sequence of an SGF record and plays it on an array-backed
+board (a `bytearray` plus per-size neighbour tables) with the same rules as
+`widgets/go/go-game.js`: occupied points and suicides are skipped, and
+opponent strings without liberties are captured. `snapshot` produces what
+the widget would draw at `initial-move`, so the board can be painted from
+the page without replaying the game in the browser.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+from typing import Any, Optional, Union
+
+EMPTY, BLACK, WHITE = 0, 1, 2
+_STONES = ".BW"
+
+_TOKEN_RE = re.compile(
+    r"(?P<open>\()|(?P<close>\))|(?P<node>;)"
+    r"|(?P<ident>[A-Za-z]+)\s*(?P<values>(?:\[(?:\\.|[^\\\]])*\]\s*)+)",
+    re.DOTALL,
+)
+_VALUE_RE = re.compile(r"\[((?:\\.|[^\\\]])*)\]", re.DOTALL)
+_LEADING_INT_RE = re.compile(r"\s*([+-]?\d+)")
+
+Properties = dict[str, list[str]]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    size: int
+    move: int
+    total: int
+    board: str
+    markers: dict[str, dict[str, str]]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "move": self.move,
+            "total": self.total,
+            "board": self.board,
+            "markers": self.markers,
+        }
+
+
+def main_sequence(sgf: str) -> list[Properties]:
+    """Nodes of the first game tree up to its first variation.
+
+    This is the `nodes` list smartgame.js gives the widget: play stops at
+    the first branch point rather than following a variation.
+    """
+
+    nodes: list[Properties] = []
+    started = False
+    for match in _TOKEN_RE.finditer(sgf or ""):
+        kind = match.lastgroup
+        if kind == "open":
+            if started:
+                break
+            started = True
+        elif not started:
+            continue
+        elif kind == "close":
+            break
+        elif kind == "node":
+            nodes.append({})
+        elif nodes:
+            nodes[-1].setdefault(match.group("ident"), []).extend(_VALUE_RE.findall(match.group("values")))
+    return nodes
+
+
+@lru_cache(maxsize=None)
+def _neighbours(size: int) -> tuple[tuple[int, ...], ...]:
+    table = []
+    for point in range(size * size):
+        x, y = point % size, point // size
+        table.append(tuple(
+            (ny * size + nx)
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+            if 0 <= nx < size and 0 <= ny < size
+        ))
+    return tuple(table)
+
+
+class Board:
+    """Go board state as one byte per point (row-major, `EMPTY/BLACK/WHITE`)."""
+
+    __slots__ = ("size", "points", "captures", "_neighbours")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.points = bytearray(size * size)
+        self.captures = {BLACK: 0, WHITE: 0}
+        self._neighbours = _neighbours(size)
+
+    def point(self, coord: str) -> Optional[int]:
+        """Index of an SGF coordinate such as `pd`, or ``None`` off the board."""
+
+        if len(coord) != 2:
+            return None
+        x, y = ord(coord[0]) - 97, ord(coord[1]) - 97
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return None
+        return y * self.size + x
+
+    def play(self, point: int, color: int) -> bool:
+        points, neighbours = self.points, self._neighbours
+        if points[point] != EMPTY:
+            return False
+        points[point] = color
+        opponent = WHITE if color == BLACK else BLACK
+        captured: list[int] = []
+        for neighbour in neighbours[point]:
+            if points[neighbour] == opponent:
+                string = self._dead_string(neighbour)
+                if string:
+                    for stone in string:
+                        points[stone] = EMPTY
+                    captured.extend(string)
+        if not captured and self._dead_string(point):
+            points[point] = EMPTY  # suicide
+            return False
+        self.captures[color] += len(captured)
+        return True
+
+    def _dead_string(self, start: int) -> list[int]:
+        """The string at `start` if it has no liberties, else an empty list."""
+
+        points, neighbours = self.points, self._neighbours
+        color = points[start]
+        string = [start]
+        seen = {start}
+        for stone in string:  # grows while walked
+            for neighbour in neighbours[stone]:
+                value = points[neighbour]
+                if value == EMPTY:
+                    return []
+                if value == color and neighbour not in seen:
+                    seen.add(neighbour)
+                    string.append(neighbour)
+        return string
+
+    def encode(self) -> str:
+        return self.points.translate(_ENCODE).decode("ascii")
+
+
+_ENCODE = bytes.maketrans(bytes([EMPTY, BLACK, WHITE]), _STONES.encode("ascii"))
+
+
+def snapshot(
+    sgf: str,
+    *,
+    board_size: Optional[int] = None,
+    initial_move: Optional[int] = None,
+    show_move_numbers: Union[bool, int, str, None] = None,
+) -> Optional[Snapshot]:
+    """Board and markers the widget shows on load, or ``None`` without a game.
+
+    Mirrors `GoController.loadSGF`/`update`: root `AB`/`AW` setup stones,
+    moves up to `initial_move` (clamped to the game), move numbers for the
+    `showMoveNumbers` setting, the last-move mark and the current node's
+    `LB`/`TR`/`SQ`/`CR` markup.
+    """
+
+    nodes = main_sequence(sgf)
+    if not nodes:
+        return None
+    root = nodes[0]
+    size = _leading_int(root.get("SZ", [""])[0]) or board_size or 19
+    if not 1 < size <= 52:
+        return None
+    moves = [node for node in nodes[1:] if _move_coord(node)]
+
+    board = Board(size)
+    for key, color in (("AB", BLACK), ("AW", WHITE)):
+        for coord in root.get(key, ()):
+            point = board.point(coord)
+            if point is not None:
+                board.points[point] = color
+
+    current = -1
+    if initial_move is not None and initial_move >= 0:
+        current = min(initial_move, len(moves)) - 1
+    played: list[Optional[int]] = []
+    for node in moves[: current + 1]:
+        coord, color = _move_coord(node)
+        point = board.point(coord)
+        played.append(point)
+        if point is not None:
+            board.play(point, color)
+
+    markers: dict[str, dict[str, str]] = {}
+
+    def key(point: int) -> str:
+        return f"{point % size},{point // size}"
+
+    numbers = _number_range(show_move_numbers, current)
+    if numbers is not None:
+        for index in range(numbers[0], numbers[1] + 1):
+            point = played[index] if 0 <= index < len(played) else None
+            if point is not None and board.points[point] != EMPTY:
+                markers[key(point)] = {"type": "number", "value": str(index + 1)}
+    if current >= 0 and played[current] is not None:
+        markers.setdefault(key(played[current]), {"type": "last"})
+    _node_markers(moves[current] if current >= 0 else root, board, markers, key)
+
+    return Snapshot(size=size, move=current + 1, total=len(moves), board=board.encode(), markers=markers)
+
+
+def _move_coord(node: Properties) -> Optional[tuple[str, int]]:
+    # Passes (`B[]`) are not moves for the widget either.
+    if node.get("B", [""])[0]:
+        return node["B"][0], BLACK
+    if node.get("W", [""])[0]:
+        return node["W"][0], WHITE
+    return None
+
+
+def _leading_int(text: str) -> Optional[int]:
+    match = _LEADING_INT_RE.match(text)
+    return int(match.group(1)) if match else None
+
+
+def _number_range(setting: Union[bool, int, str, None], current: int) -> Optional[tuple[int, int]]:
+    """0-based move indices to number, following `parseMoveNumbers`."""
+
+    if setting is None or setting is False:
+        return None
+    text = "true" if setting is True else str(setting).strip()
+    if text in ("", "true"):
+        return 0, current
+    if text == "false":
+        return None
+    if "-" in text:
+        start_text, _, end_text = text.partition("-")
+        start = _leading_int(start_text)
+        if start is not None:
+            end = _leading_int(end_text)
+            return (start or 1) - 1, current if end is None else min(current, end - 1)
+    count = _leading_int(text)
+    if not count:
+        return None
+    return max(0, current - count + 1), current
+
+
+def _node_markers(node: Properties, board: Board, markers: dict[str, dict[str, str]], key: Any) -> None:
+    for label in node.get("LB", ()):
+        coord, _, rest = label.partition(":")
+        point = board.point(coord)
+        if point is not None:
+            markers[key(point)] = {"type": "letter", "value": rest.split(":")[0]}
+    for prop, kind in (("TR", "triangle"), ("SQ", "square"), ("CR", "circle")):
+        for coord in node.get(prop, ()):
+            point = board.point(coord)
+            if point is not None:
+                markers[key(point)] = {"type": kind}
@@ -2,9 +2,113 @@
 
 from __future__ import annotations
 
+import re
 from typing import Any, Dict, Optional
 
 import yaml
+from yaml.resolver import Resolver
+
+try:  # libyaml bindings are optional; fall back to the pure-Python loader.
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - depends on the PyYAML build
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
+
+_INVALID = object()
+
+# `key: value` lines of the flat configs widgets use. Anything else (nesting,
+# block scalars, flow collections, anchors, comments after values, ...) is
+# left to the full YAML loader.
+_FLAT_LINE_RE = re.compile(r"([A-Za-z_][\w-]*):(?: +(.*?))? *")
+_PLAIN_INDICATORS = frozenset(",[]{}#&*!|>'\"%@`")
+_SIMPLE_INT_RE = re.compile(r"[-+]?(?:0|[1-9][0-9]*)")
+_SIMPLE_FLOAT_RE = re.compile(r"[-+]?(?:[0-9]+\.[0-9]*|\.[0-9]+)(?:[eE][-+][0-9]+)?")
+_RESOLVER = Resolver()
+
+# Leading bytes of raw game records. A fence body that starts like this is a
+# payload, never a config mapping, so it skips YAML entirely.
+PGN_PAYLOAD_RE = re.compile(r'\s*(?:\[[A-Za-z0-9_]+[ \t]+"|[0-9]+\.)')
+SGF_PAYLOAD_RE = re.compile(r"\s*\(\s*;")
+PBN_PAYLOAD_RE = re.compile(r'\s*(?:\[[A-Za-z0-9_]+[ \t]+"|%(?!YAML|TAG))')
+_BOOL_TAG = "tag:yaml.org,2002:bool"
+_INT_TAG = "tag:yaml.org,2002:int"
+_FLOAT_TAG = "tag:yaml.org,2002:float"
+_NULL_TAG = "tag:yaml.org,2002:null"
+_STR_TAG = "tag:yaml.org,2002:str"
+
+
+def load_yaml(text: str) -> Any:
+    """`yaml.safe_load` using libyaml's `CSafeLoader` when it is available."""
+
+    return yaml.load(text, Loader=_SafeLoader)
+
+
+def parse_flat_config(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a flat `key: scalar` mapping without invoking a YAML loader.
+
+    Scalars are typed exactly like `yaml.safe_load` would type them. Returns
+    ``None`` whenever the text uses anything beyond that subset, so callers
+    can fall back to the full loader.
+    """
+
+    config: Dict[str, Any] = {}
+    for line in text.split("\n"):
+        line = line.rstrip("\r")
+        if not line.strip() or line.startswith("#"):
+            continue
+        match = None if "\t" in line else _FLAT_LINE_RE.fullmatch(line)
+        if match is None:
+            return None
+        key, raw = match.group(1), match.group(2)
+        if _RESOLVER.resolve(yaml.ScalarNode, key, (True, False)) != _STR_TAG:
+            return None
+        value = _flat_scalar(raw or "")
+        if value is _INVALID:
+            return None
+        config[key] = value
+    return config if config else None
+
+
+def _flat_scalar(raw: str) -> Any:
+    if not raw:
+        return None
+    first = raw[0]
+    if first == "'":
+        inner = raw[1:-1]
+        return inner if len(raw) >= 2 and raw[-1] == "'" and "'" not in inner else _INVALID
+    if first == '"':
+        inner = raw[1:-1]
+        return inner if len(raw) >= 2 and raw[-1] == '"' and '"' not in inner and "\\" not in inner else _INVALID
+    if first in "-?:" and raw[1:2] in ("", " "):
+        return _INVALID
+    if first in _PLAIN_INDICATORS or ": " in raw or " #" in raw or raw.endswith(":"):
+        return _INVALID
+
+    tag = _RESOLVER.resolve(yaml.ScalarNode, raw, (True, False))
+    if tag == _STR_TAG:
+        return raw
+    if tag == _NULL_TAG:
+        return None
+    if tag == _BOOL_TAG:
+        return raw.lower() in ("yes", "true", "on")
+    if tag == _INT_TAG and _SIMPLE_INT_RE.fullmatch(raw):
+        return int(raw)
+    if tag == _FLOAT_TAG and _SIMPLE_FLOAT_RE.fullmatch(raw):
+        return float(raw)
+    # Octal/hex/sexagesimal ints, .inf, timestamps, merge keys, ...
+    return _INVALID
+
+
+def _load_config(text: str) -> Any:
+    if not text:
+        return None
+    flat = parse_flat_config(text)
+    if flat is not None:
+        return flat
+    try:
+        return load_yaml(text)
+    except yaml.YAMLError:
+        return _INVALID
 
 
 def parse_fence_config(raw: str) -> Optional[Dict[str, Any]]:
@@ -18,17 +122,57 @@ def parse_fence_config(raw: str) -> Optional[Dict[str, Any]]:
     if not text:
         return {}
 
-    try:
-        data = yaml.safe_load(text)
-    except yaml.YAMLError:
-        return None
-
+    data = _load_config(text)
     if isinstance(data, dict):
         return data
     return None
 
 
+def split_fence(raw: str, payload_key: str, *, payload_re: Optional[re.Pattern[str]] = None) -> Dict[str, Any]:
+    """Parse a widget fence into its config mapping.
+
+    A `---` separates YAML config (above) from the raw game payload (below),
+    which is stored under `payload_key`. Without a usable split the whole
+    body is tried as config; anything else yields an empty config. Each
+    piece of text goes through the YAML loader at most once, and bodies
+    matching `payload_re` (a bare game record) not at all.
+    """
+
+    raw = raw or ""
+    if payload_re is not None and payload_re.match(raw):
+        return {}
+    index = raw.find("---")
+    if index >= 0:
+        head = raw[:index]
+        config = _load_config(head.strip())
+        if config is None:
+            config = {}
+        if isinstance(config, dict):
+            config[payload_key] = raw[index + 3 :].strip()
+            return config
+        # A `---` line is a YAML document marker, so (barring directives)
+        # the whole body is a multi-document stream safe_load rejects anyway.
+        tail = raw[index + 3 : index + 4]
+        at_line_start = index == 0 or raw[index - 1] == "\n"
+        if at_line_start and tail in ("", " ", "\t", "\r", "\n") and "\n%" not in "\n" + head:
+            return {}
+
+    parsed = parse_fence_config(raw)
+    return parsed if parsed is not None else {}
+
+
 def escape_script_payload(payload: str) -> str:
     """Prevent ``</script>`` sequences from terminating inline script tags."""
 
     return (payload or "").replace("</script>", "</scr' 'ipt>")
+
+
+def reserve_style(width: Optional[float], height: Optional[float]) -> str:
+    """Inline style reserving a widget's box until it hydrates (see `sbs-ext.css`)."""
+
+    parts = []
+    if width is not None:
+        parts.append(f"--sbs-reserve-width:{round(width)}px")
+    if height is not None:
+        parts.append(f"--sbs-reserve-height:{round(height)}px")
+    return ";".join(parts)
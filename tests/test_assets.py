@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import re
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.assets import build_manifest, load_manifest, write_manifest
+from sbs_renderer.renderer import SBSRenderer
+
+WIDGETS = ROOT / "widgets"
+CHESS = "```sbs-chess\nfen: startpos\n```\n"
+
+
+class TestAssetManifest(unittest.TestCase):
+    def test_module_graph_follows_static_imports_only(self) -> None:
+        manifest = build_manifest(WIDGETS)
+        graph = manifest.module_graph(["chess/index.js"])
+        self.assertEqual(graph[-1], "chess/index.js")
+        self.assertIn("chess/vendor/chess.mjs", graph)
+        self.assertIn("shared/lightdom.js", graph)
+        self.assertLess(graph.index("chess/game-logic.js"), graph.index("chess/chess-widget.js"))
+        self.assertNotIn("chess/eco-dictionary.js", graph)
+        self.assertEqual(manifest.files["chess/game-logic.js"].lazy, ("chess/eco-dictionary.js",))
+        self.assertFalse(any(path.startswith("go/") for path in graph))
+
+    def test_stylesheet_hash_covers_imports(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "sbs-ext.css").write_text('@import url("./sticky.css");\n', encoding="utf-8")
+            (root / "sticky.css").write_text(".a{}", encoding="utf-8")
+            before = load_manifest(write_manifest(root))
+            (root / "sticky.css").write_text(".b{}", encoding="utf-8")
+            after = load_manifest(write_manifest(root))
+        self.assertEqual(before.files["sbs-ext.css"].hash, after.files["sbs-ext.css"].hash)
+        self.assertNotEqual(before.url("/w", "sbs-ext.css"), after.url("/w", "sbs-ext.css"))
+        self.assertNotEqual(before.version, after.version)
+
+    def test_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "a.js").write_text("import './b.js';\n", encoding="utf-8")
+            (Path(tmp) / "b.js").write_text("export const b = 1;\n", encoding="utf-8")
+            path = write_manifest(tmp)
+            self.assertEqual(load_manifest(tmp), build_manifest(tmp))
+            self.assertNotIn("asset-manifest.json", load_manifest(path).files)
+
+
+class TestHashedDocuments(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.manifest = build_manifest(WIDGETS)
+
+    def setUp(self) -> None:
+        self.renderer = SBSRenderer(widgets_dir="/widgets", asset_manifest=self.manifest)
+
+    def test_document_links_hashed_assets_and_preloads_used_graph(self) -> None:
+        html = self.renderer.render_document(CHESS)
+        index = self.manifest.files["index.js"].hash
+        self.assertIn(f"<script type='module' src='/widgets/index.js?v={index}'></script>", html)
+        self.assertRegex(html, r"href='/widgets/sbs-ext\.css\?v=\w+'")
+        self.assertRegex(html, r"href='/widgets/themes/default\.css\?v=\w+'")
+
+        preloads = re.findall(r"<link rel='modulepreload' href='/widgets/([^'?]+)\?v=\w+'>", html)
+        graph = self.manifest.module_graph(["index.js", "chess/index.js"])
+        self.assertEqual(preloads, [path for path in graph if path != "index.js"])
+        self.assertIn("shared/hydration.js", preloads)
+
+        import_map = json.loads(re.search(r"<script type='importmap'>(.*?)</script>", html).group(1))
+        chess_hash = self.manifest.files["chess/index.js"].hash
+        self.assertEqual(import_map["imports"]["/widgets/chess/index.js"], f"/widgets/chess/index.js?v={chess_hash}")
+        self.assertLess(html.index("importmap"), html.index("modulepreload"))
+
+    def test_document_without_scripts_has_no_import_map(self) -> None:
+        html = self.renderer.render_document("# Plain\n")
+        self.assertNotIn("importmap", html)
+        self.assertNotIn("modulepreload", html)
+
+    def test_cache_key_depends_on_manifest(self) -> None:
+        plain = SBSRenderer(widgets_dir="/widgets")
+        self.assertNotEqual(plain.cache_key(CHESS, title="T"), self.renderer.cache_key(CHESS, title="T"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import struct
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.book import BookError, build_book, load_book, widgets_href
+
+MARKDOWN_DIR = Path(__file__).resolve().parent / "markdown"
+
+TOC = """\
+book_name: Test Book
+book_author: Tester
+chapters:
+  - name: Preface
+    path: preface.md
+  - name: Part One
+    chapters:
+      - name: Chess
+        path: part1/chess.md
+      - name: Deeper
+        chapters:
+          - name: Plain
+            path: part1/more/plain.md
+"""
+
+
+def png(width: int, height: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+
+
+def make_book(root: Path) -> None:
+    (root / "part1" / "more").mkdir(parents=True)
+    (root / "assets").mkdir()
+    (root / "toc.yaml").write_text(TOC, encoding="utf-8")
+    (root / "preface.md").write_text("# Preface\n\n![Cover](assets/cover.txt)\n", encoding="utf-8")
+    (root / "part1" / "chess.md").write_text(
+        (MARKDOWN_DIR / "chess-demo.md").read_text(encoding="utf-8"), encoding="utf-8"
+    )
+    (root / "part1" / "more" / "plain.md").write_text(
+        (MARKDOWN_DIR / "plain.md").read_text(encoding="utf-8"), encoding="utf-8"
+    )
+    (root / "assets" / "cover.txt").write_text("cover", encoding="utf-8")
+
+
+class TestBookBuild(unittest.TestCase):
+    def test_load_book_flattens_chapters_in_order(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            make_book(root)
+            book = load_book(root)
+            self.assertEqual(book.name, "Test Book")
+            self.assertEqual([c.path for c in book.chapters], ["preface.md", "part1/chess.md", "part1/more/plain.md"])
+            self.assertEqual(book.chapters[2].trail, ("Part One", "Deeper"))
+
+    def test_invalid_toc_raises(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "toc.yaml").write_text("book_name: X\nchapters:\n  - name: Empty\n", encoding="utf-8")
+            with self.assertRaises(BookError):
+                load_book(root)
+
+    def test_chapter_paths_stay_inside_the_book(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "book"
+            root.mkdir()
+            for path in ("../x.md", "/tmp/x.md", "part/../../x.md"):
+                (root / "toc.yaml").write_text(
+                    f"book_name: X\nchapters:\n  - name: Out\n    path: {path}\n", encoding="utf-8"
+                )
+                with self.assertRaises(BookError):
+                    build_book(root, Path(tmp) / "out")
+            self.assertFalse((Path(tmp) / "x.html").exists())
+
+    def test_outputs_behind_symlinks_are_refused(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "book"
+            out_dir = Path(tmp) / "out"
+            (root / "linked").mkdir(parents=True)
+            (root / "linked" / "x.md").write_text("# X\n", encoding="utf-8")
+            (root / "toc.yaml").write_text("book_name: X\nchapters:\n  - name: X\n    path: linked/x.md\n", encoding="utf-8")
+            (Path(tmp) / "elsewhere").mkdir()
+            out_dir.mkdir()
+            (out_dir / "linked").symlink_to(Path(tmp) / "elsewhere")
+            with self.assertRaises(BookError):
+                build_book(root, out_dir)
+            self.assertFalse((Path(tmp) / "elsewhere" / "x.html").exists())
+
+    def test_widgets_href_depends_on_depth(self) -> None:
+        self.assertEqual(widgets_href("widgets", 0), "widgets")
+        self.assertEqual(widgets_href("./widgets/", 2), "../../widgets")
+        self.assertEqual(widgets_href("/widgets", 3), "/widgets")
+
+    def test_build_book_writes_tree_assets_and_manifest(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "book"
+            out_dir = Path(tmp) / "out"
+            root.mkdir()
+            make_book(root)
+            build = build_book(root, out_dir, workers=2)
+            self.assertTrue(all(result.ok for result in build.results), [r.error for r in build.results])
+
+            chess = (out_dir / "part1" / "chess.html").read_text(encoding="utf-8")
+            self.assertIn("<title>Chess</title>", chess)
+            self.assertIn("src='../widgets/index.js'", chess)
+            plain = (out_dir / "part1" / "more" / "plain.html").read_text(encoding="utf-8")
+            self.assertIn("../../widgets/sbs-ext.css", plain)
+            self.assertTrue((out_dir / "assets" / "cover.txt").exists())
+
+            manifest = json.loads((out_dir / "manifest.json").read_text(encoding="utf-8"))
+            self.assertEqual(manifest["book_name"], "Test Book")
+            self.assertEqual([c["output"] for c in manifest["chapters"]][1], "part1/chess.html")
+            self.assertEqual(manifest["toc"][1]["chapters"][0]["name"], "Chess")
+
+    def test_rebuild_only_renders_changed_chapters(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "book"
+            out_dir = Path(tmp) / "out"
+            root.mkdir()
+            make_book(root)
+            build_book(root, out_dir, workers=1)
+
+            def rendered() -> list[str]:
+                build = build_book(root, out_dir, workers=2)
+                self.assertTrue(all(result.ok for result in build.results))
+                return [result.source.relative_to(root).as_posix() for result in build.results]
+
+            self.assertEqual(rendered(), [])
+
+            chess = root / "part1" / "chess.md"
+            chess.write_text(chess.read_text(encoding="utf-8") + "\nOne more line.\n", encoding="utf-8")
+            self.assertEqual(rendered(), ["part1/chess.md"])
+
+            # Referenced assets are inputs of the chapters that link them.
+            (root / "assets" / "cover.txt").write_text("new cover", encoding="utf-8")
+            self.assertEqual(rendered(), ["preface.md"])
+
+            # Title changes in toc.yaml re-render the renamed chapter only.
+            (root / "toc.yaml").write_text(TOC.replace("name: Plain", "name: Renamed"), encoding="utf-8")
+            self.assertEqual(rendered(), ["part1/more/plain.md"])
+            html = (out_dir / "part1" / "more" / "plain.html").read_text(encoding="utf-8")
+            self.assertIn("<title>Renamed</title>", html)
+
+            # Outputs of chapters dropped from the TOC are removed.
+            (root / "toc.yaml").write_text(TOC.split("  - name: Part One")[0], encoding="utf-8")
+            build = build_book(root, out_dir)
+            self.assertEqual(build.results, [])
+            self.assertFalse((out_dir / "part1" / "chess.html").exists())
+            self.assertEqual(sorted(build.removed), ["part1/chess.html", "part1/more/plain.html"])
+
+    def test_scaled_images_outside_assets_are_inputs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "book"
+            out_dir = Path(tmp) / "out"
+            root.mkdir()
+            make_book(root)
+            (root / "pics").mkdir()
+            image = root / "pics" / "p.png"
+            image.write_bytes(png(40, 20))
+            chess = root / "part1" / "chess.md"
+            chess.write_text("![P](../pics/p.png){ scale=0.5 }\n", encoding="utf-8")
+            build_book(root, out_dir, workers=1)
+            self.assertIn('width="20" height="10"', (out_dir / "part1" / "chess.html").read_text(encoding="utf-8"))
+
+            image.write_bytes(png(80, 40))
+            build = build_book(root, out_dir, workers=1)
+            self.assertEqual([result.source for result in build.results], [chess])
+            self.assertIn('width="40" height="20"', (out_dir / "part1" / "chess.html").read_text(encoding="utf-8"))
+
+    def test_stale_outputs_outside_out_dir_are_kept(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "book"
+            out_dir = Path(tmp) / "out"
+            root.mkdir()
+            make_book(root)
+            build_book(root, out_dir, workers=1)
+
+            victim = Path(tmp) / "victim.html"
+            victim.write_text("keep me", encoding="utf-8")
+            manifest_path = out_dir / "manifest.json"
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            manifest["chapters"].append({"source": "gone.md", "output": "../victim.html"})
+            manifest["chapters"].append({"source": "abs.md", "output": str(victim)})
+            manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+            build = build_book(root, out_dir)
+            self.assertTrue(victim.exists())
+            self.assertEqual(build.removed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
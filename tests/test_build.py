@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import dataclasses
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer import build
+from sbs_renderer.build import BuildJob, collect_jobs, load_manifest, run_jobs
+
+MARKDOWN_DIR = Path(__file__).resolve().parent / "markdown"
+
+
+class TestBatchBuild(unittest.TestCase):
+    def test_builds_globbed_sources_in_parallel(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            out_dir = Path(tmp)
+            jobs = collect_jobs([str(MARKDOWN_DIR / "*.md")], out_dir=out_dir)
+            self.assertGreaterEqual(len(jobs), 7)
+            results = run_jobs(jobs, widgets_dir="/widgets", workers=2)
+            self.assertTrue(all(result.ok for result in results))
+            self.assertEqual([r.source for r in results], [job.source for job in jobs])
+            html = (out_dir / "chess-demo.html").read_text(encoding="utf-8")
+            self.assertIn("<sbs-chess", html)
+            self.assertIn("/widgets/index.js", html)
+
+    def test_manifest_entries_override_title_and_theme(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = Path(tmp) / "docs.yaml"
+            manifest.write_text(
+                f"- source: {MARKDOWN_DIR / 'plain.md'}\n  output: plain.html\n"
+                "  title: Plain Title\n  theme: classic\n",
+                encoding="utf-8",
+            )
+            jobs = load_manifest(manifest, out_dir=Path(tmp) / "out")
+            (result,) = run_jobs(jobs, widgets_dir="/widgets", workers=1)
+            self.assertTrue(result.ok, result.error)
+            html = result.output.read_text(encoding="utf-8")
+            self.assertIn("<title>Plain Title</title>", html)
+            self.assertIn("/widgets/themes/classic.css", html)
+
+    def test_manifest_outputs_stay_in_out_dir(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = Path(tmp) / "docs.yaml"
+            for output in ("../escape.html", "/tmp/escape.html"):
+                with self.subTest(output=output):
+                    manifest.write_text(f"- source: plain.md\n  output: {output}\n", encoding="utf-8")
+                    with self.assertRaisesRegex(ValueError, "falls outside"):
+                        load_manifest(manifest, out_dir=Path(tmp) / "out")
+
+    def test_workers_warm_the_renderers_jobs_use(self) -> None:
+        jobs = [
+            BuildJob(source=MARKDOWN_DIR / "plain.md", output=Path("plain.html")),
+            BuildJob(source=MARKDOWN_DIR / "chess-demo.md", output=Path("chess.html")),
+            BuildJob(source=ROOT / "README.md", output=Path("readme.html"), root_dir=ROOT),
+        ]
+        options = tuple(dict.fromkeys(build._renderer_options(job, "/widgets", "default") for job in jobs))
+        self.assertEqual(len(options), 2)
+        saved = dict(build._RENDERERS)
+        build._RENDERERS.clear()
+        try:
+            build._warm_worker(options, False, None)
+            warm = dict(build._RENDERERS)
+            with tempfile.TemporaryDirectory() as tmp:
+                for job in jobs:
+                    job = dataclasses.replace(job, output=Path(tmp) / job.output)
+                    self.assertTrue(build.render_job(job, "/widgets", "default").ok)
+            self.assertEqual(build._RENDERERS, warm)
+        finally:
+            build._RENDERERS.clear()
+            build._RENDERERS.update(saved)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.cache import RenderCache, render_key
+from sbs_renderer.renderer import SBSRenderer
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_key_depends_on_text_and_options(self) -> None:
+        base = render_key("document", "# A", theme="default", title="T")
+        self.assertEqual(base, render_key("document", "# A", theme="default", title="T"))
+        self.assertNotEqual(base, render_key("document", "# B", theme="default", title="T"))
+        self.assertNotEqual(base, render_key("document", "# A", theme="classic", title="T"))
+        self.assertNotEqual(base, render_key("document", "# A", theme="default", title="U"))
+        self.assertNotEqual(base, render_key("render", "# A", theme="default"))
+
+    def test_lru_respects_byte_limit(self) -> None:
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        self.assertEqual(cache.get("a"), "12345")
+        cache.put("c", "12345")  # evicts "b", the least recently used
+        self.assertIsNone(cache.get("b"))
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 1, 1))
+        self.assertEqual(stats.bytes, 10)
+
+    def test_disk_tier_survives_new_instance(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            RenderCache(disk_dir=tmp).put("abcdef", "<p>x</p>")
+            fresh = RenderCache(disk_dir=tmp)
+            self.assertEqual(fresh.get("abcdef"), "<p>x</p>")
+            self.assertEqual(fresh.stats().disk_hits, 1)
+
+    def test_renderer_uses_cache(self) -> None:
+        cache = RenderCache()
+        renderer = SBSRenderer(widgets_dir="/widgets", cache=cache)
+        first = renderer.render_document("# Hi", title="T")
+        second = renderer.render_document("# Hi", title="T")
+        self.assertEqual(first, second)
+        self.assertEqual(cache.stats().hits, 1)
+        env: dict = {}
+        renderer.render("# Hi", env)
+        self.assertEqual(cache.stats().misses, 1)
+
+    def test_only_documents_reading_files_bypass_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "games.pgn").write_text("[Event \"A\"]\n\n1. e4 *\n", encoding="utf-8")
+            (Path(tmp) / "pic.svg").write_text("<svg width='10' height='10'></svg>", encoding="utf-8")
+            cache = RenderCache()
+            renderer = SBSRenderer(widgets_dir="/widgets", cache=cache, base_dir=tmp)
+            prose = "Sources and resources at any scale.\n\n![x](https://example.com/x.png){ scale=0.5 }\n"
+            for text in (
+                prose,
+                "```sbs-chess\nsource: games.pgn\n```\n",
+                "```sbs-chess\n\"source\": games.pgn\n```\n",
+                "![x](pic.svg){ scale=2 }\n",
+                "![x](missing.svg){ scale=2 }\n",
+            ):
+                with self.subTest(text=text):
+                    renderer.render_document(text, title="T")
+                    renderer.render_document(text, title="T")
+            self.assertEqual(cache.stats().hits, 1)
+            html, inputs = renderer.render_document_inputs("```sbs-chess\nsource: games.pgn\n```\n")
+            self.assertIn("1. e4", html)
+            self.assertEqual(inputs, {(Path(tmp) / "games.pgn").resolve()})
+
+
+if __name__ == "__main__":
+    unittest.main()
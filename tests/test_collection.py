@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer import collection
+from sbs_renderer.book import Chapter, referenced_assets
+from sbs_renderer.collection import CollectionError, read_game, scan
+from sbs_renderer.renderer import SBSRenderer
+
+PGN = (
+    '[Event "One"]\n[White "A"]\n\n1. e4 e5 {a [%clk 0:01:00] comment} 2. Nf3 1-0\n\n'
+    '[Event "Two"]\n[White "B"]\n\n1. d4 d5 1/2-1/2\n\n'
+    '[Event "Three"]\n\n1. c4 *\n'
+)
+SGF = "(;GM[1]SZ[9]C[tricky ( \\] text];B[ee](;W[ef])(;W[dd]))\n(;GM[1]SZ[13];B[gg])"
+PBN = (
+    "% PBN 2.1\n% EXPORT\n"
+    '[Board "7"]\n[Dealer "S"]\n[Deal "N:AKQ.J.T98.7654 - - -"]\n[Auction "S"]\n1NT Pass\n[Play "W"]\nHA\n\n'
+    '[Board "12"]\n[Dealer "W"]\n[Deal "W:AKQ.J.T98.7654 - - -"]\n'
+)
+
+
+class CollectionTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        patcher = mock.patch.dict(os.environ, {collection.INDEX_DIR_ENV: str(self.dir / "index")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(collection.clear_cache)
+        collection.clear_cache()
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        return path
+
+
+class TestCollectionIndex(CollectionTestCase):
+    def test_pgn_games_by_position(self) -> None:
+        path = self.write("games.pgn", PGN)
+        self.assertEqual(len(scan(path, "pgn")), 3)
+        self.assertTrue(read_game(path, "pgn", game=2).startswith('[Event "Two"]'))
+        self.assertTrue(read_game(path, "pgn", game=3).endswith("1. c4 *"))
+        with self.assertRaises(CollectionError):
+            read_game(path, "pgn", game=4)
+
+    def test_sgf_game_trees(self) -> None:
+        path = self.write("games.sgf", SGF)
+        self.assertEqual(len(scan(path, "sgf")), 2)
+        self.assertEqual(read_game(path, "sgf", game=2), "(;GM[1]SZ[13];B[gg])")
+
+    def test_pbn_boards_and_sections(self) -> None:
+        path = self.write("deals.pbn", PBN)
+        deal = read_game(path, "pbn", board=7)
+        self.assertIn("[Play", deal)
+        self.assertNotIn('"12"', deal)
+        self.assertTrue(read_game(path, "pbn", board=12).startswith('[Board "12"]'))
+        with self.assertRaises(CollectionError):
+            read_game(path, "pbn", board=3)
+
+    def test_index_is_persisted_and_invalidated(self) -> None:
+        path = self.write("games.pgn", PGN)
+        read_game(path, "pgn", game=1)
+        self.assertEqual(len(list((self.dir / "index").glob("*.idx"))), 1)
+
+        collection.clear_cache()
+        with mock.patch.object(collection, "scan", side_effect=AssertionError("rescanned")):
+            self.assertIn("Two", read_game(path, "pgn", game=2))
+
+        path.write_text(PGN.replace('"Two"', '"Deux"'), encoding="utf-8")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+        self.assertIn("Deux", read_game(path, "pgn", game=2))
+
+
+class TestCollectionFences(CollectionTestCase):
+    def test_fences_read_entries_relative_to_base_dir(self) -> None:
+        self.write("games/wch.pgn", PGN)
+        self.write("games/problems.sgf", SGF)
+        self.write("games/deals.pbn", PBN)
+        renderer = SBSRenderer(widgets_dir="/widgets", base_dir=self.dir)
+        html = renderer.render(
+            "```sbs-chess\nsource: games/wch.pgn\ngame: 2\n```\n\n"
+            "```sbs-go\nsource: games/problems.sgf\ngame: 2\n```\n\n"
+            "```sbs-bridge\nsource: games/deals.pbn\nboard: 12\n```\n"
+        )
+        self.assertIn("1. d4 d5", html)
+        self.assertIn("(;GM[1]SZ[13];B[gg])", html)
+        self.assertIn('[Deal "W:AKQ.J.T98.7654 - - -"]', html)
+        self.assertNotIn("data-source", html)
+        self.assertNotIn("data-game", html)
+
+    def test_edited_collection_is_not_served_from_memo(self) -> None:
+        path = self.write("games.pgn", PGN)
+        renderer = SBSRenderer(widgets_dir="/widgets", base_dir=self.dir)
+        fence = "```sbs-chess\nsource: games.pgn\ngame: 3\n```\n"
+        self.assertIn("1. c4", renderer.render(fence))
+        path.write_text(PGN.replace("1. c4", "1. g3"), encoding="utf-8")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+        self.assertIn("1. g3", renderer.render(fence))
+
+    def test_missing_entry_raises(self) -> None:
+        self.write("games.pgn", PGN)
+        renderer = SBSRenderer(widgets_dir="/widgets", base_dir=self.dir)
+        with self.assertRaises(CollectionError):
+            renderer.render("```sbs-chess\nsource: games.pgn\ngame: 9\n```\n")
+        with self.assertRaises(CollectionError):
+            renderer.render("```sbs-chess\nsource: missing.pgn\n```\n")
+
+    def test_sources_stay_inside_the_document_directory(self) -> None:
+        self.write("book/games.pgn", PGN)
+        self.write("book/part/one.md", "")
+        outside = self.write("secret.pgn", PGN)
+        book = self.dir / "book"
+        fence = "```sbs-chess\nsource: {}\n```\n"
+        with self.assertRaisesRegex(CollectionError, r"^\.\./secret\.pgn: outside"):
+            SBSRenderer(base_dir=book).render(fence.format("../secret.pgn"))
+        with self.assertRaisesRegex(CollectionError, "outside"):
+            SBSRenderer(base_dir=book).render(fence.format(outside))
+        with self.assertRaisesRegex(CollectionError, "need a document directory"):
+            SBSRenderer().render(fence.format(book / "games.pgn"))
+        with self.assertRaisesRegex(CollectionError, r"^missing\.pgn: "):
+            SBSRenderer(base_dir=book).render(fence.format("missing.pgn"))
+
+        chapter = SBSRenderer(base_dir=book / "part", root_dir=book)
+        self.assertIn("1. e4", chapter.render(fence.format("../games.pgn")))
+
+    def test_book_tracks_referenced_collections(self) -> None:
+        self.write("assets/games.pgn", PGN)
+        text = "```sbs-chess\nsource: ../assets/games.pgn\ngame: 1\n```\n"
+        chapter = Chapter(name="One", path="part/one.md")
+        self.assertEqual(referenced_assets(self.dir, chapter, text), ["assets/games.pgn"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+import re
+import sys
+import unittest
+import xml.etree.ElementTree as ET
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.diagrams import parse_fen_board
+from sbs_renderer.pbn import parse_pbn
+from sbs_renderer.renderer import SBSRenderer
+
+CHESS = "```sbs-chess\nfen: 8/8/8/8/8/8/8/K6k w - - 0 1\ntitle: Bare kings\n```\n"
+GO = "```sbs-go\nmove: 2\n---\n(;SZ[9]AB[cc];B[ee];W[ef]TR[ee])\n```\n"
+BRIDGE = (
+    "```sbs-bridge\nlang: en\n---\n"
+    '[Dealer "N"]\n[Vulnerable "NS"]\n'
+    '[Deal "N:AKQ.J.T98.7654 J9.AK.KQ.AKQJ98 T.QT98.AJ7.T32 8765432.765432.65."]\n'
+    '[Auction "N"]\n1S Pass 4S Pass Pass Pass\n```\n'
+)
+
+
+def svgs(html: str) -> list[ET.Element]:
+    return [ET.fromstring(match) for match in re.findall(r"<svg.*?</svg>", html, re.S)]
+
+
+class TestStaticDiagrams(unittest.TestCase):
+    def setUp(self) -> None:
+        self.renderer = SBSRenderer(widgets_dir="/widgets", static_diagrams=True)
+
+    def test_static_boards_render_as_svg_without_scripts(self) -> None:
+        html = self.renderer.render_document(CHESS + GO + BRIDGE)
+        self.assertNotIn("<sbs-", html)
+        self.assertNotIn("/widgets/index.js", html)
+        self.assertEqual(
+            [svg.get("class") for svg in svgs(html)],
+            ["sbs-chess-board", "sbs-go-board theme-book", "sbs-bridge-deal"],
+        )
+        self.assertIn("<figcaption>Bare kings</figcaption>", html)
+
+    def test_go_svg_matches_snapshot(self) -> None:
+        go = svgs(self.renderer.render(GO))[0]
+        stones = [node.get("class") for node in go.iter() if (node.get("class") or "").startswith("stone ")]
+        self.assertEqual(sorted(stones), ["stone black", "stone black", "stone white"])
+
+    def test_bridge_svg_lists_hands_and_auction(self) -> None:
+        texts = [node.text for node in svgs(self.renderer.render(BRIDGE))[0].iter() if node.text]
+        self.assertIn("North", texts)
+        self.assertIn("8765432", texts)
+        self.assertIn("4", texts)
+
+    def test_interactive_boards_keep_widget(self) -> None:
+        text = "```sbs-chess\npgn: 1. e4 e5\n```\n" + GO.replace("move: 2", "move: 2\ninteractive: true")
+        html = self.renderer.render_document(text)
+        self.assertIn("<sbs-chess", html)
+        self.assertIn("<sbs-go", html)
+        self.assertIn("/widgets/index.js", html)
+
+    def test_default_renderer_keeps_widgets(self) -> None:
+        html = SBSRenderer(widgets_dir="/widgets").render_document(CHESS)
+        self.assertIn("<sbs-chess", html)
+        self.assertNotIn("<svg", html)
+
+    def test_cache_key_depends_on_mode(self) -> None:
+        plain = SBSRenderer(widgets_dir="/widgets")
+        self.assertNotEqual(plain.cache_key("document"), self.renderer.cache_key("document"))
+
+
+class TestDiagramParsers(unittest.TestCase):
+    def test_parse_fen_board(self) -> None:
+        board = parse_fen_board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1")
+        self.assertEqual(board[0][0], "r")
+        self.assertEqual(board[4][4], "P")
+        self.assertEqual(board[6][4], "")
+        self.assertIsNone(parse_fen_board("8/8/8 w - - 0 1"))
+
+    def test_parse_pbn(self) -> None:
+        deal = parse_pbn(BRIDGE.split("---\n")[1].removesuffix("```\n"))
+        self.assertEqual(deal.tags["Dealer"], "N")
+        self.assertEqual(deal.hands["W"], {"S": "8765432", "H": "765432", "D": "65", "C": ""})
+        self.assertEqual(deal.auction, ["1S", "Pass", "4S", "Pass", "Pass", "Pass"])
+
+
+if __name__ == "__main__":
+    unittest.main()
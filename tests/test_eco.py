@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.chess import ChessBlock
+from sbs_renderer.eco import (
+    START_FEN,
+    EcoIndex,
+    build_index,
+    classify,
+    is_standard_start,
+    load_index,
+    san_moves,
+    write_index,
+)
+
+
+class TestEco(unittest.TestCase):
+    def test_san_moves_skip_pgn_markup(self) -> None:
+        pgn = (
+            '[Event "Test"]\n[Site "?"]\n\n'
+            "1. e4 {best by test} e6 (1... c5 2. Nf3) 2.d4 $1 d5!? 3. Nc3 ; comment\n"
+            "3... Bb4+ 4. 0-0 1-0 5. a3"
+        )
+        self.assertEqual(san_moves(pgn), ["e4", "e6", "d4", "d5", "Nc3", "Bb4", "O-O"])
+
+    def test_standard_start(self) -> None:
+        for fen in (None, "", "startpos", f"  {START_FEN}  "):
+            self.assertTrue(is_standard_start(fen))
+        self.assertFalse(is_standard_start("8/8/8/8/8/8/8/K6k w - - 0 1"))
+
+    def test_build_index_interns_openings(self) -> None:
+        lookup = {
+            "e4": {"eco": "B00", "labels": {"en": "King's Pawn", "zh": "王兵开局"}, "ply": 1},
+            "e4 e5": {"eco": "C20", "labels": {"en": "Open Game", "zh": "开放性布局"}, "ply": 2},
+            "e4 e5 Nf3": {"eco": "C20", "labels": {"en": "Open Game", "zh": "开放性布局"}, "ply": 3},
+            "e4 e5 Nf3 Nc6 Bb5+": {"eco": "C60", "labels": {"en": "Ruy Lopez", "zh": "西班牙开局"}, "ply": 5},
+        }
+        index = EcoIndex(build_index({"lookup": lookup}))
+        self.assertEqual(index.opening_count, 3)
+        self.assertEqual(index.node_count, 6)
+        node = 0
+        for san in ("e4", "e5", "Nf3", "Nc6", "Bb5+"):
+            child = index.child(node, san)
+            assert child is not None
+            node = child
+        self.assertEqual(index.opening(index.opening_id(node)), ("C60", "Ruy Lopez", "西班牙开局"))
+        self.assertEqual(index.opening_id(0), -1)
+        self.assertIsNone(index.child(node, "a6"))
+        self.assertIsNone(index.child(0, "Qa1xb2c3"))
+
+    def test_index_matches_dictionary(self) -> None:
+        source = ROOT / "prototype" / "chess" / "eco-dictionary.json"
+        lookup = json.loads(source.read_text(encoding="utf-8"))["lookup"]
+        index = load_index()
+        assert index is not None
+        for key, entry in lookup.items():
+            node = 0
+            for san in key.split():
+                child = index.child(node, san)
+                assert child is not None, key
+                node = child
+            eco, en, zh = index.opening(index.opening_id(node))
+            self.assertEqual((eco, {"en": en, "zh": zh}), (entry["eco"], entry["labels"]), key)
+
+    def test_write_index_replaces_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "eco-dictionary.json"
+            source.write_text(json.dumps({"lookup": {"d4": {"eco": "A40", "labels": {"en": "Queen's Pawn"}}}}))
+            target = Path(tmp) / "eco-index.bin"
+            write_index(source, target)
+            index = EcoIndex.open(target)
+            self.assertEqual(index.opening(0), ("A40", "Queen's Pawn", ""))
+            self.assertEqual(sorted(path.name for path in Path(tmp).iterdir()), ["eco-dictionary.json", "eco-index.bin"])
+            self.assertEqual(target.stat().st_mode & 0o777, 0o644)
+
+    def test_classify_longest_prefix(self) -> None:
+        openings = classify(san_moves("1. e4 e6 2. d4 d5 3. Nc3 Bb4 4. Qg4"))
+        assert openings is not None
+        self.assertEqual(openings[-1].eco, "C13")
+        self.assertEqual(openings[-1].ply, 5)
+        self.assertEqual([entry.ply for entry in openings], sorted({entry.ply for entry in openings}))
+        # Unknown moves end the walk; later known moves are not matched.
+        self.assertEqual(classify(["e4", "Zz9", "d4"]), classify(["e4"]))
+        self.assertEqual(classify(["Zz9"]), [])
+
+    def test_chess_block_emits_opening_attrs(self) -> None:
+        html = ChessBlock.from_fence("title: French\n---\n1. e4 e6 2. d4 d5 3. Nc3 Bb4").to_html()
+        self.assertIn("eco='C13'", html)
+        self.assertIn("opening-en='French Defense", html)
+        self.assertIn("opening-zh='", html)
+        self.assertIn("openings='[[1,", html)
+
+    def test_chess_block_skips_custom_positions(self) -> None:
+        html = ChessBlock.from_fence("fen: 8/8/8/8/8/8/8/K6k w - - 0 1\npgn: 1. Ka2 Kg2").to_html()
+        self.assertNotIn("eco=", html)
+        self.assertNotIn("openings=", html)
+
+    def test_unknown_line_emits_empty_trail(self) -> None:
+        html = ChessBlock.from_fence("pgn: 1. Zz9").to_html()
+        self.assertIn("openings='[]'", html)
+        self.assertNotIn("eco=", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
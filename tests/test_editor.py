@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from pathlib import Path
+import asyncio
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_editor.executor import RenderExecutor, RenderSaturated, RenderTimeout
+from sbs_editor.pool import RendererPool, render_document_job, render_document_stream_job
+
+
+class TestRendererPool(unittest.TestCase):
+    def test_reuses_renderer_per_theme(self) -> None:
+        pool = RendererPool()
+        first = pool.get(widgets_dir="/widgets", theme="default")
+        self.assertIs(first, pool.get(widgets_dir="/widgets/", theme="default"))
+        self.assertIsNot(first, pool.get(widgets_dir="/widgets", theme="classic"))
+        self.assertEqual(len(pool), 2)
+
+    def test_pool_is_bounded(self) -> None:
+        pool = RendererPool(max_size=2)
+        for theme in ("a", "b", "c"):
+            pool.get(theme=theme)
+        self.assertEqual(len(pool), 2)
+
+
+class TestRenderExecutor(unittest.TestCase):
+    def test_runs_render_job_off_loop(self) -> None:
+        executor = RenderExecutor(workers=1)
+        try:
+            html = asyncio.run(executor.run(render_document_job, "# Hi", "default", "T", "/widgets"))
+        finally:
+            executor.shutdown()
+        self.assertIn("<h1>Hi</h1>", html)
+        self.assertEqual(executor.inflight, 0)
+
+    def test_rejects_when_saturated_and_times_out(self) -> None:
+        gate = threading.Event()
+        executor = RenderExecutor(workers=1, queue_depth=0, timeout=0.05, retry_after=3)
+
+        async def scenario() -> None:
+            with self.assertRaises(RenderTimeout):
+                await executor.run(gate.wait)
+            # The timed-out job is still running and keeps its slot.
+            with self.assertRaises(RenderSaturated) as ctx:
+                await executor.run(gate.wait)
+            self.assertEqual(ctx.exception.retry_after, 3)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            gate.set()
+            executor.shutdown()
+
+
+class TestRenderStream(unittest.TestCase):
+    def test_streams_head_then_batches_and_frees_slot(self) -> None:
+        text = "# Hi\n\n" + "".join(f"Paragraph {n}.\n\n" for n in range(3000))
+        executor = RenderExecutor(workers=1)
+
+        async def scenario() -> list[str]:
+            return [chunk async for chunk in executor.stream(render_document_stream_job, text, "default", "T", "/widgets")]
+
+        try:
+            chunks = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        self.assertTrue(chunks[0].endswith("<body>\n"))
+        self.assertGreater(len(chunks), 2)
+        self.assertLess(len(chunks), 3000)
+        self.assertIn("<p>Paragraph 2999.</p>", "".join(chunks))
+        self.assertEqual(executor.inflight, 0)
+
+    def test_stream_rejects_when_saturated(self) -> None:
+        executor = RenderExecutor(workers=1, queue_depth=0)
+        gate = threading.Event()
+
+        def blocked():
+            gate.wait()
+            yield "late"
+
+        async def scenario() -> None:
+            first = executor.stream(blocked)
+            pending = asyncio.ensure_future(first.__anext__())
+            await asyncio.sleep(0.05)
+            with self.assertRaises(RenderSaturated):
+                await executor.stream(blocked).__anext__()
+            gate.set()
+            self.assertEqual(await pending, "late")
+            await first.aclose()
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            gate.set()
+            executor.shutdown()
+        self.assertEqual(executor.inflight, 0)
+
+
+class TestPreviewSession(unittest.TestCase):
+    def test_superseded_revisions_are_dropped(self) -> None:
+        from sbs_editor.sessions import PreviewSession
+
+        async def scenario() -> tuple[dict, int]:
+            executor = RenderExecutor(workers=1)
+            session = PreviewSession(None, executor=executor, limiter=asyncio.Semaphore(1))  # type: ignore[arg-type]
+            for rev in range(4):
+                session._submit({"rev": rev, "text": f"# Rev {rev}"})
+            try:
+                reply = await session._render(session._pending or {})
+            finally:
+                executor.shutdown()
+            assert reply is not None
+            return reply, session.dropped
+
+        reply, dropped = asyncio.run(scenario())
+        self.assertEqual(dropped, 3)
+        self.assertEqual(reply["rev"], 3)
+        self.assertTrue(reply["full"])
+        self.assertIn("Rev 3", reply["html"])
+
+    def test_backoff_releases_the_limiter(self) -> None:
+        from sbs_editor.sessions import PreviewSession
+
+        gate = threading.Event()
+        executor = RenderExecutor(workers=1, queue_depth=0, retry_after=30)
+
+        async def scenario() -> None:
+            busy = asyncio.ensure_future(executor.run(gate.wait))
+            await asyncio.sleep(0.05)
+            limiter = asyncio.Semaphore(1)
+            session = PreviewSession(None, executor=executor, limiter=limiter)  # type: ignore[arg-type]
+            loop = asyncio.ensure_future(session._render_loop())
+            session._submit({"rev": 1, "text": "# Later"})
+            await asyncio.sleep(0.05)
+            # Saturated: the revision waits for a retry, but the slot is free meanwhile.
+            self.assertEqual(session._pending, {"rev": 1, "text": "# Later"})
+            self.assertFalse(limiter.locked())
+            loop.cancel()
+            gate.set()
+            await busy
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            gate.set()
+            executor.shutdown()
+
+
+BAD_GAME = "```sbs-chess\ntimeline: true\npgn: 1. e4 e5 2. Ke3\n```\n"
+BAD_SOURCE = "```sbs-chess\nsource: missing.pgn\n```\n"
+
+
+class TestRenderErrors(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        from starlette.testclient import TestClient
+
+        from sbs_editor.main import app
+
+        cls.client = TestClient(app)
+
+    def test_api_rejects_unreplayable_game(self) -> None:
+        response = self.client.post("/api/render", json={"text": BAD_GAME})
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("illegal move 'Ke3'", response.json()["detail"])
+        self.assertEqual(self.client.post("/api/render/patch", json={"text": BAD_GAME}).status_code, 422)
+
+    def test_api_rejects_unreadable_collection(self) -> None:
+        response = self.client.post("/api/render", json={"text": BAD_SOURCE})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["detail"], "missing.pgn: collection sources need a document directory")
+
+    def test_api_refuses_files_named_by_source(self) -> None:
+        for source in (__file__, "../../../../etc/hostname"):
+            with self.subTest(source=source):
+                response = self.client.post("/api/render", json={"text": f"```sbs-go\nsource: {source}\n```\n"})
+                self.assertEqual(response.status_code, 422)
+                self.assertNotIn("text/sgf", response.text)
+
+    def test_documents_reading_files_are_not_cached(self) -> None:
+        from sbs_editor.pool import shared_pool
+        from sbs_renderer.renderer import SBSRenderer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            image = Path(tmp) / "pic.svg"
+            image.write_text("<svg width='10' height='10'></svg>", encoding="utf-8")
+            renderer = SBSRenderer(widgets_dir="/widgets", base_dir=tmp)
+            request = {"text": "![x](pic.svg){ scale=2 }\n", "title": "Files"}
+            with mock.patch.object(shared_pool, "get", return_value=renderer):
+                first = self.client.post("/api/render", json=request)
+                self.assertIn('width="20"', first.json()["html"])
+                self.assertNotIn("etag", first.headers)
+                self.assertEqual(first.headers["cache-control"], "no-store")
+                image.write_text("<svg width='300' height='10'></svg>", encoding="utf-8")
+                self.assertIn('width="600"', self.client.post("/api/render", json=request).json()["html"])
+
+    def test_stream_reports_error_in_page(self) -> None:
+        response = self.client.post("/api/render/stream", json={"text": "# Hi\n\n" + BAD_GAME})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("<pre class='sbs-render-error'>move 2. Ke3: illegal move", response.text)
+        self.assertTrue(response.text.endswith("</html>"))
+
+    def test_session_keeps_answering_after_bad_revision(self) -> None:
+        with self.client.websocket_connect("/ws/render") as websocket:
+            websocket.send_json({"rev": 1, "text": BAD_GAME})
+            error = websocket.receive_json()
+            self.assertEqual((error["type"], error["rev"], error["status"]), ("error", 1, 422))
+            websocket.send_json({"rev": 2, "text": "# Fixed\n"})
+            reply = websocket.receive_json()
+            self.assertEqual((reply["type"], reply["rev"]), ("render", 2))
+            self.assertIn("<h1>Fixed</h1>", reply["html"])
+
+    def test_session_keeps_answering_after_bad_collection_reference(self) -> None:
+        with self.client.websocket_connect("/ws/render") as websocket:
+            websocket.send_json({"rev": 1, "text": "# Games\n"})
+            self.assertEqual(websocket.receive_json()["type"], "render")
+            websocket.send_json({"rev": 2, "text": "# Games\n\n" + BAD_SOURCE})
+            error = websocket.receive_json()
+            self.assertEqual((error["type"], error["rev"], error["status"]), ("error", 2, 422))
+            self.assertIn("missing.pgn", error["detail"])
+            websocket.send_json({"rev": 3, "text": "# Games\n\nNone yet.\n"})
+            reply = websocket.receive_json()
+            self.assertEqual((reply["type"], reply["rev"]), ("render", 3))
+            self.assertIn("None yet.", "".join(reply["blocks"].values()) if not reply["full"] else reply["html"])
+
+    def test_session_survives_malformed_frames(self) -> None:
+        with self.client.websocket_connect("/ws/render") as websocket:
+            for frame in ("{not json", "[1, 2]"):
+                websocket.send_text(frame)
+                error = websocket.receive_json()
+                self.assertEqual((error["type"], error["status"]), ("error", 400))
+            websocket.send_json({"rev": 1, "text": "# Still here\n"})
+            self.assertIn("<h1>Still here</h1>", websocket.receive_json()["html"])
+
+    def test_session_reports_unexpected_render_failures(self) -> None:
+        with self.client.websocket_connect("/ws/render") as websocket:
+            with mock.patch("sbs_editor.sessions.render_patch_job", side_effect=RuntimeError("boom")):
+                with self.assertLogs("sbs_editor.sessions", "ERROR"):
+                    websocket.send_json({"rev": 1, "text": "# Hi\n"})
+                    error = websocket.receive_json()
+            self.assertEqual((error["type"], error["rev"], error["status"]), ("error", 1, 500))
+            websocket.send_json({"rev": 2, "text": "# Hi\n"})
+            self.assertEqual(websocket.receive_json()["type"], "render")
+
+    def test_live_preview_checks_origin(self) -> None:
+        from starlette.websockets import WebSocketDisconnect
+
+        from sbs_editor import main
+
+        with self.client.websocket_connect("/ws/render", headers={"origin": "http://testserver"}) as websocket:
+            websocket.send_json({"rev": 1, "text": "# Hi\n"})
+            self.assertEqual(websocket.receive_json()["type"], "render")
+        with self.assertRaises(WebSocketDisconnect) as caught:
+            with self.client.websocket_connect("/ws/render", headers={"origin": "https://evil.example"}):
+                pass
+        self.assertEqual(caught.exception.code, 1008)
+        with mock.patch.object(main, "allowed_origins", frozenset({"https://editor.example"})):
+            with self.client.websocket_connect("/ws/render", headers={"origin": "https://editor.example"}):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
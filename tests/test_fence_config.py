@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.utils import (
+    PBN_PAYLOAD_RE,
+    PGN_PAYLOAD_RE,
+    SGF_PAYLOAD_RE,
+    parse_fence_config,
+    parse_flat_config,
+    split_fence,
+)
+
+
+class TestFenceConfig(unittest.TestCase):
+    def test_flat_configs_match_safe_load(self) -> None:
+        samples = [
+            "title: Immortal Game\nsize: 360\ncoords: false\nmove: -1",
+            "showMoveNumbers: 5\nlang: 'en'\ntheme: \"book\"\ninteractive: yes",
+            "fen: r1bq1rk1/pp1n1pbp/3p1np1/2pPp3/2P1P3/2N2N2/PPQBBPPP/R3K2R w KQ - 0 11\nratio: 1.5",
+            "# comment\ntitle:\n\nlayout: mini",
+        ]
+        for text in samples:
+            with self.subTest(text=text):
+                parsed = parse_flat_config(text)
+                expected = yaml.safe_load(text)
+                self.assertEqual(parsed, expected)
+                self.assertEqual({k: type(v) for k, v in parsed.items()}, {k: type(v) for k, v in expected.items()})
+
+    def test_flat_parser_defers_non_flat_yaml(self) -> None:
+        for text in (
+            "pgn: |\n  1. e4 e5",
+            "data: {a: 1}",
+            "on: 1",
+            "size: 0x10",
+            "date: 2001-12-14",
+            "title: a # note",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_flat_config(text))
+                self.assertEqual(parse_fence_config(text), yaml.safe_load(text))
+
+    def test_raw_payloads_are_not_configs(self) -> None:
+        self.assertIsNone(parse_fence_config("1. e4 e5 2. Nf3"))
+        self.assertIsNone(parse_fence_config("(;GM[1]SZ[19];B[pd])"))
+        self.assertEqual(parse_fence_config("   "), {})
+
+    def test_split_fence(self) -> None:
+        self.assertEqual(
+            split_fence("title: Demo\nsize: 300\n---\n1. e4 e5\n", "pgn"),
+            {"title": "Demo", "size": 300, "pgn": "1. e4 e5"},
+        )
+        self.assertEqual(split_fence("---\n(;SZ[9])", "sgf"), {"sgf": "(;SZ[9])"})
+        self.assertEqual(split_fence("1. e4 e5\n---\n2. Nf3", "pgn"), {})
+        self.assertEqual(split_fence("title: x", "pgn"), {"title": "x"})
+        self.assertEqual(split_fence("[Event \"x\"]\n1. e4", "pgn"), {})
+
+    def test_payload_sniffing(self) -> None:
+        self.assertTrue(SGF_PAYLOAD_RE.match("\n ( ;GM[1]SZ[19];B[pd])"))
+        self.assertTrue(PGN_PAYLOAD_RE.match('[Event "London"]\n1. e4'))
+        self.assertTrue(PGN_PAYLOAD_RE.match("1.e4 e5 2.Nf3"))
+        self.assertTrue(PBN_PAYLOAD_RE.match('% PBN 2.1\n[Deal "N:..."]'))
+        for config in ("title: x\n---\n1. e4", "size: 300", "---\n(;SZ[9])", "%YAML 1.1\n---\na: 1"):
+            with self.subTest(config=config):
+                for pattern in (SGF_PAYLOAD_RE, PGN_PAYLOAD_RE, PBN_PAYLOAD_RE):
+                    self.assertIsNone(pattern.match(config))
+        # A bare record with a stray separator still yields no config.
+        self.assertEqual(split_fence("(;SZ[9]C[---])", "sgf", payload_re=SGF_PAYLOAD_RE), {})
+        self.assertEqual(
+            split_fence("title: x\n---\n(;SZ[9])", "sgf", payload_re=SGF_PAYLOAD_RE),
+            {"title": "x", "sgf": "(;SZ[9])"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import io
+import os
+from pathlib import Path
+import struct
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.image_size import image_size, local_image_path, probe
+from sbs_renderer.renderer import SBSRenderer
+
+MARKDOWN_DIR = Path(__file__).resolve().parent / "markdown"
+
+
+def png(width: int, height: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+
+
+def jpeg(width: int, height: int) -> bytes:
+    app1 = b"\xff\xe1" + struct.pack(">H", 2 + 100) + b"\x00" * 100
+    sof = b"\xff\xc2" + struct.pack(">HBHH", 11, 8, height, width) + b"\x03\x01\x22\x00"
+    return b"\xff\xd8" + app1 + sof + b"\xff\xd9"
+
+
+class TestImageSize(unittest.TestCase):
+    def test_probe_formats(self) -> None:
+        vp8l_bits = (300 - 1) | ((200 - 1) << 14)
+        samples = {
+            "png": (png(640, 480), (640, 480)),
+            "gif": (b"GIF89a" + struct.pack("<HH", 31, 17) + b"\x00" * 8, (31, 17)),
+            "jpeg": (jpeg(1024, 768), (1024, 768)),
+            "webp-lossy": (
+                b"RIFF\x00\x00\x00\x00WEBPVP8 \x00\x00\x00\x00\x00\x00\x00\x9d\x01\x2a"
+                + struct.pack("<HH", 120, 90),
+                (120, 90),
+            ),
+            "webp-lossless": (
+                b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f" + vp8l_bits.to_bytes(4, "little"),
+                (300, 200),
+            ),
+            "webp-extended": (
+                b"RIFF\x00\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00\x00\x00\x00\x00"
+                + (799).to_bytes(3, "little")
+                + (599).to_bytes(3, "little"),
+                (800, 600),
+            ),
+            "svg": (b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" width="120px" height="60">', (120, 60)),
+            "svg-viewbox": (b"<svg viewBox='0 0 200 100' width='50'></svg>", (50, 25)),
+        }
+        for name, (data, expected) in samples.items():
+            with self.subTest(name=name):
+                self.assertEqual(probe(io.BytesIO(data)), expected)
+
+        self.assertIsNone(probe(io.BytesIO(b"<svg width='100%' height='10em'>")))
+        self.assertIsNone(probe(io.BytesIO(b"not an image")))
+
+    def test_sample_jpeg_with_exif(self) -> None:
+        self.assertEqual(image_size(MARKDOWN_DIR / "images" / "woman-in-red.jpeg"), (768, 768))
+
+    def test_cache_follows_modification_time(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "a.png"
+            path.write_bytes(png(10, 20))
+            self.assertEqual(image_size(path), (10, 20))
+            stat = path.stat()
+            path.write_bytes(png(30, 40))
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(image_size(path), (30, 40))
+            self.assertIsNone(image_size(Path(tmp) / "missing.png"))
+
+    def test_local_image_path(self) -> None:
+        self.assertEqual(local_image_path("assets/a%20b.png?x=1", "/book"), Path("/book/assets/a b.png"))
+        for src in ("https://x/y.png", "//cdn/y.png", "/abs.png", "data:image/png;base64,AAAA", ""):
+            self.assertIsNone(local_image_path(src, "/book"))
+        self.assertIsNone(local_image_path("../x.png", "/book/part"))
+        self.assertIsNone(local_image_path("a/../../x.png", "/book"))
+        self.assertEqual(local_image_path("../assets/x.png", "/book/part", "/book"), Path("/book/part/../assets/x.png"))
+
+
+class TestRendererImageSizes(unittest.TestCase):
+    def test_local_scaled_images_get_final_size_without_script(self) -> None:
+        renderer = SBSRenderer(widgets_dir="/widgets", base_dir=MARKDOWN_DIR)
+        text = (MARKDOWN_DIR / "image-attrs.md").read_text(encoding="utf-8")
+        doc = renderer.render_document(text, title="Images")
+        self.assertNotIn("data-sbs-scale", doc)
+        self.assertNotIn("image-attrs.js", doc)
+        self.assertIn('width="384" height="384"', doc)
+        self.assertIn("width: 384px; height: 384px", doc)
+        self.assertIn('width="960" height="960"', doc)
+
+    def test_remote_and_missing_images_keep_runtime_scaling(self) -> None:
+        renderer = SBSRenderer(widgets_dir="/widgets", base_dir=MARKDOWN_DIR)
+        for src in ("https://example.com/x.jpg", "images/missing.png"):
+            with self.subTest(src=src):
+                doc = renderer.render_document(f"![x]({src}){{ scale=0.5 }}", title="Remote")
+                self.assertIn('data-sbs-scale="0.5"', doc)
+                self.assertIn("/widgets/image-attrs.js", doc)
+
+    def test_images_outside_the_root_are_not_read(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            book = Path(tmp) / "book"
+            (book / "part").mkdir(parents=True)
+            (book / "pics").mkdir()
+            (book / "pics" / "a.png").write_bytes(png(40, 20))
+            (Path(tmp) / "outside.png").write_bytes(png(40, 20))
+            text = "![a](../pics/a.png){ scale=0.5 }\n\n![b](../../outside.png){ scale=0.5 }\n"
+
+            chapter = SBSRenderer(widgets_dir="/widgets", base_dir=book / "part")
+            self.assertEqual(chapter.render(text).count('data-sbs-scale="0.5"'), 2)
+
+            in_book = SBSRenderer(widgets_dir="/widgets", base_dir=book / "part", root_dir=book)
+            html = in_book.render(text)
+            self.assertIn('src="../pics/a.png" alt="a" style="width: 20px; height: 10px;" width="20" height="10"', html)
+            self.assertEqual(html.count('data-sbs-scale="0.5"'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import re
+import sys
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.chess import ChessBlock
+from sbs_renderer.pgn import START_FEN, PgnError, Position, main_line, replay
+
+
+class TestPgnReplay(unittest.TestCase):
+    def test_main_line_skips_markup(self) -> None:
+        pgn = '[Event "T"]\n\n1. e4 {note} e5 (1... c5 2. Nf3) 2.Nf3 $2 Nc6?! ; aside\n3... a6 1-0 4. d4'
+        self.assertEqual(main_line(pgn), ["e4", "e5", "Nf3", "Nc6?!", "a6"])
+
+    def test_replay_matches_chess_js_fens(self) -> None:
+        timeline = replay("1. e4 d5 2. exd5 Qxd5 3. Nc3")
+        self.assertEqual(timeline.sans, ["e4", "d5", "exd5", "Qxd5", "Nc3"])
+        self.assertEqual(timeline.fens[0], START_FEN)
+        self.assertEqual(timeline.fens[-1], "rnb1kbnr/ppp1pppp/8/3q4/8/2N5/PPPP1PPP/R1BQKBNR b KQkq - 1 3")
+
+    def test_canonical_san_and_markers(self) -> None:
+        timeline = replay("1. f3 e5 2. g4 Qh4")
+        self.assertEqual(timeline.sans[-1], "Qh4#")
+        timeline = replay("1.e4 e5 2.Nf3 Nc6 3.Bc4 Nf6 4.0-0 Bc5 5.d3 d6 6.Ng5 O-O 7.Nxf7 Rxf7 8.Bxf7+")
+        self.assertEqual(timeline.sans[6], "O-O")
+        self.assertEqual(timeline.sans[-1], "Bxf7+")
+        self.assertIn(" b - - 0 8", timeline.fens[-1])
+
+    def test_en_passant_and_promotion(self) -> None:
+        timeline = replay("1. e4 a6 2. e5 d5 3. exd6 c5", None)
+        self.assertEqual(timeline.fens[4], "rnbqkbnr/1pp1pppp/p7/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3")
+        self.assertEqual(timeline.sans[4], "exd6")
+        self.assertTrue(timeline.fens[5].startswith("rnbqkbnr/1pp1pppp/p2P4/8/8/8/"))
+        # No capturing pawn next to it, so chess.js omits the square.
+        self.assertIn(" w KQkq - 0 4", timeline.fens[-1])
+
+        timeline = replay("1. b8Q+", "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertEqual(timeline.sans, ["b8=Q+"])
+
+    def test_disambiguation(self) -> None:
+        fen = "4k3/8/8/8/8/8/8/R4RK1 w - - 0 1"
+        self.assertEqual(replay("1. Rad1", fen).sans, ["Rad1"])
+        with self.assertRaisesRegex(PgnError, "ambiguous"):
+            replay("1. Rd1", fen)
+        # Surplus disambiguation is accepted and written canonically.
+        self.assertEqual(replay("1. Ngf3", "4k3/8/8/8/8/8/8/1N2K1N1 w - - 0 1").sans, ["Nf3"])
+
+    def test_errors_name_the_move(self) -> None:
+        with self.assertRaisesRegex(PgnError, r"move 2\. Ke3: illegal move"):
+            replay("1. e4 e5 2. Ke3")
+        with self.assertRaisesRegex(PgnError, r"move 1\.\.\. e8"):
+            replay("1. e4 e8")
+        with self.assertRaisesRegex(PgnError, "promotion|illegal"):
+            replay("1. b8", "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        with self.assertRaises(PgnError):
+            Position.from_fen("8/8/8/8/8/8/8/8 w - - 0 1")
+
+    def test_unplayable_starts_are_rejected(self) -> None:
+        for fen in ("P3k3/8/8/8/8/8/8/4K3 w - - 0 1", "4k3/8/8/8/8/8/8/p3K3 b - - 0 1"):
+            with self.subTest(fen=fen), self.assertRaisesRegex(PgnError, "back rank"):
+                replay("1. a8", fen)
+        with self.assertRaisesRegex(ValueError, "must be a string"):
+            replay("1. e4", 42)  # type: ignore[arg-type]
+
+    def test_fen_tag_sets_start(self) -> None:
+        pgn = '[SetUp "1"]\n[FEN "4k3/8/8/8/8/8/8/R3K3 w Q - 0 1"]\n\n1. O-O-O'
+        self.assertEqual(replay(pgn).sans, ["O-O-O"])
+
+
+class TestChessTimeline(unittest.TestCase):
+    def test_timeline_is_opt_in(self) -> None:
+        html = ChessBlock.from_fence("---\n1. e4 e5").to_html()
+        self.assertNotIn("x-chess-timeline", html)
+
+    def test_timeline_payload(self) -> None:
+        html = ChessBlock.from_fence("timeline: true\n---\n1. e4 e5 2. Nf3").to_html()
+        payload = re.search(r"<script type='application/x-chess-timeline'>(.*?)</script>", html)
+        assert payload is not None
+        data = json.loads(payload.group(1))
+        self.assertEqual(data["sans"], ["e4", "e5", "Nf3"])
+        self.assertEqual(len(data["fens"]), 4)
+        self.assertNotIn("data-timeline", html)
+        self.assertIn("x-chess-pgn", html)
+
+    def test_interactive_boards_only_validate(self) -> None:
+        html = ChessBlock.from_fence("timeline: true\ninteractive: true\n---\n1. e4").to_html()
+        self.assertNotIn("x-chess-timeline", html)
+        with self.assertRaises(PgnError):
+            ChessBlock.from_fence("timeline: true\ninteractive: true\n---\n1. e5").to_html()
+
+
+if __name__ == "__main__":
+    unittest.main()
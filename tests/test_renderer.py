@@ -9,6 +9,7 @@ ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 sys.path.insert(0, str(SRC))
 
+from sbs_renderer.image_attrs import normalize_image_attribute_syntax
 from sbs_renderer.renderer import SBSRenderer
 
 TESTS_ROOT = Path(__file__).resolve().parent
@@ -134,6 +135,31 @@ coords: false
         html = self.renderer.render(text)
         self.assertIn('coords="false"', html)
 
+    def test_widgets_reserve_their_hydrated_size(self) -> None:
+        html = self.renderer.render(
+            "```sbs-chess\nlayout: mini\nsize: 240\ncoords: false\n```\n\n"
+            "```sbs-chess\nfen: startpos\n```\n\n"
+            "```sbs-go\nsize: 360px\ninteractive: true\n---\n(;SZ[9])\n```\n\n"
+            "```sbs-go\nsize: 60%\n---\n(;SZ[9])\n```\n"
+        )
+        styles = [
+            (name, (re.search(r"style=['\"]([^'\"]*)", attrs) or [None, ""])[1])
+            for name, attrs in re.findall(r"<sbs-(\w+)([^>]*)>", html)
+        ]
+        self.assertEqual(styles[0], ("chess", "--sbs-reserve-width:268px;--sbs-reserve-height:268px"))
+        self.assertRegex(styles[1][1], r"^--sbs-reserve-height:\d+px$")
+        self.assertEqual(styles[2], ("go", "--sbs-reserve-width:378px;--sbs-reserve-height:419px"))
+        self.assertEqual(styles[3], ("go", ""))
+
+        for size in ("true", "0", "-5"):
+            with self.subTest(size=size):
+                fence = f"```sbs-go\nsize: {size}\n---\n(;SZ[9])\n```\n"
+                self.assertIn("--sbs-reserve-width:318px", self.renderer.render(fence))
+                self.assertIn("<svg", SBSRenderer(static_diagrams=True).render(fence))
+
+        bridge = self.renderer.render(load_markdown("bridge-demo.md"))
+        self.assertRegex(bridge, r"<sbs-bridge [^>]*style='--sbs-reserve-width:\d+px;--sbs-reserve-height:\d+px'")
+
     def test_widget_with_separator_but_no_config(self) -> None:
         # Chess
         chess_text = """
@@ -214,6 +240,44 @@ coords: false
         self.assertNotIn('data-sbs-scale="0"', html)
         self.assertNotIn('data-sbs-scale="abc"', html)
 
+    def test_image_attribute_normalization_skips_fenced_code(self) -> None:
+        text = (
+            "![a](a.png)  {scale=0.5, align=left}\n"
+            "```\n![b](b.png){scale=0.5, align=left}\n```\n"
+            "![c](c.png){width=10,height=2.5}\n"
+        )
+        self.assertEqual(
+            normalize_image_attribute_syntax(text),
+            '![a](a.png){scale="0.5"  align=left}\n'
+            "```\n![b](b.png){scale=0.5, align=left}\n```\n"
+            '![c](c.png){width=10 height="2.5"}\n',
+        )
+        plain = "No images here, just text. {braces}"
+        self.assertIs(normalize_image_attribute_syntax(plain), plain)
+
+    def test_document_stream_yields_head_first_and_scripts_last(self) -> None:
+        text = "# Title\n\n```sbs-chess\nfen: startpos\n```\n\nClosing words.\n"
+        chunks = list(self.renderer.render_document_stream(text, title="Streamed"))
+        self.assertTrue(chunks[0].endswith("<body>\n"))
+        self.assertIn("/widgets/sbs-ext.css", chunks[0])
+        self.assertNotIn("<script", chunks[0])
+        self.assertEqual(chunks[1], "<h1>Title</h1>\n")
+        self.assertIn("<script type='module' src='/widgets/index.js'></script>", chunks[-1])
+        self.assertTrue(chunks[-1].endswith("</body>\n</html>"))
+
+        streamed = "".join(chunks)
+        document = self.renderer.render_document(text, title="Streamed")
+        body = document[document.index("<body>") : document.index("</body>")].rstrip("\n")
+        self.assertIn(body, streamed)
+
+    def test_document_stream_is_lazy(self) -> None:
+        text = "Before.\n\n```sbs-chess\nsource: missing.pgn\n```\n"
+        stream = self.renderer.render_document_stream(text)
+        self.assertIn("<head>", next(stream))
+        self.assertEqual(next(stream), "<p>Before.</p>\n")
+        with self.assertRaises(ValueError):
+            next(stream)
+
     def test_document_includes_image_scale_script_only_when_needed(self) -> None:
         doc_no_scale = self.renderer.render_document(
             "![x](https://example.com/x.jpg){ width=200 }",
@@ -227,6 +291,77 @@ coords: false
         )
         self.assertIn("/widgets/image-attrs.js", doc_with_scale)
 
+    def test_repeated_fences_are_memoized_but_still_tracked(self) -> None:
+        fence = "```sbs-go\nmove: 3\n---\n(;SZ[9];B[ee])\n```\n"
+        text = f"::: sbs-sticky\n{fence}\nNotes\n:::\n\n{fence}"
+        env: dict = {}
+        html = self.renderer.render(text, env)
+        self.assertEqual(html.count("<sbs-go"), 2)
+        self.assertEqual(html.count("sbs-sticky-figure"), 1)
+        self.assertEqual(env["_sbs_used_widgets"], {"go"})
+        info = self.renderer._fence_html.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_repeated_payloads_are_embedded_once(self) -> None:
+        pgn = "pgn: |\n  1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Ba4 Nf6 5. O-O Be7 6. Re1 b5\n  7. Bb3 d6 8. c3 O-O 9. h3 Nb8 10. d4 Nbd7 11. c4 c6 12. cxb5 axb5\n"
+        fences = [f"```sbs-chess\nlayout: {layout}\n{pgn}```" for layout in ("full", "standard", "full")]
+        html = self.renderer.render("\n\n".join(fences))
+        self.assertEqual(html.count("application/x-chess-pgn"), 1)
+        payload_id = re.search(r"<script id='(sbs-payload-\w+)' type='application/x-chess-pgn'>", html).group(1)
+        self.assertEqual(html.count(f"data-sbs-payload='{payload_id}'"), 2)
+
+        short = "```sbs-chess\npgn: 1. e4\n```"
+        self.assertEqual(self.renderer.render(f"{short}\n\n{short}").count("application/x-chess-pgn"), 2)
+
+        # Blocks are replaced one at a time in live previews, so each keeps its own copy.
+        handle = self.renderer.render_blocks("\n\n".join(fences))
+        self.assertTrue(all("application/x-chess-pgn" in block.html for block in handle.blocks))
+        self.assertNotIn("data-sbs-payload", handle.html)
+
+    def test_block_patch_only_returns_changed_blocks(self) -> None:
+        text = load_markdown("chess-sticky-layout.md")
+        handle = self.renderer.render_blocks(text)
+        self.assertIn("sbs-sticky-container", handle.html)
+        self.assertEqual(handle.used_widgets, {"chess"})
+
+        edited = text.rstrip("\n") + "\n\nA closing remark.\n"
+        patch = self.renderer.render_patch(handle, edited)
+        self.assertEqual(len(patch.blocks), 1)
+        self.assertIn("A closing remark.", next(iter(patch.blocks.values())))
+        self.assertEqual(patch.removed, [])
+        self.assertEqual(patch.order[:-1], [block.id for block in handle.blocks])
+
+        fresh = self.renderer.render_blocks(edited)
+        self.assertEqual(
+            [block.html for block in patch.handle.blocks],
+            [block.html for block in fresh.blocks],
+        )
+
+    def test_block_patch_matches_full_render_for_unclosed_trailing_fence(self) -> None:
+        text = "Intro\n\n```\ncode\n"
+        handle = self.renderer.render_blocks(text)
+        for edited in (text.rstrip("\n"), text + "\n", "Intro edited\n\n```\ncode"):
+            with self.subTest(edited=edited):
+                patch = self.renderer.render_patch(handle, edited)
+                fresh = self.renderer.render_blocks(edited)
+                self.assertEqual(
+                    [block.html for block in patch.handle.blocks],
+                    [block.html for block in fresh.blocks],
+                )
+
+    def test_block_patch_handles_edits_that_merge_blocks(self) -> None:
+        text = "Intro\n\n```sbs-go\n---\n(;SZ[9])\n```\n\nOutro\n"
+        handle = self.renderer.render_blocks(text)
+        # Opening an unclosed fence swallows the rest of the document.
+        edited = text.replace("Intro\n\n", "Intro\n\n~~~\n")
+        patch = self.renderer.render_patch(handle, edited)
+        fresh = self.renderer.render_blocks(edited)
+        self.assertEqual(
+            [block.html for block in patch.handle.blocks],
+            [block.html for block in fresh.blocks],
+        )
+        self.assertEqual(len(patch.removed), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from urllib.request import urlopen
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from http.server import ThreadingHTTPServer
+
+from sbs_renderer.serve import BookSite, make_handler
+
+WIDGETS_DIR = ROOT / "widgets"
+
+TOC = """\
+book_name: Served Book
+chapters:
+  - name: One
+    path: one.md
+  - name: Two
+    path: sub/two.md
+"""
+
+
+def bump(path: Path, text: str) -> None:
+    stat = path.stat()
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestBookServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "sub").mkdir()
+        (self.root / "toc.yaml").write_text(TOC, encoding="utf-8")
+        (self.root / "one.md").write_text("# One\n\nFirst.\n", encoding="utf-8")
+        (self.root / "sub" / "two.md").write_text("# Two\n\nSecond.\n", encoding="utf-8")
+        self.site = BookSite(self.root, widgets_dir=WIDGETS_DIR)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_pages_render_with_reload_script(self) -> None:
+        page = self.site.page("/sub/two.html")
+        assert page is not None
+        self.assertIn("<p>Second.</p>", page)
+        self.assertIn("EventSource('/_sbs/events')", page)
+        self.assertIn("sub/two.html", self.site.page("/") or "")
+        self.assertIsNone(self.site.page("/missing.html"))
+
+    def test_poll_rerenders_only_changed_chapter_and_notifies(self) -> None:
+        self.site.page("/one.html")
+        self.site.page("/sub/two.html")
+        client = self.site.events.subscribe()
+        self.assertEqual(self.site.poll(), [])
+
+        bump(self.root / "one.md", "# One\n\nEdited.\n")
+        self.assertEqual(self.site.poll(), ["/one.html"])
+        self.assertEqual(json.loads(client.get_nowait()), {"path": "/one.html"})
+        self.assertIn("Edited.", self.site.page("/one.html") or "")
+        self.assertTrue(client.empty())
+
+        bump(self.root / "toc.yaml", TOC.replace("name: Two", "name: Second"))
+        self.assertEqual(self.site.poll(), ["*"])
+        self.assertIn("<title>Second</title>", self.site.page("/sub/two.html") or "")
+
+    def test_render_errors_show_inline_and_keep_watching(self) -> None:
+        self.site.page("/one.html")
+        self.assertEqual(self.site.poll(), [])
+        bump(self.root / "one.md", "```sbs-chess\ntimeline: true\npgn: 1. e4 e5 2. Ke3\n```\n")
+        self.assertEqual(self.site.poll(), ["/one.html"])
+        page = self.site.page("/one.html") or ""
+        self.assertIn("<pre class='sbs-render-error'>one.md: move 2. Ke3: illegal move", page)
+        self.assertIn("EventSource('/_sbs/events')", page)
+
+        bump(self.root / "one.md", "# One\n\nFixed.\n")
+        self.assertEqual(self.site.poll(), ["/one.html"])
+        self.assertIn("<p>Fixed.</p>", self.site.page("/one.html") or "")
+
+        bump(self.root / "one.md", "```sbs-chess\nsource: games.pgn\ngame: 3\n```\n")
+        self.assertEqual(self.site.poll(), ["/one.html"])
+        self.assertIn("games.pgn: No such file", self.site.page("/one.html") or "")
+
+    def test_poll_follows_images_and_collections_a_chapter_reads(self) -> None:
+        sub = self.root / "sub"
+        (sub / "pic.svg").write_text("<svg width='10' height='10'></svg>", encoding="utf-8")
+        (sub / "games.pgn").write_text('[Event "A"]\n\n1. e4 e5 *\n', encoding="utf-8")
+        bump(sub / "two.md", "![p](pic.svg){ scale=2 }\n\n```sbs-chess\nsource: games.pgn\ngame: 1\n```\n")
+        self.assertEqual(self.site.poll(), [])
+        # Files a page reads start being watched without a spurious reload.
+        self.assertIn('width="20"', self.site.page("/sub/two.html") or "")
+        self.assertEqual(self.site.poll(), [])
+
+        bump(sub / "pic.svg", "<svg width='30' height='10'></svg>")
+        self.assertEqual(self.site.poll(), ["/sub/two.html"])
+        self.assertIn('width="60"', self.site.page("/sub/two.html") or "")
+
+        bump(sub / "games.pgn", '[Event "A"]\n\n1. d4 d5 *\n')
+        self.assertEqual(self.site.poll(), ["/sub/two.html"])
+        self.assertIn("1. d4 d5", self.site.page("/sub/two.html") or "")
+
+    def test_pages_render_outside_the_lock(self) -> None:
+        site = self.site
+        render = site._render
+
+        def checked(chapter):
+            self.assertFalse(site._lock.locked())
+            return render(chapter)
+
+        with unittest.mock.patch.object(site, "_render", side_effect=checked):
+            self.assertIn("<p>First.</p>", site.page("/one.html") or "")
+
+    def test_http_serves_pages_and_widgets(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self.site))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urlopen(base + "/one.html") as response:
+                self.assertIn(b"<p>First.</p>", response.read())
+            with urlopen(base + "/widgets/index.js") as response:
+                self.assertIn(b"WIDGET_MODULES", response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
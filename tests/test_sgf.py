@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import re
+import sys
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from sbs_renderer.go import GoBlock
+from sbs_renderer.sgf import main_sequence, snapshot
+
+
+def stone(state, coord: str) -> str:
+    x, y = ord(coord[0]) - 97, ord(coord[1]) - 97
+    return state.board[y * state.size + x]
+
+
+class TestSgfSnapshot(unittest.TestCase):
+    def test_main_sequence_stops_at_first_variation(self) -> None:
+        nodes = main_sequence("(;SZ[9]C[a \\] b];B[ee];W[ef](;B[dd])(;B[ff]))(;B[aa])")
+        self.assertEqual(nodes, [{"SZ": ["9"], "C": ["a \\] b"]}, {"B": ["ee"]}, {"W": ["ef"]}])
+
+    def test_captures_and_setup(self) -> None:
+        sgf = "(;SZ[9]AB[da][eb]AW[ea];B[fa])"
+        state = snapshot(sgf, initial_move=1)
+        self.assertEqual((state.size, state.move, state.total), (9, 1, 1))
+        self.assertEqual(stone(state, "ea"), ".")
+        self.assertEqual(stone(state, "fa"), "B")
+        self.assertEqual(state.board.count("W"), 0)
+        self.assertEqual(state.markers, {"5,0": {"type": "last"}})
+
+    def test_defaults_to_setup_position(self) -> None:
+        state = snapshot("(;SZ[9]AB[cc]TR[cc];B[dd];W[ee])")
+        self.assertEqual((state.move, state.total), (0, 2))
+        self.assertEqual(state.board.count("B"), 1)
+        self.assertEqual(state.markers, {"2,2": {"type": "triangle"}})
+
+    def test_suicide_and_occupied_points_are_skipped(self) -> None:
+        sgf = "(;SZ[9]AB[ba][ab];W[aa];W[ba])"
+        state = snapshot(sgf, initial_move=2)
+        self.assertEqual(stone(state, "aa"), ".")
+        self.assertEqual(stone(state, "ba"), "B")
+        self.assertEqual(state.markers, {"1,0": {"type": "last"}})
+
+    def test_initial_move_is_clamped_and_passes_ignored(self) -> None:
+        state = snapshot("(;SZ[9];B[ee];W[];B[tt];W[dd])", initial_move=10)
+        self.assertEqual((state.move, state.total), (3, 3))
+        self.assertEqual(state.board.count("B") + state.board.count("W"), 2)
+
+    def test_move_number_ranges(self) -> None:
+        sgf = "(;SZ[9];B[aa];W[ba];B[ca];W[da];B[ea]LB[ea:X])"
+
+        def numbers(setting):
+            markers = snapshot(sgf, initial_move=5, show_move_numbers=setting).markers
+            return sorted(int(m["value"]) for m in markers.values() if m["type"] == "number")
+
+        self.assertEqual(numbers(True), [1, 2, 3, 4])
+        self.assertEqual(numbers(2), [4])
+        self.assertEqual(numbers("2-3"), [2, 3])
+        self.assertEqual(numbers("4-"), [4])
+        self.assertEqual(numbers("false"), [])
+        markers = snapshot(sgf, initial_move=5, show_move_numbers=True).markers
+        self.assertEqual(markers["4,0"], {"type": "letter", "value": "X"})
+
+    def test_size_falls_back_to_board_option(self) -> None:
+        self.assertEqual(snapshot("(;B[aa])", board_size=13).size, 13)
+        self.assertEqual(snapshot("(;B[aa])").size, 19)
+        self.assertIsNone(snapshot("not sgf"))
+
+
+class TestGoBlockSnapshot(unittest.TestCase):
+    def test_block_emits_snapshot(self) -> None:
+        block = GoBlock.from_fence("move: 2\nshowMoveNumbers: 1\n---\n(;SZ[9];B[ee];W[ef])")
+        html = block.to_html()
+        match = re.search(r'<script type="application/x-go-snapshot">(.*?)</script>', html)
+        self.assertIsNotNone(match)
+        data = json.loads(match.group(1))
+        self.assertEqual((data["size"], data["move"], data["total"]), (9, 2, 2))
+        self.assertEqual(data["markers"], {"4,5": {"type": "number", "value": "2"}})
+        self.assertEqual(len(data["board"]), 81)
+        self.assertLess(html.index("text/sgf"), html.index("x-go-snapshot"))
+
+    def test_block_without_game_has_no_snapshot(self) -> None:
+        self.assertNotIn("x-go-snapshot", GoBlock.from_fence("board: 9\n---\n").to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
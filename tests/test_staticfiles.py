@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import gzip
+import os
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from sbs_editor.staticfiles import ENCODINGS, AssetCache, CachedStaticFiles, precompress
+
+SCRIPT = "export const board = 'chess';\n" * 200
+
+
+class StaticFilesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        (self.dir / "index.js").write_text(SCRIPT, encoding="utf-8")
+        (self.dir / "tiny.css").write_text(".a{}", encoding="utf-8")
+        self.cache = AssetCache()
+        app = Starlette(routes=[Mount("/w", CachedStaticFiles(directory=self.dir, cache=self.cache))])
+        self.client = TestClient(app)
+
+    def get(self, path: str, **headers: str):
+        return self.client.get(path, headers={"accept-encoding": "identity", **headers})
+
+
+class TestCachedStaticFiles(StaticFilesTestCase):
+    def test_negotiates_gzip(self) -> None:
+        plain = self.get("/w/index.js")
+        self.assertEqual(plain.text, SCRIPT)
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(plain.headers["vary"], "Accept-Encoding")
+        self.assertEqual(plain.headers["content-type"], "text/javascript; charset=utf-8")
+
+        packed = self.client.get("/w/index.js", headers={"accept-encoding": "gzip"})
+        self.assertEqual(packed.headers["content-encoding"], "gzip")
+        self.assertEqual(packed.text, SCRIPT)
+        self.assertLess(int(packed.headers["content-length"]), len(SCRIPT))
+        self.assertNotEqual(packed.headers["etag"], plain.headers["etag"])
+
+        tiny = self.client.get("/w/tiny.css", headers={"accept-encoding": "gzip"})
+        self.assertNotIn("content-encoding", tiny.headers)
+        self.assertNotIn("vary", tiny.headers)
+
+    def test_revalidates_with_etag(self) -> None:
+        etag = self.get("/w/index.js").headers["etag"]
+        again = self.get("/w/index.js", **{"if-none-match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(self.get("/w/index.js", **{"if-none-match": '"other"'}).status_code, 200)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 2))
+
+    def test_range_requests_get_partial_content(self) -> None:
+        response = self.client.get("/w/index.js", headers={"range": "bytes=0-5", "accept-encoding": "gzip"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, SCRIPT.encode("utf-8")[:6])
+        self.assertNotIn("content-encoding", response.headers)
+
+    def test_versioned_urls_are_immutable(self) -> None:
+        self.assertEqual(self.get("/w/index.js").headers["cache-control"], "no-cache")
+        self.assertIn("immutable", self.get("/w/index.js?v=abc").headers["cache-control"])
+
+    def test_edited_file_is_reloaded(self) -> None:
+        first = self.get("/w/index.js")
+        path = self.dir / "index.js"
+        path.write_text("export const board = 'go';\n", encoding="utf-8")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+        second = self.get("/w/index.js", **{"if-none-match": first.headers["etag"]})
+        self.assertEqual(second.status_code, 200)
+        self.assertIn("go", second.text)
+
+    def test_precompressed_sibling_is_served(self) -> None:
+        self.assertEqual(precompress([self.dir]), len(ENCODINGS))
+        gz = self.dir / "index.js.gz"
+        self.assertEqual(gzip.decompress(gz.read_bytes()).decode("utf-8"), SCRIPT)
+        self.assertEqual(precompress([self.dir]), 0)
+
+        self.cache.warm([self.dir])
+        self.assertEqual(len(self.cache), 2)
+        response = self.client.get("/w/index.js", headers={"accept-encoding": "gzip;q=0.5, br;q=0"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.content, SCRIPT.encode("utf-8"))
+        self.assertEqual(int(response.headers["content-length"]), gz.stat().st_size)
+
+
+class TestAssetCache(unittest.TestCase):
+    def test_budget_evicts_least_recent(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name in ("a", "b", "c"):
+                path = Path(tmp) / f"{name}.txt"
+                path.write_bytes(name.encode("ascii") * 100)
+                paths.append(str(path))
+            cache = AssetCache(max_bytes=250)
+            for path in paths:
+                cache.get(path)
+            self.assertEqual(len(cache), 2)
+            cache.get(paths[1])
+            self.assertEqual(cache.hits, 1)
+            cache.get(paths[0])
+            self.assertEqual(cache.misses, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import { BridgeWidget } from './bridge-widget.js';
 import { createLightDomObserver, extractLightDomPayload, normalizeAttributeEscapes } from '../shared/lightdom.js';
+import { whenVisible } from '../shared/hydration.js';
 
 const template = document.createElement('template');
 template.innerHTML = `
@@ -309,6 +310,8 @@ export class SBSBridgeDiagram extends HTMLElement {
         this._explicitData = null;
         this._attributeData = null;
         this._cachedLightDomData = null;
+        this._hydrated = false;
+        this._cancelHydration = null;
         this._observer = createLightDomObserver(this, {
             shouldHandleMutation: () => !this._explicitData && !this._attributeData,
             onMutation: () => {
@@ -321,18 +324,34 @@ export class SBSBridgeDiagram extends HTMLElement {
     connectedCallback() {
         this._widget.connect?.();
         this._observer.connect();
-        this._render();
+        if (this._hydrated) {
+            this._render();
+        } else if (!this._cancelHydration) {
+            this._cancelHydration = whenVisible(this, () => this.hydrate());
+        }
     }
 
     disconnectedCallback() {
+        this._cancelHydration?.();
+        this._cancelHydration = null;
         this._observer.disconnect();
         this._widget.disconnect?.();
     }
 
+    // Lays out the deal; runs when the element nears the viewport.
+    hydrate() {
+        this._cancelHydration?.();
+        this._cancelHydration = null;
+        if (this._hydrated) return;
+        this._hydrated = true;
+        this.setAttribute('hydrated', '');
+        this._render();
+    }
+
     attributeChangedCallback(name, oldValue, newValue) {
         if (oldValue === newValue) return;
         if (name === 'lang') {
-            this._widget.setLanguage(this.lang);
+            if (this._hydrated) this._widget.setLanguage(this.lang);
         } else if (name === 'data-pbn') {
             this._attributeData = newValue ? this._normalizeAttributeData(newValue) : null;
             this._render();
@@ -370,6 +389,7 @@ export class SBSBridgeDiagram extends HTMLElement {
     }
 
     _render() {
+        if (!this._hydrated) return;
         const data = this.data;
         this._widget.setLanguage(this.lang);
         this._widget.load(data || null);
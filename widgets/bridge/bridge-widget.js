@@ -1,4 +1,8 @@
 import { PBNParser } from './pbn-parser.js';
+import { cachedParser } from '../shared/lightdom.js';
+
+// Deals repeated across the page are parsed once.
+const parsePbn = cachedParser((text) => new PBNParser().parse(text));
 
 const I18N = {
     en: {
@@ -33,7 +37,6 @@ export class BridgeWidget {
 
         this.container = container;
         this.lang = lang;
-        this.parser = new PBNParser();
         this.parsedData = null;
         this.pbnData = null;
         this._pendingSyncFrame = null;
@@ -63,7 +66,7 @@ export class BridgeWidget {
 
     load(pbnData) {
         this.pbnData = pbnData;
-        this.parsedData = pbnData ? this.parser.parse(pbnData) : null;
+        this.parsedData = pbnData ? parsePbn(pbnData) : null;
         this.render();
     }
 
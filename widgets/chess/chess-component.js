@@ -1,5 +1,6 @@
 import { ChessWidget } from './chess-widget.js';
 import { createLightDomObserver, extractLightDomPayload } from '../shared/lightdom.js';
+import { whenVisible } from '../shared/hydration.js';
 
 const styles = `
 :host {
@@ -488,7 +489,7 @@ template.innerHTML = `<style>${styles}</style><div class="widget-container"></di
 
 export class SBSChessDiagram extends HTMLElement {
     static get observedAttributes() {
-        return ['title', 'fen', 'pgn', 'interactive', 'orientation', 'size', 'layout', 'coords', 'lang'];
+        return ['title', 'fen', 'pgn', 'interactive', 'orientation', 'size', 'layout', 'coords', 'lang', 'openings'];
     }
 
     constructor() {
@@ -499,10 +500,14 @@ export class SBSChessDiagram extends HTMLElement {
         this._widget = null;
         this._explicitConfig = null;
         this._cachedPgn = undefined;
+        this._cachedTimeline = undefined;
+        this._hydrated = false;
+        this._cancelHydration = null;
         this._observer = createLightDomObserver(this, {
             shouldHandleMutation: () => !this._explicitConfig || typeof this._explicitConfig.pgn === 'undefined',
             onMutation: () => {
                 this._cachedPgn = undefined;
+                this._cachedTimeline = undefined;
                 this._applyConfig();
             }
         });
@@ -510,11 +515,27 @@ export class SBSChessDiagram extends HTMLElement {
 
     connectedCallback() {
         this._observer.connect();
-        this._applyConfig();
+        if (this._hydrated) {
+            this._applyConfig();
+        } else if (!this._cancelHydration) {
+            this._cancelHydration = whenVisible(this, () => this.hydrate());
+        }
     }
 
     disconnectedCallback() {
         this._observer.disconnect();
+        this._cancelHydration?.();
+        this._cancelHydration = null;
+    }
+
+    // Builds the board; runs when the element nears the viewport.
+    hydrate() {
+        this._cancelHydration?.();
+        this._cancelHydration = null;
+        if (this._hydrated) return;
+        this._hydrated = true;
+        this.setAttribute('hydrated', '');
+        this._applyConfig();
     }
 
     attributeChangedCallback(name, oldValue, newValue) {
@@ -554,7 +575,7 @@ export class SBSChessDiagram extends HTMLElement {
     }
 
     _applyConfig() {
-        if (!this.isConnected || !this._container) return;
+        if (!this._hydrated || !this.isConnected || !this._container) return;
         const config = this._collectConfig();
         if (!this._widget) {
             this._widget = new ChessWidget(this._container, config);
@@ -580,6 +601,9 @@ export class SBSChessDiagram extends HTMLElement {
             const fenAttr = this.getAttribute('fen');
             if (fenAttr) merged.fen = fenAttr;
         }
+        if (typeof merged.timeline === 'undefined' && !explicit.pgn) {
+            merged.timeline = this._resolveTimeline();
+        }
         return merged;
     }
 
@@ -620,6 +644,11 @@ export class SBSChessDiagram extends HTMLElement {
             config.pgn = attrPgn;
         }
 
+        const openings = this._parseJsonAttr('openings');
+        if (Array.isArray(openings)) {
+            config.openings = openings;
+        }
+
         return config;
     }
 
@@ -639,6 +668,21 @@ export class SBSChessDiagram extends HTMLElement {
         return this._cachedPgn;
     }
 
+    _resolveTimeline() {
+        if (this._cachedTimeline === undefined) {
+            const text = extractLightDomPayload(this, { scriptType: 'application/x-chess-timeline' });
+            this._cachedTimeline = null;
+            if (text) {
+                try {
+                    this._cachedTimeline = JSON.parse(text);
+                } catch (err) {
+                    console.warn('[sbs-chess] invalid timeline payload', err.message);
+                }
+            }
+        }
+        return this._cachedTimeline;
+    }
+
     _parseBooleanAttr(name) {
         if (!this.hasAttribute(name)) return undefined;
         const value = this.getAttribute(name);
@@ -653,6 +697,17 @@ export class SBSChessDiagram extends HTMLElement {
         return Number.isNaN(value) ? undefined : value;
     }
 
+    _parseJsonAttr(name) {
+        const raw = this.getAttribute(name);
+        if (!raw) return undefined;
+        try {
+            return JSON.parse(raw);
+        } catch (err) {
+            console.warn(`[sbs-chess] invalid ${name} attribute`, err.message);
+            return undefined;
+        }
+    }
+
     _extractPgnFromLightDom() {
         return extractLightDomPayload(this, {
             scriptType: 'application/x-chess-pgn',
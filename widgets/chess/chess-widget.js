@@ -12,7 +12,11 @@ import {
     PROMOTION_CHOICES,
     buildTimelineFromPgn,
     classifyOpening,
-    extractPgnMetadata
+    extractPgnMetadata,
+    loadOpeningDictionary,
+    needsOpeningDictionary,
+    openingFromTrail,
+    timelineFromPrecomputed
 } from './game-logic.js';
 
 const I18N = {
@@ -254,6 +258,9 @@ export class ChessWidget {
         }
         const ply = Math.max(0, Math.min(index, this.staticMoves.length));
         if (ply === 0) return null;
+        if (Array.isArray(this.config.openings)) {
+            return openingFromTrail(this.config.openings, ply);
+        }
         const sanSequence = this.staticMoves
             .slice(0, ply)
             .map(move => move?.san)
@@ -261,16 +268,27 @@ export class ChessWidget {
         if (!sanSequence.length) {
             return null;
         }
+        this.requestOpeningDictionary(sanSequence.length);
         return classifyOpening(this.config.fen, sanSequence);
     }
 
     resolveOpeningInfo(state) {
         if (this.config.interactive) {
+            const ply = Array.isArray(this.config.openings) ? this.logic.getScriptedPly() : -1;
+            if (ply >= 0) {
+                return openingFromTrail(this.config.openings, ply);
+            }
+            this.requestOpeningDictionary(this.logic.getCursor());
             return state?.opening || null;
         }
         return this.getStaticOpeningAt(this.currentIndex);
     }
 
+    requestOpeningDictionary(moveCount) {
+        if (!needsOpeningDictionary(this.config.fen, moveCount)) return;
+        loadOpeningDictionary().then(() => this.updateStatusBlock());
+    }
+
     getLayoutPreset() {
         const key = this.config?.layout || 'full';
         return LAYOUT_PRESETS[key] || LAYOUT_PRESETS.full;
@@ -291,7 +309,9 @@ export class ChessWidget {
                 this.staticMoves = [];
                 this.currentIndex = this.logic.getCursor();
             } else {
-                const playback = buildTimelineFromPgn(normalizedFen, this.config.pgn);
+                // A renderer-supplied timeline skips replaying the PGN.
+                const playback = timelineFromPrecomputed(this.config.timeline)
+                    || buildTimelineFromPgn(normalizedFen, this.config.pgn);
                 this.timeline = playback.timeline?.length ? playback.timeline : [this.baseState];
                 this.staticMoves = playback.moves || [];
                 if (typeof this.currentIndex !== 'number') {
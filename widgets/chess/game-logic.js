@@ -1,7 +1,7 @@
 // chess.js 1.0.0 (MIT) vendored locally to avoid network requirements during prototyping
 import { Chess } from './vendor/chess.mjs';
 import { getDefaultFEN, parseFEN } from './chess-renderer.js';
-import { ECO_LOOKUP as ECO_LOOKUP_SOURCE } from './eco-dictionary.js';
+import { cachedParser } from '../shared/lightdom.js';
 
 export const PROMOTION_CHOICES = ['q', 'r', 'b', 'n'];
 
@@ -17,7 +17,11 @@ export function createLogicController() {
 const PGN_DEFAULT = '';
 const PGN_LOAD_OPTIONS = { strict: false };
 const PGN_TAG_PATTERN = /^\s*\[([A-Za-z0-9_]+)\s+"([^"]*)"\]\s*$/;
-const ECO_LOOKUP = ECO_LOOKUP_SOURCE || {};
+// The ~2 MB dictionary is only imported on demand: rendered pages carry the
+// opening of their scripted line (`openings` attribute), so it is needed
+// only for boards without it or once an interactive game leaves that line.
+let ecoLookup = null;
+let ecoLoading = null;
 
 function isDefaultStart(fen) {
     return normalizeFen(fen) === getDefaultFEN();
@@ -27,12 +31,12 @@ function detectOpeningForMoves(moves = [], fen) {
     if (!Array.isArray(moves) || !moves.length) {
         return null;
     }
-    if (!isDefaultStart(fen)) {
+    if (!isDefaultStart(fen) || !ecoLookup) {
         return null;
     }
     for (let len = moves.length; len > 0; len -= 1) {
         const key = moves.slice(0, len).join(' ');
-        const match = ECO_LOOKUP[key];
+        const match = ecoLookup[key];
         if (match) {
             return {
                 eco: match.eco,
@@ -44,6 +48,39 @@ function detectOpeningForMoves(moves = [], fen) {
     return null;
 }
 
+export function loadOpeningDictionary() {
+    if (!ecoLoading) {
+        ecoLoading = import('./eco-dictionary.js')
+            .then(module => {
+                ecoLookup = module.ECO_LOOKUP || {};
+                return ecoLookup;
+            })
+            .catch(err => {
+                console.warn('[sbs-chess] ECO dictionary unavailable', err.message);
+                ecoLookup = {};
+                return ecoLookup;
+            });
+    }
+    return ecoLoading;
+}
+
+export function needsOpeningDictionary(fen, moveCount) {
+    return !ecoLookup && moveCount > 0 && isDefaultStart(fen);
+}
+
+// `trail` is the renderer's `[[ply, eco, en, zh], ...]` list of the plies
+// where the opening name changes along the scripted line.
+export function openingFromTrail(trail, ply) {
+    let match = null;
+    for (const entry of trail) {
+        if (!Array.isArray(entry) || entry[0] > ply) break;
+        match = entry;
+    }
+    if (!match) return null;
+    const [matchPly, eco, en, zh] = match;
+    return { eco, labels: { en: en || null, zh: zh || null }, ply: matchPly };
+}
+
 function normalizeFen(fen) {
     if (!fen || fen.trim() === '' || fen.trim() === 'startpos') {
         return getDefaultFEN();
@@ -85,6 +122,11 @@ export function extractSanMovesFromPgn(pgn) {
     if (!pgn || !pgn.trim()) {
         return [];
     }
+    // Diagrams of one game share the parse; callers get their own list.
+    return parseSanMoves(pgn).slice();
+}
+
+const parseSanMoves = cachedParser((pgn) => {
     const temp = new Chess();
     const { tags, body: sanitized } = splitPgnMetadata(pgn);
     try {
@@ -103,7 +145,7 @@ export function extractSanMovesFromPgn(pgn) {
         }
         return [];
     }
-}
+});
 
 export function buildTimelineFromPgn(fen, pgn) {
     const timeline = [];
@@ -136,6 +178,25 @@ export function buildTimelineFromPgn(fen, pgn) {
     return { timeline, moves, opening: classification };
 }
 
+// `data` is the renderer's precomputed replay: `{ fens, sans }` with one FEN
+// per ply (the start position first). Returns null when it does not fit.
+export function timelineFromPrecomputed(data) {
+    const fens = Array.isArray(data?.fens) ? data.fens : null;
+    const sans = Array.isArray(data?.sans) ? data.sans : null;
+    if (!fens || !sans || !fens.length || fens.length !== sans.length + 1) {
+        return null;
+    }
+    try {
+        return {
+            timeline: fens.map(fen => parseFEN(fen)),
+            moves: sans.map((san, idx) => ({ san, label: san, ply: idx + 1 }))
+        };
+    } catch (err) {
+        console.warn('[sbs-chess] invalid precomputed timeline', err.message);
+        return null;
+    }
+}
+
 export function classifyOpening(fen, sanMoves = []) {
     const normalizedFen = normalizeFen(fen);
     const sequence = Array.isArray(sanMoves)
@@ -150,6 +211,7 @@ class ChessController {
         this.history = [];
         this.cursor = 0;
         this.initialFen = getDefaultFEN();
+        this.scriptedMoves = [];
         this.openingInfo = null;
         this.cacheState();
     }
@@ -166,6 +228,7 @@ class ChessController {
         this.cursor = 0;
         const sanMoves = Array.isArray(pgn) ? pgn : extractSanMovesFromPgn(pgn);
         this.applySanMoves(sanMoves);
+        this.scriptedMoves = this.history.map(move => move.san);
         this.cacheState();
         return this.getSnapshot();
     }
@@ -331,6 +394,15 @@ class ChessController {
         return this.cursor;
     }
 
+    // Ply within the loaded PGN line, or -1 once the game has left it.
+    getScriptedPly() {
+        if (this.cursor > this.scriptedMoves.length) return -1;
+        for (let idx = 0; idx < this.cursor; idx += 1) {
+            if (this.history[idx]?.san !== this.scriptedMoves[idx]) return -1;
+        }
+        return this.cursor;
+    }
+
     getTimelineLength() {
         return this.history.length + 1;
     }
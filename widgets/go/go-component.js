@@ -1,5 +1,6 @@
 import { GoController } from './go-widget.js';
 import { createLightDomObserver, extractLightDomPayload } from '../shared/lightdom.js';
+import { whenVisible } from '../shared/hydration.js';
 
 const styles = `
 :host {
@@ -178,23 +179,45 @@ export class SBSGoDiagram extends HTMLElement {
         this.attachShadow({ mode: 'open' });
         this._controller = null;
         this._observer = null;
+        this._hydrated = false;
+        this._cancelHydration = null;
     }
 
     connectedCallback() {
-        this.render();
-        this._observer = createLightDomObserver(this, {
-            onMutation: () => this.updateFromLightDom()
-        });
-        this._observer.connect();
-        this.updateFromLightDom();
+        if (this._hydrated) {
+            this._connect();
+        } else if (!this._cancelHydration) {
+            this._cancelHydration = whenVisible(this, () => this.hydrate());
+        }
     }
 
     disconnectedCallback() {
+        this._cancelHydration?.();
+        this._cancelHydration = null;
         if (this._observer) {
             this._observer.disconnect();
         }
     }
 
+    // Builds the board; runs when the element nears the viewport.
+    hydrate() {
+        this._cancelHydration?.();
+        this._cancelHydration = null;
+        if (this._hydrated) return;
+        this._hydrated = true;
+        this.setAttribute('hydrated', '');
+        if (this.isConnected) this._connect();
+    }
+
+    _connect() {
+        this.render();
+        this._observer = createLightDomObserver(this, {
+            onMutation: () => this.updateFromLightDom()
+        });
+        this._observer.connect();
+        this.updateFromLightDom();
+    }
+
     render() {
         const styleTag = document.createElement('style');
         styleTag.textContent = styles;
@@ -234,7 +257,28 @@ export class SBSGoDiagram extends HTMLElement {
         }
 
         this._controller = new GoController(container, options);
-        this._controller.loadSGF(payload);
+        const snapshot = this.readSnapshot();
+        if (snapshot) {
+            this._controller.showSnapshot(snapshot, payload);
+        } else {
+            this._controller.loadSGF(payload);
+        }
+    }
+
+    readSnapshot() {
+        const script = this.querySelector('script[type="application/x-go-snapshot"]');
+        if (!script) return null;
+        try {
+            const snapshot = JSON.parse(script.textContent);
+            const size = snapshot && snapshot.size;
+            if (!size || typeof snapshot.board !== 'string' || snapshot.board.length !== size * size) {
+                return null;
+            }
+            return snapshot;
+        } catch (err) {
+            console.warn('[sbs-go] invalid snapshot payload', err.message);
+            return null;
+        }
     }
 
     parseMoveNumbers(attr) {
@@ -2,6 +2,10 @@ import { GoGame, BLACK, WHITE, EMPTY } from './go-game.js';
 import { GoBoard } from './go-board.js';
 import { smartgame } from './vendor/smartgame.js';
 import { sgfToCoord } from './sgf-parser.js';
+import { cachedParser } from '../shared/lightdom.js';
+
+// Boards showing moments of one game parse its SGF once.
+const parseSgf = cachedParser((sgf) => smartgame.parse(sgf));
 
 export const I18N = {
     zh: {
@@ -45,6 +49,7 @@ export class GoController {
         this.initialMove = options.initialMove !== undefined ? options.initialMove : -1;
         this.interactive = options.interactive || false;
         this.showMoveNumbers = options.showMoveNumbers || false; // false, true, or number
+        this.pendingSGF = null;
 
         this.init();
     }
@@ -65,11 +70,22 @@ export class GoController {
     }
 
     loadSGF(sgf) {
-        const collection = smartgame.parse(sgf);
-        if (!collection.gameTrees || collection.gameTrees.length === 0) return;
+        if (!this.parseGame(sgf)) return;
+
+        if (this.initialMove >= 0) {
+            this.goToMove(this.initialMove - 1); // SGF moves are 0-indexed in this.moves
+        } else {
+            this.currentMoveIndex = -1;
+            this.update();
+        }
+    }
+
+    parseGame(sgf) {
+        const collection = parseSgf(sgf);
+        if (!collection.gameTrees || collection.gameTrees.length === 0) return false;
 
         const tree = collection.gameTrees[0];
-        if (!tree.nodes || tree.nodes.length === 0) return;
+        if (!tree.nodes || tree.nodes.length === 0) return false;
 
         // First node is usually root
         this.rootNode = tree.nodes[0];
@@ -86,13 +102,34 @@ export class GoController {
 
         // Handle setup stones in root node (AB, AW)
         this.applySetup(this.rootNode);
+        return true;
+    }
 
-        if (this.initialMove >= 0) {
-            this.goToMove(this.initialMove - 1); // SGF moves are 0-indexed in this.moves
-        } else {
-            this.currentMoveIndex = -1;
-            this.update();
+    /**
+     * Paint the position the renderer computed (`application/x-go-snapshot`)
+     * instead of replaying the game. The SGF is only parsed once the reader
+     * navigates away from it.
+     */
+    showSnapshot(snapshot, sgf) {
+        const size = snapshot.size;
+        if (size !== this.game.size) {
+            this.board.setSize(size);
         }
+        this.game.reset(size);
+        this.game.board = Array.from(snapshot.board, c => (c === 'B' ? BLACK : c === 'W' ? WHITE : EMPTY));
+        this.currentMoveIndex = snapshot.move - 1;
+        this.pendingSGF = sgf;
+        this.board.render(this.game.board, snapshot.markers || {});
+        this.updateMoveInfo(snapshot.move, snapshot.total);
+    }
+
+    ensureParsed() {
+        if (!this.pendingSGF) return;
+        const sgf = this.pendingSGF;
+        this.pendingSGF = null;
+        const index = this.currentMoveIndex;
+        this.parseGame(sgf);
+        this.currentMoveIndex = index;
     }
 
     applySetup(node) {
@@ -129,6 +166,7 @@ export class GoController {
             const btn = e.target.closest('button');
             if (!btn) return;
             const action = btn.dataset.action;
+            this.ensureParsed();
             if (action === 'start') this.goToMove(-1);
             else if (action === 'prev') this.goToMove(this.currentMoveIndex - 1);
             else if (action === 'next') this.goToMove(this.currentMoveIndex + 1);
@@ -215,12 +253,13 @@ export class GoController {
         }
 
         this.board.render(this.game.board, markers);
-        
+        this.updateMoveInfo(this.currentMoveIndex + 1, this.moves.length);
+    }
+
+    updateMoveInfo(n, total) {
         const info = this.container.querySelector('.move-info');
         if (info) {
             const t = I18N[this.lang];
-            const n = this.currentMoveIndex + 1;
-            const total = this.moves.length;
             if (this.lang === 'zh') {
                 info.textContent = `${t.move.replace('{n}', n)} ${t.total.replace('{total}', total)}`;
             } else {
@@ -1,3 +1,5 @@
+import { whenVisible } from './shared/hydration.js';
+
 const WIDGET_MODULES = [
     { selector: 'sbs-bridge', module: './bridge/index.js' },
     { selector: 'sbs-chess', module: './chess/index.js' },
@@ -5,23 +7,38 @@ const WIDGET_MODULES = [
 ];
 
 const loaded = new Set();
+const watched = new WeakSet();
 
+function loadModule(module) {
+    if (loaded.has(module)) return;
+    loaded.add(module);
+    import(module).catch((error) => {
+        loaded.delete(module);
+        console.error(`[sbs-ext] Failed to load ${module}`, error);
+    });
+}
+
+// A widget's module is fetched when the first of its elements nears the
+// viewport; each element then hydrates on its own (shared/hydration.js).
 function maybeLoadWidgets() {
     for (const { selector, module } of WIDGET_MODULES) {
         if (loaded.has(module)) continue;
-        if (!document.querySelector(selector)) continue;
-        loaded.add(module);
-        import(module).catch((error) => {
-            loaded.delete(module);
-            console.error(`[sbs-ext] Failed to load ${module}`, error);
-        });
+        for (const element of document.querySelectorAll(selector)) {
+            if (watched.has(element)) continue;
+            watched.add(element);
+            whenVisible(element, () => loadModule(module));
+        }
     }
 }
 
+function start() {
+    maybeLoadWidgets();
+    // Live previews insert blocks after load.
+    new MutationObserver(maybeLoadWidgets).observe(document.body, { childList: true, subtree: true });
+}
+
 if (document.readyState === 'loading') {
-    document.addEventListener('DOMContentLoaded', () => {
-        maybeLoadWidgets();
-    });
+    document.addEventListener('DOMContentLoaded', start);
 } else {
-    maybeLoadWidgets();
+    start();
 }
@@ -0,0 +1,79 @@
+// Widgets build their DOM only when they come near the viewport, so opening
+// a long chapter costs the same whatever its number of diagrams. Until then
+// each element keeps the box the renderer reserved for it (sbs-ext.css).
+//
+// The distance is the `--sbs-hydration-margin` custom property on the root
+// element, in IntersectionObserver `rootMargin` syntax (px or %).
+
+const DEFAULT_ROOT_MARGIN = '400px 0px';
+
+const waiting = new Map();
+let observer;
+
+export function hydrationRootMargin() {
+    const value = getComputedStyle(document.documentElement)
+        .getPropertyValue('--sbs-hydration-margin')
+        .trim();
+    return value || DEFAULT_ROOT_MARGIN;
+}
+
+function run(element) {
+    const callbacks = waiting.get(element);
+    if (!callbacks) return;
+    waiting.delete(element);
+    observer?.unobserve(element);
+    for (const callback of callbacks) {
+        callback();
+    }
+}
+
+function getObserver() {
+    if (observer !== undefined) return observer;
+    if (typeof IntersectionObserver === 'undefined') {
+        observer = null;
+        return observer;
+    }
+    const onIntersect = (entries) => {
+        for (const entry of entries) {
+            if (entry.isIntersecting) run(entry.target);
+        }
+    };
+    try {
+        observer = new IntersectionObserver(onIntersect, { rootMargin: hydrationRootMargin() });
+    } catch (error) {
+        console.warn('[sbs-ext] invalid --sbs-hydration-margin, using the default', error.message);
+        observer = new IntersectionObserver(onIntersect, { rootMargin: DEFAULT_ROOT_MARGIN });
+    }
+    // Printing shows every widget, so hydrate whatever is still waiting.
+    window.addEventListener('beforeprint', () => {
+        for (const element of [...waiting.keys()]) run(element);
+    });
+    return observer;
+}
+
+/**
+ * Call `callback` once `element` is within the hydration margin of the
+ * viewport (right away without IntersectionObserver). Returns a function
+ * that cancels the call.
+ */
+export function whenVisible(element, callback) {
+    const io = getObserver();
+    if (!io) {
+        callback();
+        return () => {};
+    }
+    let callbacks = waiting.get(element);
+    if (!callbacks) {
+        callbacks = new Set();
+        waiting.set(element, callbacks);
+        io.observe(element);
+    }
+    callbacks.add(callback);
+    return () => {
+        callbacks.delete(callback);
+        if (!callbacks.size && waiting.get(element) === callbacks) {
+            waiting.delete(element);
+            io.unobserve(element);
+        }
+    };
+}
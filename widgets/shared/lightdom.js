@@ -11,7 +11,7 @@ export function extractLightDomPayload(host, { scriptType, templateType, fallbac
     }
 
     if (scriptType) {
-        const script = host.querySelector(`script[type="${scriptType}"]`);
+        const script = host.querySelector(`script[type="${scriptType}"]`) || sharedPayload(host, scriptType);
         if (script && typeof script.textContent === 'string') {
             const text = script.textContent.trim();
             if (text) {
@@ -38,6 +38,40 @@ export function extractLightDomPayload(host, { scriptType, templateType, fallbac
     return null;
 }
 
+// The renderer embeds a payload repeated across widgets once and points the
+// other widgets at it with `data-sbs-payload`.
+function sharedPayload(host, scriptType) {
+    const id = host.getAttribute('data-sbs-payload');
+    if (!id) {
+        return null;
+    }
+    const root = host.getRootNode();
+    const script = (typeof root.getElementById === 'function' ? root.getElementById(id) : null) || document.getElementById(id);
+    return script && script.type === scriptType ? script : null;
+}
+
+/**
+ * Wrap `parse` so each distinct payload text is parsed once per page.
+ * Results are shared between widgets and must not be mutated.
+ */
+export function cachedParser(parse, { limit = 32 } = {}) {
+    const cache = new Map();
+    return (text) => {
+        if (cache.has(text)) {
+            const value = cache.get(text);
+            cache.delete(text);
+            cache.set(text, value);
+            return value;
+        }
+        const value = parse(text);
+        cache.set(text, value);
+        if (cache.size > limit) {
+            cache.delete(cache.keys().next().value);
+        }
+        return value;
+    };
+}
+
 export function createLightDomObserver(host, { shouldHandleMutation, onMutation } = {}) {
     if (!host) {
         throw new Error('createLightDomObserver requires a host element.');